@@ -0,0 +1,206 @@
+"""Fit findings and cited excerpts into a model's context window.
+
+:class:`ContextPacker` builds the Synthesizer / Critic / Reporter prompts in two
+parts:
+
+- a **prefix**: the role's system prompt followed by the findings so far, in
+  the order they were recorded. Findings are only ever appended, so one call's
+  prefix is a prefix of the next call's and servers that reuse prompt KV state
+  (Ollama ``context``, LM Studio's prompt cache) skip recomputing it;
+- a **body**: retrieved chunks as ``[doc_id] excerpt`` lines, the most relevant
+  (highest retrieval score) first, followed by the instruction.
+
+The token budget is ``context_window - reserve`` (``reserve`` is left for the
+answer). Chunks are added whole while they fit; the first one that does not is
+cut at a sentence or word boundary if at least ``min_excerpt_tokens`` remain,
+and the rest are dropped. Token counts use the model family's
+:class:`~deepr.ingestion.chunking.LengthEstimator`.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from ..config.settings import DeepRSettings
+from ..ingestion.chunking import LengthEstimator, estimator_for
+
+log = logging.getLogger(__name__)
+
+_SENTENCE_END = re.compile(r"[.!?。！？][\"')\]]*\s")
+
+DEFAULT_CONTEXT_WINDOW = 8192
+DEFAULT_RESERVE = 1024
+
+
+@dataclass(frozen=True)
+class ContextItem:
+    """A retrieved chunk: ``id`` is the chunk id (``"<doc_id>#<n>"``)."""
+
+    id: str
+    text: str
+    score: float = 0.0
+    doc_id: Optional[str] = None
+    tokens: Optional[int] = None  # known token count, e.g. from chunk metadata
+
+    @property
+    def cite(self) -> str:
+        return self.doc_id or self.id.rsplit("#", 1)[0]
+
+
+@dataclass
+class PackedContext:
+    prefix: str
+    body: str
+    tokens: int
+    included: list[str] = field(default_factory=list)
+    truncated: list[str] = field(default_factory=list)
+    dropped: list[str] = field(default_factory=list)
+    prefix_reused: bool = False  # prefix extends the previous prompt's for this role
+
+    @property
+    def prompt(self) -> str:
+        return self.prefix + self.body
+
+
+def items_from_hits(
+    hits: Iterable[tuple[str, float]],
+    text_for: Callable[[str], Optional[str]],
+) -> list[ContextItem]:
+    """Context items for vector-store hits ``[(chunk_id, score)]``; hits without text are skipped."""
+    items = []
+    for chunk_id, score in hits:
+        text = text_for(chunk_id)
+        if text:
+            items.append(ContextItem(chunk_id, text, float(score)))
+    return items
+
+
+def format_finding(finding: Any) -> str:
+    if isinstance(finding, str):
+        return finding
+    # canonical JSON: the same finding renders identically on every call
+    return json.dumps(finding, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+class ContextPacker:
+    """Packs prompts for a model with a ``context_window``-token window."""
+
+    def __init__(
+        self,
+        context_window: int = DEFAULT_CONTEXT_WINDOW,
+        reserve: int = DEFAULT_RESERVE,
+        estimator: Optional[LengthEstimator] = None,
+        min_excerpt_tokens: int = 48,
+        max_findings_share: float = 0.5,
+    ) -> None:
+        if reserve >= context_window:
+            raise ValueError("reserve must be smaller than context_window")
+        self.context_window = context_window
+        self.reserve = reserve
+        self.estimator = estimator or LengthEstimator()
+        self.min_excerpt_tokens = min_excerpt_tokens
+        self.max_findings_share = max_findings_share
+        self._prefixes: dict[str, str] = {}
+
+    @classmethod
+    def from_settings(cls, settings: DeepRSettings, **kwargs: Any) -> "ContextPacker":
+        """Packer for ``settings.model``; ``max_tokens`` (if set) is reserved for the answer,
+        capped at half the window so a small-window model still has room for the prompt."""
+        cfg = settings.model
+        kwargs.setdefault("context_window", cfg.context_window)
+        kwargs.setdefault("reserve", min(cfg.max_tokens or DEFAULT_RESERVE, kwargs["context_window"] // 2))
+        kwargs.setdefault("estimator", estimator_for(cfg.model))
+        return cls(**kwargs)
+
+    @property
+    def budget(self) -> int:
+        return self.context_window - self.reserve
+
+    def count(self, text: str) -> int:
+        return self.estimator.count(text)
+
+    def _cut(self, text: str, tokens: int) -> str:
+        if self.count(text) <= tokens:
+            return text
+        limit = self.estimator.chars_for(tokens)
+        head = text[:limit]
+        if not head.isascii():  # the estimator counts UTF-8 bytes
+            head = head[: limit * len(head) // len(head.encode("utf-8"))]
+            limit = len(head)
+        ends = [m.end() for m in _SENTENCE_END.finditer(head)]
+        if ends and ends[-1] > limit // 2:
+            return head[: ends[-1]].rstrip() + " …"
+        space = head.rfind(" ")
+        return (head[:space] if space > limit // 2 else head).rstrip() + " …"
+
+    def _findings_block(self, findings: Sequence[Any], budget: int) -> str:
+        lines = [format_finding(f) for f in findings]
+        used = 0
+        start = len(lines)
+        # keep the most recent findings that fit; older ones drop off the front
+        while start > 0 and used + self.count(lines[start - 1]) + 1 <= budget:
+            start -= 1
+            used += self.count(lines[start]) + 1
+        if start:
+            log.info("findings trimmed to fit context", extra={"dropped": start, "kept": len(lines) - start})
+        if start == len(lines):
+            return ""
+        # no trailing blank line: the next call appends right after the last finding
+        return "\nFindings so far:\n" + "".join(line + "\n" for line in lines[start:])
+
+    def pack(
+        self,
+        system: str,
+        items: Sequence[ContextItem],
+        instruction: str = "",
+        findings: Sequence[Any] = (),
+        role: Optional[str] = None,
+    ) -> PackedContext:
+        """Build the prompt for ``role`` (defaults to keying the prefix cache by ``system``)."""
+        instruction_block = f"\n{instruction.strip()}\n" if instruction.strip() else ""
+        system_block = system.rstrip() + "\n"
+        remaining = self.budget - self.count(system_block) - self.count(instruction_block)
+        if remaining <= 0:
+            raise ValueError("system prompt and instruction exceed the context budget")
+
+        prefix = system_block + self._findings_block(findings, int(remaining * self.max_findings_share))
+        remaining -= self.count(prefix) - self.count(system_block)
+
+        key = role or system
+        previous = self._prefixes.get(key)
+        self._prefixes[key] = prefix
+        packed = PackedContext(prefix=prefix, body="", tokens=0, prefix_reused=previous is not None and prefix.startswith(previous))
+
+        lines: list[str] = []
+        seen: set[str] = set()
+        if items:
+            remaining -= self.count("\nSources:\n")
+        for item in sorted(items, key=lambda i: -i.score):
+            if item.id in seen:
+                continue
+            seen.add(item.id)
+            label = f"[{item.cite}] "
+            cost = (item.tokens if item.tokens is not None else self.count(item.text)) + self.count(label) + 1
+            if cost <= remaining:
+                lines.append(label + item.text.strip())
+                packed.included.append(item.id)
+                remaining -= cost
+            elif remaining - self.count(label) - 1 >= self.min_excerpt_tokens:
+                excerpt = self._cut(item.text.strip(), remaining - self.count(label) - 1)
+                lines.append(label + excerpt)
+                packed.truncated.append(item.id)
+                remaining -= self.count(label + excerpt) + 1
+            else:
+                packed.dropped.append(item.id)
+
+        packed.body = ("\nSources:\n" + "\n".join(lines) + "\n" if lines else "") + instruction_block
+        packed.tokens = self.count(packed.prompt)
+        if packed.dropped:
+            log.debug("context items dropped", extra={"dropped": len(packed.dropped), "included": len(packed.included)})
+        return packed
+
+
+__all__ = ["ContextPacker", "ContextItem", "PackedContext", "items_from_hits", "format_finding"]
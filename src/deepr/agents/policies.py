@@ -0,0 +1,283 @@
+"""Run-level guardrails: token and wall-clock budgets.
+
+:class:`BudgetController` enforces ``BudgetConfig.max_tokens`` and
+``max_time_seconds`` across a run. Model calls go through
+:class:`BudgetedProvider`, which streams under the hood so it can stop a
+generation as soon as the budget runs out and return what was produced so far.
+Tool calls are bounded by :meth:`BudgetController.run_tool`, and the
+planner/critic loop can call :meth:`BudgetController.allowed_tasks` to shrink
+refinement rounds as the budget drains.
+
+Token usage is approximate (about four characters per token), in line with
+the lightweight tracker described in the architecture notes.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Iterator, Optional
+
+from ..config.settings import BudgetConfig
+from ..models.llm_provider import ModelProvider, join_prompt
+from ..models.metrics import MetricsHook
+from ..models.session import ProviderSession
+from ..models.structured import Schema
+from ..tools.base import BaseTool, ToolInput, ToolResult
+
+log = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for budgeting (~4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+class BudgetExceeded(RuntimeError):
+    """Raised when a call is attempted after the run budget is spent."""
+
+
+class BudgetController:
+    """Tracks tokens and elapsed time for one run against a :class:`BudgetConfig`.
+
+    The clock starts when the controller is created. Safe to share between
+    threads and tasks.
+    """
+
+    def __init__(self, config: Optional[BudgetConfig] = None, clock: Callable[[], float] = time.monotonic) -> None:
+        self.config = config or BudgetConfig()
+        self._clock = clock
+        self._t0 = clock()
+        self._tokens = 0
+        self._lock = threading.Lock()
+
+    @property
+    def tokens_used(self) -> int:
+        return self._tokens
+
+    @property
+    def elapsed(self) -> float:
+        return self._clock() - self._t0
+
+    @property
+    def remaining_tokens(self) -> Optional[int]:
+        if self.config.max_tokens is None:
+            return None
+        return max(0, self.config.max_tokens - self._tokens)
+
+    @property
+    def remaining_seconds(self) -> Optional[float]:
+        if self.config.max_time_seconds is None:
+            return None
+        return max(0.0, self.config.max_time_seconds - self.elapsed)
+
+    def exhausted_reason(self, pending_tokens: int = 0) -> Optional[str]:
+        """Why the budget is spent (counting ``pending_tokens`` not yet charged), or None."""
+        limit = self.config.max_tokens
+        if limit is not None and self._tokens + pending_tokens >= limit:
+            return f"token budget of {limit} reached"
+        seconds = self.remaining_seconds
+        if seconds is not None and seconds <= 0:
+            return f"time budget of {self.config.max_time_seconds}s reached"
+        return None
+
+    @property
+    def exhausted(self) -> bool:
+        return self.exhausted_reason() is not None
+
+    def check(self) -> None:
+        reason = self.exhausted_reason()
+        if reason is not None:
+            raise BudgetExceeded(reason)
+
+    def charge(self, tokens: int) -> None:
+        with self._lock:
+            self._tokens += max(0, tokens)
+
+    def fraction_used(self) -> float:
+        """Largest share of any configured limit consumed so far (0.0 when unlimited)."""
+        fractions = [0.0]
+        if self.config.max_tokens:
+            fractions.append(self._tokens / self.config.max_tokens)
+        if self.config.max_time_seconds:
+            fractions.append(self.elapsed / self.config.max_time_seconds)
+        return min(1.0, max(fractions))
+
+    def allowed_tasks(self, requested: int, reserve: float = 0.2) -> int:
+        """How many of ``requested`` refinement tasks to schedule.
+
+        Scales linearly with the budget left, and drops to zero once only
+        ``reserve`` of it remains so synthesis and reporting can still run.
+        """
+        if requested <= 0:
+            return 0
+        used = self.fraction_used()
+        if used >= 1.0 - reserve:
+            return 0
+        share = 1.0 - used / (1.0 - reserve)
+        return max(1, math.floor(requested * share))
+
+    def wrap(self, provider: ModelProvider) -> "BudgetedProvider":
+        return BudgetedProvider(provider, self)
+
+    async def run_tool(self, tool: BaseTool, inp: ToolInput) -> ToolResult:
+        """Run ``tool`` bounded by the remaining time budget."""
+        reason = self.exhausted_reason()
+        if reason is not None:
+            return ToolResult(ok=False, error=f"budget exhausted: {reason}")
+        try:
+            return await asyncio.wait_for(tool.run(inp), timeout=self.remaining_seconds)
+        except asyncio.TimeoutError:
+            return ToolResult(ok=False, error="budget exhausted: time limit reached during tool call")
+
+    def usage(self) -> dict[str, Any]:
+        return {
+            "tokens_used": self._tokens,
+            "elapsed_seconds": self.elapsed,
+            "max_tokens": self.config.max_tokens,
+            "max_time_seconds": self.config.max_time_seconds,
+        }
+
+
+class BudgetedProvider(ModelProvider):
+    """Provider wrapper that charges a :class:`BudgetController` and truncates at the limit.
+
+    Calls fail with :class:`BudgetExceeded` if the budget is already spent.
+    Streamed generations (``stream``/``generate`` and structured calls without
+    a session) are cut off once they would cross the token or time limit and
+    the partial text returned; synchronous streams are checked between chunks,
+    async ones are additionally cancelled when the time budget expires.
+
+    Chat calls and structured calls with a session are forwarded unstreamed
+    (keeping the session): the budget is checked before and charged after
+    them. Async ones raise :class:`BudgetExceeded` if the time budget expires
+    mid-call; synchronous ones cannot be interrupted and run to completion.
+    """
+
+    def __init__(self, provider: ModelProvider, controller: BudgetController) -> None:
+        self.provider = provider
+        self.controller = controller
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.provider, name)
+
+    def add_metrics_hook(self, hook: MetricsHook) -> None:
+        # calls are recorded by the wrapped provider
+        self.provider.add_metrics_hook(hook)
+
+    def _truncated(self, reason: str, produced: int) -> None:
+        log.warning("generation truncated by budget", extra={"reason": reason, "completion_tokens_est": produced})
+
+    def _metered(self, open_stream: Callable[[], Iterable[str]], prompt: str) -> Iterator[str]:
+        self.controller.check()
+        prompt_tokens = estimate_tokens(prompt)
+        produced = 0
+        chunks = iter(open_stream())
+        try:
+            for chunk in chunks:
+                yield chunk
+                produced += estimate_tokens(chunk)
+                reason = self.controller.exhausted_reason(prompt_tokens + produced)
+                if reason is not None:
+                    self._truncated(reason, produced)
+                    break
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()  # stop the in-flight generation
+            self.controller.charge(prompt_tokens + produced)
+
+    async def _ametered(self, open_stream: Callable[[], AsyncIterable[str]], prompt: str) -> AsyncIterator[str]:
+        self.controller.check()
+        prompt_tokens = estimate_tokens(prompt)
+        produced = 0
+        chunks = open_stream().__aiter__()
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(anext(chunks), timeout=self.controller.remaining_seconds)
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    self._truncated("time budget reached", produced)
+                    break
+                yield chunk
+                produced += estimate_tokens(chunk)
+                reason = self.controller.exhausted_reason(prompt_tokens + produced)
+                if reason is not None:
+                    self._truncated(reason, produced)
+                    break
+        finally:
+            aclose = getattr(chunks, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            self.controller.charge(prompt_tokens + produced)
+
+    def stream(self, prompt: str) -> Iterable[str]:
+        return self._metered(lambda: self.provider.stream(prompt), prompt)
+
+    def generate(self, prompt: str) -> str:
+        return "".join(self.stream(prompt))
+
+    def astream(self, prompt: str) -> AsyncIterator[str]:
+        return self._ametered(lambda: self.provider.astream(prompt), prompt)
+
+    async def agenerate(self, prompt: str) -> str:
+        return "".join([chunk async for chunk in self.astream(prompt)])
+
+    # chat and session calls go to the wrapped provider so the session (split system
+    # prompt, keep_alive, carried context) is kept; they are not streamed, so the
+    # budget is checked before the call and charged after it
+    def _charged(self, call: Callable[[], str], system: str, prompt: str) -> str:
+        self.controller.check()
+        text = ""
+        try:
+            text = call()
+        finally:
+            self.controller.charge(estimate_tokens(join_prompt(system, prompt)) + estimate_tokens(text))
+        return text
+
+    async def _acharged(self, call: Callable[[], Awaitable[str]], system: str, prompt: str) -> str:
+        self.controller.check()
+        text = ""
+        try:
+            async with asyncio.timeout(self.controller.remaining_seconds) as deadline:
+                text = await call()
+        except TimeoutError:
+            if not deadline.expired():
+                raise  # the provider's own timeout, not the budget's
+            raise BudgetExceeded(self.controller.exhausted_reason() or "time budget reached") from None
+        finally:
+            self.controller.charge(estimate_tokens(join_prompt(system, prompt)) + estimate_tokens(text))
+        return text
+
+    def generate_chat(self, system: str, prompt: str, session: Optional[ProviderSession] = None) -> str:
+        return self._charged(lambda: self.provider.generate_chat(system, prompt, session), system, prompt)
+
+    async def agenerate_chat(self, system: str, prompt: str, session: Optional[ProviderSession] = None) -> str:
+        return await self._acharged(lambda: self.provider.agenerate_chat(system, prompt, session), system, prompt)
+
+    # structured output keeps the wrapped provider's JSON mode, metered like any stream
+    def _stream_structured(self, system: str, prompt: str, schema: Schema) -> Iterable[str]:
+        return self._metered(lambda: self.provider._stream_structured(system, prompt, schema), join_prompt(system, prompt))
+
+    def _astream_structured(self, system: str, prompt: str, schema: Schema) -> AsyncIterator[str]:
+        return self._ametered(lambda: self.provider._astream_structured(system, prompt, schema), join_prompt(system, prompt))
+
+    def _generate_structured(self, system: str, prompt: str, schema: Schema, session: Optional[ProviderSession] = None) -> str:
+        if session is None:
+            return "".join(self._stream_structured(system, prompt, schema))
+        return self._charged(lambda: self.provider._generate_structured(system, prompt, schema, session), system, prompt)
+
+    async def _agenerate_structured(
+        self, system: str, prompt: str, schema: Schema, session: Optional[ProviderSession] = None
+    ) -> str:
+        if session is None:
+            return "".join([chunk async for chunk in self._astream_structured(system, prompt, schema)])
+        return await self._acharged(
+            lambda: self.provider._agenerate_structured(system, prompt, schema, session), system, prompt
+        )
+
+__all__ = ["BudgetController", "BudgetedProvider", "BudgetExceeded", "estimate_tokens"]
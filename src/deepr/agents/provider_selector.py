@@ -1,27 +1,106 @@
 from __future__ import annotations
+import logging
 from typing import Optional
 from ..models.llm_provider import ModelProvider, OllamaProvider, LMStudioProvider, DummyProvider
+from ..models.cache import CachedProvider
+from ..models.metrics import MetricsHook
+from ..models.embedding_provider import EmbeddingProvider, HashingEmbeddingProvider, SentenceTransformerProvider
+from ..models.negotiation import NegotiationCache
+from ..models.router import RouterProvider
 from ..config.settings import DeepRSettings
+from ..utils.disk_cache import DiskCache
 
+log = logging.getLogger(__name__)
 
-def get_provider(settings: Optional[DeepRSettings] = None) -> ModelProvider:
+
+def get_provider(settings: Optional[DeepRSettings] = None, metrics: Optional[MetricsHook] = None) -> ModelProvider:
     """Return a ModelProvider instance based on settings (scaffold).
 
-    Defaults to Ollama if settings not provided.
+    Defaults to Ollama if settings not provided. When ``settings.model.endpoints``
+    lists model servers, a :class:`RouterProvider` balances across them. When
+    ``settings.cache.llm_responses`` is enabled the provider is wrapped in a
+    :class:`CachedProvider` backed by ``cache_dir/llm_responses.sqlite``.
+    ``metrics`` (e.g. a :class:`~deepr.models.metrics.RunMetrics`) is registered
+    on the backends that make the calls.
     """
     if settings is None:
         settings = DeepRSettings()
 
-    provider = settings.model.provider
-    model = settings.model.model
+    if settings.model.endpoints:
+        provider = _routed_provider(settings)
+    else:
+        provider = _base_provider(settings)
+    if settings.cache.llm_responses:
+        cache = DiskCache(
+            settings.cache_dir / "llm_responses.sqlite",
+            max_bytes=settings.cache.llm_max_mb * 1024 * 1024,
+            ttl=settings.cache.llm_ttl_seconds,
+        )
+        provider = CachedProvider(provider, cache)
+    if metrics is not None:
+        provider.add_metrics_hook(metrics)
+    return provider
+
+
+def _routed_provider(settings: DeepRSettings) -> ModelProvider:
+    cfg = settings.model
+    # one route cache shared by all LM Studio backends (entries are keyed per base_url)
+    routes = NegotiationCache(settings.cache_dir / "lmstudio_routes.json")
+    backends: list[ModelProvider] = []
+    for ep in cfg.endpoints:
+        backends.append(
+            _base_provider(settings, provider=ep.provider, base_url=ep.base_url, model=ep.model or cfg.model, routes=routes)
+        )
+    return RouterProvider(
+        backends,
+        cooldown=cfg.router_cooldown_seconds,
+        model=cfg.model,
+        temperature=cfg.temperature,
+        max_tokens=cfg.max_tokens,
+    )
+
+
+def _base_provider(
+    settings: DeepRSettings,
+    provider: Optional[str] = None,
+    base_url: Optional[str] = None,
+    model: Optional[str] = None,
+    routes: Optional[NegotiationCache] = None,
+) -> ModelProvider:
+    provider = provider or settings.model.provider
+    model = model or settings.model.model
     temp = settings.model.temperature
     max_t = settings.model.max_tokens
+    # size the provider's connection pool to the number of concurrent LLM calls
+    opts: dict = {"max_connections": settings.concurrency.max_llm_parallel}
+    if base_url is not None:
+        opts["base_url"] = base_url
 
     if provider == "ollama":
-        return OllamaProvider(model=model, temperature=temp, max_tokens=max_t)
+        return OllamaProvider(model=model, temperature=temp, max_tokens=max_t, keep_alive=settings.model.keep_alive, **opts)
     if provider == "lmstudio":
-        return LMStudioProvider(model=model, temperature=temp, max_tokens=max_t)
+        routes = routes or NegotiationCache(settings.cache_dir / "lmstudio_routes.json")
+        return LMStudioProvider(model=model, temperature=temp, max_tokens=max_t, routes=routes, **opts)
     if provider == "dummy":
         return DummyProvider()
     # fallback
-    return OllamaProvider(model=model, temperature=temp, max_tokens=max_t)
+    log.warning("unknown model provider, falling back to ollama", extra={"provider": provider})
+    return OllamaProvider(model=model, temperature=temp, max_tokens=max_t, keep_alive=settings.model.keep_alive, **opts)
+
+
+def get_embedding_provider(settings: Optional[DeepRSettings] = None) -> EmbeddingProvider:
+    """Return the EmbeddingProvider configured in ``settings.embedding``.
+
+    Batches by ``concurrency.embed_batch_size``. Unless ``cache.embeddings`` is
+    disabled, vectors are cached in ``cache_dir/embeddings.sqlite``.
+    """
+    if settings is None:
+        settings = DeepRSettings()
+    cfg = settings.embedding
+    cache = None
+    if settings.cache.embeddings:
+        cache = DiskCache(settings.cache_dir / "embeddings.sqlite", max_bytes=settings.cache.embeddings_max_mb * 1024 * 1024)
+    batch_size = settings.concurrency.embed_batch_size
+    if cfg.provider == "hashing":
+        return HashingEmbeddingProvider(dim=cfg.dim or 256, batch_size=batch_size, cache=cache)
+    return SentenceTransformerProvider(cfg.model, batch_size=batch_size, cache=cache)
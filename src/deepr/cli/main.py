@@ -1,6 +1,16 @@
 from __future__ import annotations
+import uuid
+from typing import Optional
+
 import typer
+from ..agents.provider_selector import get_provider
+from ..config.settings import DeepRSettings
+from ..graph.scheduler import TaskScheduler
+from ..graph.state import SharedGraphState
 from ..logging.logger import configure_logging
+from ..models.metrics import RunMetrics
+from ..orchestration.checkpoint import Checkpointer
+from ..pkb.indexer import PKBIndexer, auto_index
 
 app = typer.Typer(help="DeepR local deep research CLI")
 
@@ -14,9 +24,60 @@ def version() -> None:
     typer.echo("DeepR version 0.0.0-dev")
 
 @app.command()
-def research(query: str):
-    """Start a research run (scaffold)."""
-    typer.echo(f"[scaffold] Would start research for: {query}")
+def research(
+    query: Optional[str] = typer.Argument(None),
+    resume: Optional[str] = typer.Option(None, "--resume", help="Resume a checkpointed run by id."),
+):
+    """Start a research run, or resume one from its checkpoint (scaffold)."""
+    settings = DeepRSettings()
+    if resume:
+        checkpointer = Checkpointer(settings.workspace_root, resume)
+        if not checkpointer.exists():
+            typer.echo(f"No checkpoint found for run {resume} under {settings.workspace_root}", err=True)
+            raise typer.Exit(code=1)
+        state = checkpointer.resume()
+        state.tasks.max_parallel = settings.concurrency.max_task_parallel
+        typer.echo(
+            f"[scaffold] Resuming run {state.run_id}: {len(state.tasks.pending())} pending tasks, "
+            f"{len(state.documents)} documents, {len(state.findings)} findings"
+        )
+        return
+    if not query:
+        typer.echo("Provide a query, or --resume <run_id>.", err=True)
+        raise typer.Exit(code=2)
+    auto_index(settings)
+    run_id = uuid.uuid4().hex[:12]
+    checkpointer = Checkpointer(settings.workspace_root, run_id)
+    state = SharedGraphState(
+        run_id=run_id,
+        plan={"query": query},
+        tasks=TaskScheduler.from_settings(settings),
+        documents=checkpointer.open_document_store(),
+    )
+    checkpointer.checkpoint(state)
+    # every model call of the run is aggregated and summarized when it ends
+    metrics = RunMetrics(run_id)
+    provider = get_provider(settings, metrics=metrics)
+    try:
+        typer.echo(f"[scaffold] Would start research for: {query} (run {run_id})")
+    finally:
+        metrics.log_summary()
+        close = getattr(provider, "close", None)
+        if close is not None:
+            close()
+
+@app.command()
+def pkb() -> None:
+    """Index (or incrementally re-index) the configured PKB paths."""
+    settings = DeepRSettings()
+    if not settings.pkb.paths:
+        typer.echo("No PKB paths configured.")
+        return
+    stats = PKBIndexer.from_settings(settings).index()
+    typer.echo(
+        f"Indexed {stats.scanned} files: {stats.updated} updated, {stats.removed} removed, "
+        f"{stats.unchanged} unchanged ({stats.chunks_added} chunks, {stats.seconds:.2f}s)"
+    )
 
 if __name__ == "__main__":  # pragma: no cover
     app()
@@ -3,16 +3,25 @@ from pydantic import BaseModel, Field
 from pathlib import Path
 from typing import Literal
 
+class ModelEndpoint(BaseModel):
+    provider: Literal['ollama','lmstudio'] = 'ollama'
+    base_url: str
+    model: str | None = None  # defaults to ModelConfig.model
+
 class ModelConfig(BaseModel):
     provider: Literal['ollama','lmstudio','remote'] = 'ollama'
     model: str = 'llama3'
     temperature: float = 0.2
     max_tokens: int | None = None
+    context_window: int = 8192  # prompt + answer tokens the model accepts
+    keep_alive: str | None = '30m'  # Ollama: keep the model and its prompt cache loaded between calls
+    endpoints: list[ModelEndpoint] = Field(default_factory=list)  # >1 server -> routed
+    router_cooldown_seconds: float = 30.0
 
 class EmbeddingConfig(BaseModel):
-    provider: Literal['sentence_transformers','huggingface_local'] = 'sentence_transformers'
+    provider: Literal['sentence_transformers','huggingface_local','hashing'] = 'sentence_transformers'
     model: str = 'all-MiniLM-L6-v2'
-    dim: int | None = None
+    dim: int | None = None  # used by the hashing backend; model backends report their own
 
 class SearchConfig(BaseModel):
     enable_tavily: bool = True
@@ -26,11 +35,29 @@ class PKBConfig(BaseModel):
 class ConcurrencyConfig(BaseModel):
     max_fetch_parallel: int = 4
     embed_batch_size: int = 16
+    max_llm_parallel: int = 4
+    max_task_parallel: int = 4
+    max_tool_parallel: int = 16
 
 class BudgetConfig(BaseModel):
     max_tokens: int | None = None
     max_time_seconds: int | None = None
 
+class DedupConfig(BaseModel):
+    enabled: bool = True
+    threshold: float = 0.8  # estimated Jaccard similarity of word 3-shingles
+
+class CacheConfig(BaseModel):
+    llm_responses: bool = False
+    llm_ttl_seconds: int | None = None
+    llm_max_mb: int = 256
+    embeddings: bool = True
+    embeddings_max_mb: int = 1024
+    tool_results: bool = True
+    tool_ttl_seconds: int | None = 24 * 3600
+    tool_ttls: dict[str, int | None] = Field(default_factory=dict)  # per-tool override, by tool name; None = never expire
+    tool_max_mb: int = 512
+
 class DeepRSettings(BaseModel):
     model: ModelConfig = ModelConfig()
     embedding: EmbeddingConfig = EmbeddingConfig()
@@ -38,10 +65,12 @@ class DeepRSettings(BaseModel):
     pkb: PKBConfig = PKBConfig()
     concurrency: ConcurrencyConfig = ConcurrencyConfig()
     budget: BudgetConfig = BudgetConfig()
+    cache: CacheConfig = CacheConfig()
+    dedup: DedupConfig = DedupConfig()
     workspace_root: Path = Path('./runs')
     output_formats: list[str] = ['markdown','json']
     cache_dir: Path = Path('./cache')
 
 __all__ = [
-    'DeepRSettings','ModelConfig','EmbeddingConfig','SearchConfig','PKBConfig','ConcurrencyConfig','BudgetConfig'
+    'DeepRSettings','ModelConfig','ModelEndpoint','EmbeddingConfig','SearchConfig','PKBConfig','ConcurrencyConfig','BudgetConfig','CacheConfig','DedupConfig'
 ]
@@ -0,0 +1,176 @@
+"""Priority/dependency-aware scheduler for research tasks.
+
+Tasks are plain dicts (as produced by the Planner and Critic prompts). Keys the
+scheduler understands:
+
+- ``id``: unique task id (assigned if missing)
+- ``priority``: lower runs sooner; defaults by ``kind``
+- ``kind``: ``"plan"`` (initial plan task) or ``"refinement"`` (critic follow-up)
+- ``depends_on``: ids that must complete before the task becomes ready
+
+Ready tasks live in a binary heap keyed on (priority, insertion order), so
+``add``/``pop``/``complete`` are O(log n) and equal priorities stay FIFO.
+:meth:`TaskScheduler.run` dispatches independent tasks to async workers
+concurrently, bounded by ``max_parallel`` (``concurrency.max_task_parallel``
+via :meth:`TaskScheduler.from_settings`).
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from ..config.settings import DeepRSettings
+
+log = logging.getLogger(__name__)
+
+Task = dict[str, Any]
+
+# critic refinements close known gaps, so they jump ahead of remaining plan work
+PRIORITY_REFINEMENT = 5
+PRIORITY_PLAN = 10
+_DEFAULT_PRIORITY = {"refinement": PRIORITY_REFINEMENT, "plan": PRIORITY_PLAN}
+
+
+class TaskScheduler:
+    def __init__(self, tasks: Iterable[Task] = (), max_parallel: int = 4) -> None:
+        self.max_parallel = max_parallel
+        self._seq = itertools.count()
+        self._ready: list[tuple[int, int, str]] = []
+        self._tasks: dict[str, Task] = {}
+        self._waiting: dict[str, set[str]] = {}
+        self._dependents: dict[str, list[str]] = {}
+        self._running: set[str] = set()
+        self._done: set[str] = set()
+        self._failed: set[str] = set()
+        for task in tasks:
+            self.add(task)
+
+    @classmethod
+    def from_settings(cls, settings: DeepRSettings, tasks: Iterable[Task] = ()) -> "TaskScheduler":
+        """Scheduler running at most ``concurrency.max_task_parallel`` tasks at once."""
+        return cls(tasks, max_parallel=settings.concurrency.max_task_parallel)
+
+    def add(self, task: Task) -> str:
+        """Queue ``task``; it becomes ready once all of its ``depends_on`` complete."""
+        seq = next(self._seq)
+        task_id = str(task.setdefault("id", f"task-{seq}"))
+        if task_id in self._tasks or task_id in self._done:
+            raise ValueError(f"duplicate task id: {task_id}")
+        self._tasks[task_id] = task
+        unmet = {str(d) for d in task.get("depends_on") or ()} - self._done
+        if unmet:
+            self._waiting[task_id] = unmet
+            for dep in unmet:
+                self._dependents.setdefault(dep, []).append(task_id)
+        else:
+            self._push(task_id, seq)
+        return task_id
+
+    def _push(self, task_id: str, seq: Optional[int] = None) -> None:
+        task = self._tasks[task_id]
+        priority = task.get("priority")
+        if priority is None:
+            priority = _DEFAULT_PRIORITY.get(task.get("kind", "plan"), PRIORITY_PLAN)
+        heapq.heappush(self._ready, (int(priority), next(self._seq) if seq is None else seq, task_id))
+
+    def pop(self) -> Optional[Task]:
+        """Return the highest-priority ready task (marking it running), or None."""
+        if not self._ready:
+            return None
+        _, _, task_id = heapq.heappop(self._ready)
+        self._running.add(task_id)
+        return self._tasks[task_id]
+
+    def complete(self, task_id: str, ok: bool = True) -> None:
+        """Mark a task finished and release dependents whose dependencies are now met.
+
+        Dependents of a failed task are still released so the run degrades
+        rather than stalls; they can inspect :attr:`failed` if needed.
+        """
+        self._running.discard(task_id)
+        self._tasks.pop(task_id, None)
+        self._done.add(task_id)
+        if not ok:
+            self._failed.add(task_id)
+        for dependent in self._dependents.pop(task_id, ()):
+            unmet = self._waiting.get(dependent)
+            if unmet is None:
+                continue
+            unmet.discard(task_id)
+            if not unmet:
+                del self._waiting[dependent]
+                self._push(dependent)
+
+    @property
+    def failed(self) -> frozenset[str]:
+        return frozenset(self._failed)
+
+    @property
+    def ready_count(self) -> int:
+        return len(self._ready)
+
+    @property
+    def blocked(self) -> list[str]:
+        """Ids of tasks still waiting on dependencies."""
+        return list(self._waiting)
+
+    def __len__(self) -> int:
+        """Number of tasks not yet started (ready or waiting on dependencies)."""
+        return len(self._ready) + len(self._waiting)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def pending(self) -> list[Task]:
+        """Tasks not yet finished (including running ones), in priority order."""
+        ready = [self._tasks[tid] for _, _, tid in sorted(self._ready)]
+        running = [self._tasks[tid] for tid in self._running]
+        waiting = [self._tasks[tid] for tid in self._waiting]
+        return running + ready + waiting
+
+    def completed_ids(self) -> list[str]:
+        return sorted(self._done)
+
+    async def run(self, worker: Callable[[Task], Awaitable[Any]], max_parallel: Optional[int] = None) -> dict[str, Any]:
+        """Run ready tasks through ``worker`` with at most ``max_parallel`` (default:
+        :attr:`max_parallel`) in flight.
+
+        Workers may add new tasks (e.g. critic refinements) while the run is in
+        progress. Returns a mapping of task id to the worker's result, or to the
+        exception it raised (``CancelledError`` for a cancelled worker). Stops
+        when nothing is ready or running; tasks left blocked on dependencies
+        that never complete are logged and left queued.
+        """
+        results: dict[str, Any] = {}
+        running: dict[asyncio.Task[Any], str] = {}
+        limit = max(1, max_parallel or self.max_parallel)
+        try:
+            while True:
+                while len(running) < limit:
+                    task = self.pop()
+                    if task is None:
+                        break
+                    running[asyncio.ensure_future(worker(task))] = task["id"]
+                if not running:
+                    break
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for fut in done:
+                    task_id = running.pop(fut)
+                    # a worker cancelled by itself or a sibling fails its task, not the run
+                    exc = asyncio.CancelledError() if fut.cancelled() else fut.exception()
+                    results[task_id] = exc if exc is not None else fut.result()
+                    self.complete(task_id, ok=exc is None)
+        finally:
+            for fut in running:
+                fut.cancel()
+            # let cancelled workers run their cleanup before returning
+            await asyncio.gather(*running, return_exceptions=True)
+        if self._waiting:
+            log.warning("tasks blocked on unmet dependencies", extra={"task_ids": self.blocked})
+        return results
+
+
+__all__ = ["TaskScheduler", "PRIORITY_PLAN", "PRIORITY_REFINEMENT"]
@@ -1,21 +1,55 @@
 from __future__ import annotations
+from collections import UserDict
+from collections.abc import MutableMapping
 from dataclasses import dataclass, field
 from typing import Any
 
+from .scheduler import TaskScheduler
+
+class DocumentMap(UserDict):
+    """In-memory ``documents`` that remember which ids were written since the last checkpoint.
+
+    Like :class:`~deepr.retrieval.doc_store.DocumentStore`, a change is seen
+    when the document is (re)assigned — ``documents[doc_id] = doc`` — or
+    :meth:`touch`-ed; mutating it in place alone is not journaled.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self.dirty: set[str] = set()
+        super().__init__(*args, **kwargs)
+
+    def __setitem__(self, doc_id: str, doc: dict[str, Any]) -> None:
+        super().__setitem__(doc_id, doc)
+        self.dirty.add(doc_id)
+
+    def __delitem__(self, doc_id: str) -> None:
+        super().__delitem__(doc_id)
+        self.dirty.discard(doc_id)
+
+    def touch(self, doc_id: str) -> None:
+        """Mark ``doc_id`` as changed after mutating it in place."""
+        if doc_id in self.data:
+            self.dirty.add(doc_id)
+
+
 @dataclass
 class SharedGraphState:
     run_id: str
     plan: dict[str, Any] | None = None
-    tasks: list[dict[str, Any]] = field(default_factory=list)
-    documents: dict[str, dict[str, Any]] = field(default_factory=dict)
+    tasks: TaskScheduler = field(default_factory=TaskScheduler)
+    # a DocumentMap, or a retrieval.doc_store.DocumentStore for large runs
+    documents: MutableMapping[str, dict[str, Any]] = field(default_factory=DocumentMap)
     findings: list[dict[str, Any]] = field(default_factory=list)
     critiques: list[dict[str, Any]] = field(default_factory=list)
     report: dict[str, Any] | None = None
 
     def add_task(self, task: dict[str, Any]) -> None:
-        self.tasks.append(task)
+        self.tasks.add(task)
 
     def next_task(self) -> dict[str, Any] | None:
-        return self.tasks.pop(0) if self.tasks else None
+        return self.tasks.pop()
+
+    def complete_task(self, task_id: str, ok: bool = True) -> None:
+        self.tasks.complete(task_id, ok=ok)
 
-__all__ = ["SharedGraphState"]
+__all__ = ["SharedGraphState", "DocumentMap"]
@@ -0,0 +1,223 @@
+"""Token-aware text chunking.
+
+Chunk sizes are measured in tokens without running a tokenizer: a
+:class:`LengthEstimator` converts between characters and tokens using a
+chars-per-token ratio calibrated per model family (see :func:`estimator_for`,
+or :func:`calibrate` against a real tokenizer). Non-ASCII text is handled by
+scaling the ratio with the document's UTF-8 density once per document.
+
+Strategies:
+
+- ``"fixed"``: windows of ``max_tokens`` cut at the nearest whitespace;
+- ``"sentence"``: whole sentences packed up to ``max_tokens`` (sentences longer
+  than that fall back to fixed windows).
+
+Both repeat about ``overlap`` tokens between neighbouring chunks. The text is
+scanned once, working with offsets; only emitted chunks are sliced out. When a
+``tokenizer`` is given, each chunk is checked with it and split further if
+the estimate was too low.
+"""
+from __future__ import annotations
+
+import math
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Iterator, Literal, Optional, Protocol, Sequence
+
+Strategy = Literal["fixed", "sentence"]
+
+
+class Tokenizer(Protocol):
+    def encode(self, text: str) -> Sequence[int]: ...
+
+
+@dataclass(frozen=True)
+class LengthEstimator:
+    chars_per_token: float = 4.0
+
+    def count(self, text: str) -> int:
+        units = len(text) if text.isascii() else len(text.encode("utf-8"))
+        return math.ceil(units / self.chars_per_token)
+
+    def chars_for(self, tokens: int) -> int:
+        return max(1, int(tokens * self.chars_per_token))
+
+
+# English prose, measured against each family's tokenizer (chars per token)
+_FAMILY_RATIOS = {
+    "llama": 3.8,
+    "mistral": 3.6,
+    "mixtral": 3.6,
+    "qwen": 3.9,
+    "gemma": 4.1,
+    "phi": 3.7,
+    "gpt": 4.0,
+    "minilm": 4.3,
+    "bert": 4.3,
+    "mpnet": 4.3,
+    "bge": 4.3,
+}
+
+DEFAULT_ESTIMATOR = LengthEstimator()
+
+
+def estimator_for(model: Optional[str]) -> LengthEstimator:
+    """Estimator for the family a model name belongs to (default ~4 chars/token)."""
+    name = (model or "").lower()
+    for family, ratio in _FAMILY_RATIOS.items():
+        if family in name:
+            return LengthEstimator(ratio)
+    return DEFAULT_ESTIMATOR
+
+
+def calibrate(samples: Sequence[str], tokenizer: Tokenizer) -> LengthEstimator:
+    """Fit the chars-per-token ratio of ``tokenizer`` on sample texts."""
+    chars = sum(len(s) for s in samples)
+    tokens = sum(len(tokenizer.encode(s)) for s in samples)
+    return LengthEstimator(chars / tokens) if tokens else DEFAULT_ESTIMATOR
+
+
+@dataclass(frozen=True)
+class Chunk:
+    text: str
+    start: int
+    end: int
+    tokens: int  # estimated, or exact when a tokenizer was given
+
+
+_SENTENCE_END = re.compile(r"[.!?。！？][\"')\]]*\s+|\n\s*\n")
+
+
+class Chunker:
+    def __init__(
+        self,
+        max_tokens: int = 512,
+        overlap: int = 64,
+        strategy: Strategy = "fixed",
+        estimator: Optional[LengthEstimator] = None,
+        tokenizer: Optional[Tokenizer] = None,
+    ) -> None:
+        if max_tokens <= 0:
+            raise ValueError("max_tokens must be positive")
+        self.max_tokens = max_tokens
+        self.overlap = max(0, min(overlap, max_tokens // 2))
+        self.strategy = strategy
+        self.estimator = estimator or DEFAULT_ESTIMATOR
+        self.tokenizer = tokenizer
+
+    # -- spans ---------------------------------------------------------------
+
+    @staticmethod
+    def _cut(text: str, lo: int, end: int) -> int:
+        """Last whitespace position in ``[lo, end)``, or ``end`` if there is none."""
+        cut = max(text.rfind(" ", lo, end), text.rfind("\n", lo, end))
+        return cut if cut > lo else end
+
+    def _fixed(self, text: str, start: int, stop: int, cpt: float) -> Iterator[tuple[int, int]]:
+        window = max(1, int(self.max_tokens * cpt))
+        back = int(self.overlap * cpt)
+        while start < stop:
+            end = min(stop, start + window)
+            if end < stop:
+                end = self._cut(text, start + window // 2, end)
+            yield start, end
+            if end >= stop:
+                return
+            nxt = end - back
+            if back:
+                # begin the overlap on a word boundary
+                ws = text.find(" ", nxt, end)
+                nxt = ws + 1 if ws != -1 else nxt
+            start = max(nxt, start + 1)
+
+    def _sentences(self, text: str, cpt: float) -> Iterator[tuple[int, int]]:
+        limit = self.max_tokens * cpt
+        overlap = self.overlap * cpt
+        window: deque[tuple[int, int]] = deque()  # sentence spans of the current chunk
+        fresh = False  # window holds more than the overlap carried from the last chunk
+        pos = 0
+        ends = [m.end() for m in _SENTENCE_END.finditer(text)]
+        if not ends or ends[-1] < len(text):
+            ends.append(len(text))
+        for e in ends:
+            s, pos = pos, e
+            if window and e - window[0][0] > limit:
+                if fresh:
+                    yield window[0][0], window[-1][1]
+                # carry trailing sentences into the next chunk as overlap
+                keep: list[tuple[int, int]] = []
+                for span in reversed(window):
+                    if e - span[0] > limit or window[-1][1] - span[0] > overlap:
+                        break
+                    keep.append(span)
+                window = deque(reversed(keep))
+                fresh = False
+            if e - s > limit:
+                # oversized sentence: split it into fixed windows
+                window.clear()
+                yield from self._fixed(text, s, e, cpt)
+                continue
+            window.append((s, e))
+            fresh = True
+        if window and fresh:
+            yield window[0][0], window[-1][1]
+
+    # -- public --------------------------------------------------------------
+
+    def _exact(self, text: str, start: int, end: int, cpt: float) -> Iterator[Chunk]:
+        piece = text[start:end].strip()
+        if not piece:
+            return
+        assert self.tokenizer is not None
+        tokens = len(self.tokenizer.encode(piece))
+        if tokens <= self.max_tokens or end - start < 2:
+            yield Chunk(piece, start, end, tokens)
+            return
+        mid = self._cut(text, start + (end - start) // 4, start + (end - start) // 2)
+        if mid <= start or mid >= end:
+            mid = start + (end - start) // 2
+        yield from self._exact(text, start, mid, cpt)
+        yield from self._exact(text, mid, end, cpt)
+
+    def iter_chunks(self, text: str) -> Iterator[Chunk]:
+        if not text:
+            return
+        cpt = self.estimator.chars_per_token
+        if not text.isascii():
+            cpt *= len(text) / len(text.encode("utf-8"))
+        spans = self._sentences(text, cpt) if self.strategy == "sentence" else self._fixed(text, 0, len(text), cpt)
+        for start, end in spans:
+            if self.tokenizer is not None:
+                yield from self._exact(text, start, end, cpt)
+                continue
+            piece = text[start:end].strip()
+            if piece:
+                yield Chunk(piece, start, end, math.ceil((end - start) / cpt))
+
+    def chunks(self, text: str) -> list[str]:
+        return [c.text for c in self.iter_chunks(text)]
+
+
+def chunk_text(
+    text: str,
+    max_tokens: int = 512,
+    overlap: int = 64,
+    strategy: Strategy = "fixed",
+    estimator: Optional[LengthEstimator] = None,
+    tokenizer: Optional[Tokenizer] = None,
+) -> list[str]:
+    """Split ``text`` into chunks of at most ``max_tokens`` (estimated) tokens."""
+    return Chunker(max_tokens, overlap, strategy, estimator, tokenizer).chunks(text)
+
+
+__all__ = [
+    "Chunk",
+    "Chunker",
+    "LengthEstimator",
+    "Tokenizer",
+    "DEFAULT_ESTIMATOR",
+    "calibrate",
+    "chunk_text",
+    "estimator_for",
+]
@@ -0,0 +1,176 @@
+"""Near-duplicate detection for fetched documents.
+
+:class:`NearDuplicateIndex` keeps a MinHash signature per document (over word
+3-shingles) in a banded LSH table, so checking a new document touches only the
+few documents sharing a band bucket instead of the whole collection.
+Candidates are confirmed by their estimated Jaccard similarity.
+
+:func:`simhash` is a 64-bit SimHash for short texts such as search-result
+titles and snippets, compared with :func:`hamming`.
+
+Signatures use stable hashes (blake2b / fixed permutation seeds), so they can
+be stored with a document (``doc["minhash"]``) and reloaded after a resume.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+from collections import Counter
+from typing import Any, Iterable, Mapping, Optional, Sequence
+
+_WORDS = re.compile(r"\w+")
+_PRIME = (1 << 61) - 1
+_MASK32 = (1 << 32) - 1
+
+
+def _numpy() -> Any:
+    try:
+        import numpy
+    except Exception as exc:  # pragma: no cover - import-time failure
+        raise RuntimeError("numpy is required for MinHash signatures") from exc
+    return numpy
+
+
+def _hash64(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash of ``text``'s words (weighted by frequency)."""
+    v = [0] * 64
+    for word, weight in Counter(_WORDS.findall(text.lower())).items():
+        h = _hash64(word)
+        for i in range(64):
+            v[i] += weight if (h >> i) & 1 else -weight
+    return sum(1 << i for i in range(64) if v[i] > 0)
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def shingles(text: str, k: int = 3) -> set[str]:
+    words = _WORDS.findall(text.lower())
+    if len(words) < k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + k]) for i in range(len(words) - k + 1)}
+
+
+class MinHasher:
+    """MinHash with ``num_perm`` universal-hash permutations (vectorized with NumPy)."""
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 1) -> None:
+        np = _numpy()
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # a < 2**29 and x < 2**32 keep a * x + b below 2**63: no uint64 overflow
+        self._a = rng.integers(1, 1 << 29, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> list[int]:
+        """MinHash signature of ``text``; empty (never a duplicate) if it has no words."""
+        np = _numpy()
+        grams = shingles(text, self.shingle_size)
+        if not grams:
+            return []
+        x = np.fromiter((_hash64(g) & _MASK32 for g in grams), dtype=np.uint64, count=len(grams))
+        hv = (np.outer(self._a, x) + self._b[:, None]) % np.uint64(_PRIME)
+        return [int(v) for v in (hv & np.uint64(_MASK32)).min(axis=1)]
+
+
+def jaccard(sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    if not sig_a or len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+class NearDuplicateIndex:
+    """MinHash-LSH index of document signatures.
+
+    ``bands`` × ``rows`` must equal ``num_perm``; the defaults (16 × 4) make
+    pairs above ~0.5 Jaccard likely candidates, which are then kept only if
+    their estimated similarity reaches ``threshold``.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, bands: int = 16) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+        self._sigs: dict[str, list[int]] = {}
+        self._buckets: list[dict[tuple[int, ...], list[str]]] = [{} for _ in range(bands)]
+
+    def __len__(self) -> int:
+        return len(self._sigs)
+
+    def __contains__(self, doc_id: object) -> bool:
+        return doc_id in self._sigs
+
+    def signature(self, text: str) -> list[int]:
+        return self.hasher.signature(text)
+
+    def _bands(self, sig: Sequence[int]) -> Iterable[tuple[int, tuple[int, ...]]]:
+        for b in range(self.bands):
+            yield b, tuple(sig[b * self.rows : (b + 1) * self.rows])
+
+    def query(self, sig: Sequence[int]) -> Optional[str]:
+        """Id of the most similar indexed document at or above ``threshold``, if any."""
+        if not sig:
+            return None
+        seen: set[str] = set()
+        best: tuple[float, Optional[str]] = (0.0, None)
+        for b, key in self._bands(sig):
+            for doc_id in self._buckets[b].get(key, ()):
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                score = jaccard(sig, self._sigs[doc_id])
+                if score >= self.threshold and score > best[0]:
+                    best = (score, doc_id)
+        return best[1]
+
+    def insert(self, doc_id: str, sig: Sequence[int]) -> None:
+        if doc_id in self._sigs:
+            self.remove(doc_id)
+        if not sig:  # nothing to compare (empty text): never indexed
+            return
+        self._sigs[doc_id] = list(sig)
+        for b, key in self._bands(sig):
+            self._buckets[b].setdefault(key, []).append(doc_id)
+
+    def add(self, doc_id: str, sig: Sequence[int]) -> Optional[str]:
+        """Index ``doc_id`` unless it near-duplicates an indexed document; returns that document's id."""
+        dup = self.query(sig)
+        if dup is None or dup == doc_id:
+            self.insert(doc_id, sig)
+            return None
+        return dup
+
+    def remove(self, doc_id: str) -> None:
+        sig = self._sigs.pop(doc_id, None)
+        if sig is None:
+            return
+        for b, key in self._bands(sig):
+            ids = self._buckets[b].get(key)
+            if ids and doc_id in ids:
+                ids.remove(doc_id)
+                if not ids:
+                    del self._buckets[b][key]
+
+    @classmethod
+    def from_documents(cls, documents: Mapping[str, Mapping[str, Any]], **kwargs: Any) -> "NearDuplicateIndex":
+        """Rebuild from documents carrying a stored ``minhash`` signature (e.g. after resume)."""
+        index = cls(**kwargs)
+        for doc_id in documents:
+            doc = documents[doc_id]
+            sig = doc.get("minhash")
+            if sig:
+                index.insert(doc_id, sig)
+        return index
+
+
+__all__ = ["NearDuplicateIndex", "MinHasher", "simhash", "hamming", "jaccard", "shingles"]
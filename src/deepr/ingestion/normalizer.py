@@ -0,0 +1,55 @@
+"""Clean and unify document text before chunking.
+
+Turns fetched HTML into plain text (dropping scripts, styles and tags) and
+normalizes Unicode and whitespace while keeping paragraph breaks.
+"""
+from __future__ import annotations
+
+import html as _html
+import re
+import unicodedata
+from typing import Any
+
+_DROP_BLOCKS = re.compile(r"<(script|style|noscript|template|svg)\b[^>]*>.*?</\1\s*>", re.I | re.S)
+_COMMENTS = re.compile(r"<!--.*?-->", re.S)
+_BLOCK_TAGS = re.compile(r"</?(p|div|br|li|ul|ol|h[1-6]|tr|table|section|article|header|footer|pre|blockquote)\b[^>]*>", re.I)
+_TAGS = re.compile(r"<[^>]+>")
+_CONTROL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+_SPACES = re.compile(r"[ \t\r\f\v]+")
+_BLANK_LINES = re.compile(r"\n\s*\n\s*")
+
+
+def html_to_text(markup: str) -> str:
+    text = _DROP_BLOCKS.sub(" ", markup)
+    text = _COMMENTS.sub(" ", text)
+    text = _BLOCK_TAGS.sub("\n\n", text)
+    text = _TAGS.sub(" ", text)
+    return _html.unescape(text)
+
+
+def normalize_text(text: str) -> str:
+    """NFKC-normalize, drop control characters and collapse whitespace.
+
+    Single newlines are kept; runs of blank lines collapse to one paragraph break.
+    """
+    text = unicodedata.normalize("NFKC", text)
+    text = _CONTROL.sub("", text)
+    text = _SPACES.sub(" ", text)
+    text = _BLANK_LINES.sub("\n\n", text)
+    return "\n".join(line.strip() for line in text.split("\n")).strip()
+
+
+def normalize_document(doc: dict[str, Any]) -> dict[str, Any]:
+    """Return ``doc`` with a normalized ``text`` field (derived from ``html`` if needed).
+
+    The raw ``html`` is dropped once converted.
+    """
+    out = dict(doc)
+    raw = out.get("text")
+    if not raw and out.get("html"):
+        raw = html_to_text(out.pop("html"))
+    out["text"] = normalize_text(raw or "")
+    return out
+
+
+__all__ = ["html_to_text", "normalize_text", "normalize_document"]
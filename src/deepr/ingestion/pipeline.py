@@ -0,0 +1,218 @@
+"""Streaming ingestion: fetch → normalize → chunk → embed → index.
+
+Stages run concurrently and are connected by bounded ``asyncio.Queue`` s, so a
+slow stage applies backpressure upstream and memory stays flat however many
+sources a task yields:
+
+- ``max_fetch_parallel`` fetch workers call the ``fetch`` coroutine per source;
+- one worker normalizes and chunks each document (in a thread, so large pages
+  do not block the event loop), optionally recording it in ``documents``.
+  With a ``dedup`` index, near-duplicates of an already ingested document are
+  merged into it (their source is appended to its ``duplicates``) and are
+  neither chunked nor embedded;
+- one worker embeds chunks in batches of up to ``embed_batch_size``. Embedding
+  runs in a thread, so it overlaps with network I/O. A batch is sent as soon
+  as the queue is momentarily empty rather than waiting to fill up.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections.abc import MutableMapping
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable, Optional, Union
+
+from ..config.settings import DeepRSettings
+from ..models.embedding_provider import EmbeddingProvider
+from ..retrieval.vector_store import VectorStore
+from .chunking import Chunker, estimator_for
+from .dedup import NearDuplicateIndex
+from .normalizer import normalize_document
+
+log = logging.getLogger(__name__)
+
+Fetcher = Callable[[Any], Awaitable[Optional[dict[str, Any]]]]
+Sources = Union[Iterable[Any], AsyncIterable[Any]]
+
+_DONE = object()
+
+
+@dataclass
+class IngestStats:
+    sources: int = 0
+    fetched: int = 0
+    failed: int = 0
+    chunks: int = 0
+    embedded: int = 0
+    duplicates: int = 0
+    seconds: float = 0.0
+
+
+def _doc_id(source: Any, doc: dict[str, Any]) -> str:
+    if doc.get("id"):
+        return str(doc["id"])
+    key = str(doc.get("url") or source)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+class IngestionPipeline:
+    """Bounded, concurrent ingestion of documents into a :class:`VectorStore`.
+
+    ``fetch`` maps a source (typically a URL) to a document dict with ``text``
+    or ``html`` (or None to skip it). Chunk ids are ``"<doc_id>#<n>"``.
+    """
+
+    def __init__(
+        self,
+        fetch: Fetcher,
+        embedder: EmbeddingProvider,
+        store: VectorStore,
+        documents: Optional[MutableMapping[str, dict[str, Any]]] = None,
+        max_fetch_parallel: int = 4,
+        embed_batch_size: int = 16,
+        chunker: Optional[Chunker] = None,
+        dedup: Optional[NearDuplicateIndex] = None,
+    ) -> None:
+        self.fetch = fetch
+        self.embedder = embedder
+        self.store = store
+        self.documents = documents
+        self.max_fetch_parallel = max(1, max_fetch_parallel)
+        self.embed_batch_size = max(1, embed_batch_size)
+        # sized for typical embedding models' context (e.g. 256 tokens for MiniLM)
+        self.chunker = chunker or Chunker(256, 32, "sentence", estimator_for(embedder.name))
+        self.dedup = dedup
+
+    @classmethod
+    def from_settings(cls, settings: DeepRSettings, fetch: Fetcher, embedder: EmbeddingProvider, store: VectorStore, **kwargs: Any) -> "IngestionPipeline":
+        """Pipeline sized by ``settings.concurrency``; with ``dedup.enabled``, the
+        index is seeded from signatures already stored in ``documents``."""
+        if settings.dedup.enabled and "dedup" not in kwargs:
+            kwargs["dedup"] = NearDuplicateIndex.from_documents(
+                kwargs.get("documents") or {}, threshold=settings.dedup.threshold
+            )
+        return cls(
+            fetch,
+            embedder,
+            store,
+            max_fetch_parallel=settings.concurrency.max_fetch_parallel,
+            embed_batch_size=settings.concurrency.embed_batch_size,
+            **kwargs,
+        )
+
+    def _prepare(self, source: Any, doc: dict[str, Any]) -> tuple[str, dict[str, Any], list[str], Optional[str]]:
+        doc = normalize_document(doc)
+        doc_id = _doc_id(source, doc)
+        doc.setdefault("source", str(source))
+        if self.dedup is not None:
+            # safe off the loop: the chunk worker is the index's only user and is awaiting us
+            doc["minhash"] = self.dedup.signature(doc["text"])
+            dup_of = self.dedup.add(doc_id, doc["minhash"])
+            if dup_of is not None:
+                return doc_id, doc, [], dup_of
+        chunks = list(self.chunker.iter_chunks(doc["text"]))
+        doc["chunks"] = [{"chunk_id": f"{doc_id}#{i}", "order": i, "token_count": c.tokens} for i, c in enumerate(chunks)]
+        return doc_id, doc, [c.text for c in chunks], None
+
+    def _merge(self, dup_of: str, doc: dict[str, Any]) -> None:
+        if self.documents is None or dup_of not in self.documents:
+            return
+        kept = self.documents[dup_of]
+        dupes = list(kept.get("duplicates") or [])
+        dupes.append(doc.get("url") or doc["source"])
+        kept["duplicates"] = dupes
+        self.documents[dup_of] = kept  # write back so a DocumentStore persists the change
+
+    async def run(self, sources: Sources) -> IngestStats:
+        t0 = time.perf_counter()
+        stats = IngestStats()
+        src_q: asyncio.Queue[Any] = asyncio.Queue(maxsize=2 * self.max_fetch_parallel)
+        doc_q: asyncio.Queue[Any] = asyncio.Queue(maxsize=self.max_fetch_parallel)
+        chunk_q: asyncio.Queue[Any] = asyncio.Queue(maxsize=4 * self.embed_batch_size)
+
+        async def feed() -> None:
+            try:
+                if isinstance(sources, AsyncIterable):
+                    async for s in sources:
+                        stats.sources += 1
+                        await src_q.put(s)
+                else:
+                    for s in sources:
+                        stats.sources += 1
+                        await src_q.put(s)
+            finally:
+                for _ in range(self.max_fetch_parallel):
+                    await src_q.put(_DONE)
+
+        async def fetcher() -> None:
+            while (source := await src_q.get()) is not _DONE:
+                try:
+                    doc = await self.fetch(source)
+                except Exception as exc:
+                    stats.failed += 1
+                    log.warning("ingestion fetch failed", extra={"source": str(source), "error": str(exc)})
+                    continue
+                if doc is None:
+                    continue
+                stats.fetched += 1
+                await doc_q.put((source, doc))
+
+        async def chunk_worker() -> None:
+            while (item := await doc_q.get()) is not _DONE:
+                source, raw = item
+                try:
+                    doc_id, doc, chunks, dup_of = await asyncio.to_thread(self._prepare, source, raw)
+                except Exception as exc:
+                    stats.failed += 1
+                    log.warning("ingestion normalize failed", extra={"source": str(source), "error": str(exc)})
+                    continue
+                if dup_of is not None:
+                    stats.duplicates += 1
+                    self._merge(dup_of, doc)
+                    continue
+                if self.documents is not None:
+                    self.documents[doc_id] = doc
+                for i, text in enumerate(chunks):
+                    stats.chunks += 1
+                    await chunk_q.put((f"{doc_id}#{i}", text))
+            await chunk_q.put(_DONE)
+
+        async def embedder() -> None:
+            done = False
+            while not done:
+                item = await chunk_q.get()
+                if item is _DONE:
+                    return
+                batch = [item]
+                while len(batch) < self.embed_batch_size:
+                    try:
+                        item = chunk_q.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                    if item is _DONE:
+                        done = True
+                        break
+                    batch.append(item)
+                ids = [b[0] for b in batch]
+                vecs = await self.embedder.aembed([b[1] for b in batch])
+                self.store.add(ids, vecs)
+                stats.embedded += len(batch)
+
+        async def fetch_stage() -> None:
+            await asyncio.gather(feed(), *(fetcher() for _ in range(self.max_fetch_parallel)))
+            await doc_q.put(_DONE)
+
+        stages = [asyncio.ensure_future(c) for c in (fetch_stage(), chunk_worker(), embedder())]
+        try:
+            await asyncio.gather(*stages)
+        finally:
+            for s in stages:
+                s.cancel()
+        stats.seconds = time.perf_counter() - t0
+        log.info("ingestion finished", extra={"ingest": vars(stats)})
+        return stats
+
+
+__all__ = ["IngestionPipeline", "IngestStats", "Fetcher"]
@@ -0,0 +1,194 @@
+"""Content-addressed response cache for any :class:`ModelProvider`.
+
+Identical prompts sent with identical generation settings are answered from
+an on-disk :class:`~deepr.utils.disk_cache.DiskCache` instead of the model.
+Streamed responses are stored chunk by chunk so ``stream()`` replays them with
+the original chunking.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, AsyncIterator, Iterable, Optional
+
+from ..utils.disk_cache import DiskCache
+from .llm_provider import ModelProvider
+from .metrics import MetricsHook
+from .session import ProviderSession
+from .structured import Schema, json_schema
+
+
+class CachedProvider(ModelProvider):
+    """Wrap ``provider`` so repeated prompts are served from ``cache``.
+
+    The key covers the provider class, base URL, model, temperature,
+    max_tokens and a SHA-256 of the prompt (and of the system prompt, for
+    chat and structured calls). Streams are only stored once fully
+    consumed, so an abandoned stream never leaves a truncated entry behind.
+    Other attributes (``model``, ``list_models``, ``close`` ...) are forwarded
+    to the wrapped provider.
+    """
+
+    def __init__(self, provider: ModelProvider, cache: DiskCache) -> None:
+        self.provider = provider
+        self.cache = cache
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.provider, name)
+
+    def add_metrics_hook(self, hook: MetricsHook) -> None:
+        # calls are recorded by the wrapped provider
+        self.provider.add_metrics_hook(hook)
+
+    def cache_key(self, prompt: str, system: Optional[str] = None) -> str:
+        p = self.provider
+        parts = {
+            "provider": type(p).__name__,
+            "base_url": getattr(p, "base_url", None),
+            "model": getattr(p, "model", None),
+            "temperature": getattr(p, "temperature", None),
+            "max_tokens": getattr(p, "max_tokens", None),
+            "prompt": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+        }
+        if system is not None:
+            # a separate field: generate_chat(s, p) must not collide with generate(join_prompt(s, p))
+            parts["system"] = hashlib.sha256(system.encode("utf-8")).hexdigest()
+        return "llm:" + hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[dict[str, Any]]:
+        entry = self.cache.get_json(key)
+        if isinstance(entry, dict) and isinstance(entry.get("text"), str):
+            return entry
+        return None
+
+    def _store(self, key: str, text: str, chunks: Optional[list[str]] = None) -> None:
+        self.cache.set_json(key, {"text": text, "chunks": chunks})
+
+    @staticmethod
+    def _replay(entry: dict[str, Any]) -> list[str]:
+        chunks = entry.get("chunks")
+        if isinstance(chunks, list) and all(isinstance(c, str) for c in chunks):
+            return chunks
+        return [entry["text"]]
+
+    def generate(self, prompt: str) -> str:
+        key = self.cache_key(prompt)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry["text"]
+        text = self.provider.generate(prompt)
+        self._store(key, text)
+        return text
+
+    def generate_chat(self, system: str, prompt: str, session: Optional[ProviderSession] = None) -> str:
+        # a carried context changes the answer, so those calls bypass the cache
+        if session is not None and session.carry_context:
+            return self.provider.generate_chat(system, prompt, session)
+        key = self.cache_key(prompt, system=system)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry["text"]
+        text = self.provider.generate_chat(system, prompt, session)
+        self._store(key, text)
+        return text
+
+    async def agenerate_chat(self, system: str, prompt: str, session: Optional[ProviderSession] = None) -> str:
+        if session is not None and session.carry_context:
+            return await self.provider.agenerate_chat(system, prompt, session)
+        key = self.cache_key(prompt, system=system)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry["text"]
+        text = await self.provider.agenerate_chat(system, prompt, session)
+        self._store(key, text)
+        return text
+
+    def _structured_key(self, system: str, prompt: str, schema: Schema) -> str:
+        fmt = json.dumps(json_schema(schema) or "json", sort_keys=True)
+        return self.cache_key(f"{prompt}\n\nformat: {fmt}", system=system)
+
+    def _generate_structured(self, system: str, prompt: str, schema: Schema, session: Optional[ProviderSession] = None) -> str:
+        if session is not None and session.carry_context:
+            return self.provider._generate_structured(system, prompt, schema, session)
+        key = self._structured_key(system, prompt, schema)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry["text"]
+        text = self.provider._generate_structured(system, prompt, schema, session)
+        self._store(key, text)
+        return text
+
+    async def _agenerate_structured(
+        self, system: str, prompt: str, schema: Schema, session: Optional[ProviderSession] = None
+    ) -> str:
+        if session is not None and session.carry_context:
+            return await self.provider._agenerate_structured(system, prompt, schema, session)
+        key = self._structured_key(system, prompt, schema)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry["text"]
+        text = await self.provider._agenerate_structured(system, prompt, schema, session)
+        self._store(key, text)
+        return text
+
+    def _stream_structured(self, system: str, prompt: str, schema: Schema) -> Iterable[str]:
+        key = self._structured_key(system, prompt, schema)
+        entry = self._lookup(key)
+        if entry is not None:
+            yield from self._replay(entry)
+            return
+        chunks: list[str] = []
+        for chunk in self.provider._stream_structured(system, prompt, schema):
+            chunks.append(chunk)
+            yield chunk
+        self._store(key, "".join(chunks), chunks)
+
+    async def _astream_structured(self, system: str, prompt: str, schema: Schema) -> AsyncIterator[str]:
+        key = self._structured_key(system, prompt, schema)
+        entry = self._lookup(key)
+        if entry is not None:
+            for chunk in self._replay(entry):
+                yield chunk
+            return
+        chunks: list[str] = []
+        async for chunk in self.provider._astream_structured(system, prompt, schema):
+            chunks.append(chunk)
+            yield chunk
+        self._store(key, "".join(chunks), chunks)
+
+    def stream(self, prompt: str) -> Iterable[str]:
+        key = self.cache_key(prompt)
+        entry = self._lookup(key)
+        if entry is not None:
+            yield from self._replay(entry)
+            return
+        chunks: list[str] = []
+        for chunk in self.provider.stream(prompt):
+            chunks.append(chunk)
+            yield chunk
+        self._store(key, "".join(chunks), chunks)
+
+    async def agenerate(self, prompt: str) -> str:
+        key = self.cache_key(prompt)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry["text"]
+        text = await self.provider.agenerate(prompt)
+        self._store(key, text)
+        return text
+
+    async def astream(self, prompt: str) -> AsyncIterator[str]:
+        key = self.cache_key(prompt)
+        entry = self._lookup(key)
+        if entry is not None:
+            for chunk in self._replay(entry):
+                yield chunk
+            return
+        chunks: list[str] = []
+        async for chunk in self.provider.astream(prompt):
+            chunks.append(chunk)
+            yield chunk
+        self._store(key, "".join(chunks), chunks)
+
+
+__all__ = ["CachedProvider"]
@@ -0,0 +1,162 @@
+"""Embedding providers.
+
+:class:`EmbeddingProvider` is the embedding counterpart of ``ModelProvider``.
+Backends implement :meth:`EmbeddingProvider._encode` for one batch; the base
+class splits inputs into ``batch_size`` batches, skips duplicate texts, and
+looks vectors up in an optional :class:`~deepr.utils.disk_cache.DiskCache`
+keyed on the content hash, so re-embedding unchanged text costs nothing.
+
+Results are C-contiguous ``float32`` NumPy arrays of shape ``(n, dim)``.
+NumPy (and sentence-transformers for the local backend) are imported lazily.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import re
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, Optional, Sequence
+
+from ..utils.disk_cache import DiskCache
+
+if TYPE_CHECKING:  # pragma: no cover
+    import numpy as np
+
+
+def _numpy() -> Any:
+    try:
+        import numpy
+    except Exception as exc:  # pragma: no cover - import-time failure
+        raise RuntimeError("numpy is required for embeddings") from exc
+    return numpy
+
+
+class EmbeddingProvider(ABC):
+    """Batched, cached text embedding.
+
+    Subclasses set ``dim`` and ``name`` (identifies the model in cache keys)
+    and implement :meth:`_encode`.
+    """
+
+    dim: int
+    name: str
+
+    def __init__(self, batch_size: int = 16, cache: Optional[DiskCache] = None) -> None:
+        self.batch_size = max(1, batch_size)
+        self.cache = cache
+
+    @abstractmethod
+    def _encode(self, texts: list[str]) -> "np.ndarray":
+        """Embed one batch; returns an array of shape ``(len(texts), dim)``."""
+
+    def cache_key(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"emb:{self.name}:{self.dim}:{digest}"
+
+    def embed(self, texts: Sequence[str]) -> "np.ndarray":
+        np = _numpy()
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        # unique texts still to be computed -> rows they fill
+        missing: dict[str, list[int]] = {}
+        for i, text in enumerate(texts):
+            rows = missing.get(text)
+            if rows is not None:
+                rows.append(i)
+                continue
+            raw = self.cache.get(self.cache_key(text)) if self.cache is not None else None
+            if raw is not None and len(raw) == self.dim * 4:
+                out[i] = np.frombuffer(raw, dtype=np.float32)
+            else:
+                missing[text] = [i]
+
+        pending = list(missing)
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start : start + self.batch_size]
+            vecs = np.ascontiguousarray(self._encode(batch), dtype=np.float32)
+            for text, vec in zip(batch, vecs):
+                out[missing[text]] = vec
+                if self.cache is not None:
+                    self.cache.set(self.cache_key(text), vec.tobytes())
+        return out
+
+    def embed_one(self, text: str) -> "np.ndarray":
+        return self.embed([text])[0]
+
+    async def aembed(self, texts: Sequence[str]) -> "np.ndarray":
+        return await asyncio.to_thread(self.embed, texts)
+
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """Deterministic bag-of-words feature hashing (no model download).
+
+    Cheap and stable across processes, which makes it the backend for tests
+    and offline runs; similarity reflects shared vocabulary only.
+    """
+
+    def __init__(self, dim: int = 256, batch_size: int = 16, cache: Optional[DiskCache] = None) -> None:
+        super().__init__(batch_size=batch_size, cache=cache)
+        self.dim = dim
+        self.name = "hashing"
+        self._buckets: dict[str, tuple[int, float]] = {}
+
+    def _bucket(self, token: str) -> tuple[int, float]:
+        hit = self._buckets.get(token)
+        if hit is None:
+            h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            hit = (h % self.dim, 1.0 if (h >> 63) & 1 else -1.0)
+            if len(self._buckets) < 1_000_000:
+                self._buckets[token] = hit
+        return hit
+
+    def _encode(self, texts: list[str]) -> "np.ndarray":
+        np = _numpy()
+        rows: list[int] = []
+        cols: list[int] = []
+        signs: list[float] = []
+        for r, text in enumerate(texts):
+            for token in _TOKEN.findall(text.lower()):
+                c, s = self._bucket(token)
+                rows.append(r)
+                cols.append(c)
+                signs.append(s)
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(out, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), np.asarray(signs, dtype=np.float32))
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+
+class SentenceTransformerProvider(EmbeddingProvider):
+    """Local embeddings via ``sentence-transformers`` (vectors are L2-normalized)."""
+
+    def __init__(
+        self,
+        model: str = "all-MiniLM-L6-v2",
+        batch_size: int = 16,
+        cache: Optional[DiskCache] = None,
+        device: Optional[str] = None,
+    ) -> None:
+        super().__init__(batch_size=batch_size, cache=cache)
+        try:
+            from sentence_transformers import SentenceTransformer
+        except Exception as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError("sentence-transformers is required for SentenceTransformerProvider") from exc
+        self.model_name = model
+        self.name = f"st:{model}"
+        self._model = SentenceTransformer(model, device=device)
+        self.dim = int(self._model.get_sentence_embedding_dimension())
+
+    def _encode(self, texts: list[str]) -> "np.ndarray":
+        return self._model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+
+
+__all__ = ["EmbeddingProvider", "HashingEmbeddingProvider", "SentenceTransformerProvider"]
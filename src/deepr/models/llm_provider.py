@@ -1,20 +1,306 @@
 from __future__ import annotations
+import asyncio
+import json
+import threading
 from abc import ABC, abstractmethod
-from typing import Iterable, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Iterable, Iterator, Optional, Sequence
+
+from .metrics import CallRecorder, MetricsHook
+from .negotiation import EndpointRoute, NegotiationCache
+from .session import ProviderSession
+from .structured import IncrementalJSONParser, JSONItem, Schema, json_schema, parse_structured, schema_instruction, validate
+from .streaming import aiter_lines, iter_lines, sse_data
+
+@dataclass
+class BatchResult:
+    """Outcome of one prompt in a batch: ``text`` on success, else ``error``."""
+
+    text: Optional[str] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def join_prompt(system: str, prompt: str) -> str:
+    """Single-prompt form of a system + user message pair."""
+    return f"{system.rstrip()}\n\n{prompt}" if system else prompt
+
+
+def json_system(system: str, schema: Schema) -> str:
+    """``system`` followed by the instruction to answer in JSON (matching ``schema``)."""
+    instruction = schema_instruction(schema)
+    return f"{system.rstrip()}\n\n{instruction}" if system else instruction
+
 
 class ModelProvider(ABC):
+    # default number of prompts generate_batch runs at once
+    batch_concurrency: int = 4
+    # called with a CallMetrics after every instrumented call
+    metrics_hooks: list[MetricsHook] = []
+
     @abstractmethod
     def generate(self, prompt: str) -> str: ...
 
     def stream(self, prompt: str) -> Iterable[str]:  # default non-stream
         yield self.generate(prompt)
 
+    async def agenerate(self, prompt: str) -> str:
+        """Async generate; default runs the blocking ``generate`` in a worker thread."""
+        return await asyncio.to_thread(self.generate, prompt)
+
+    async def astream(self, prompt: str) -> AsyncIterator[str]:  # default non-stream
+        yield await self.agenerate(prompt)
+
+    def generate_chat(self, system: str, prompt: str, session: Optional[ProviderSession] = None) -> str:
+        """Generate with a separate system prompt; default folds it into the prompt."""
+        return self.generate(join_prompt(system, prompt))
+
+    async def agenerate_chat(self, system: str, prompt: str, session: Optional[ProviderSession] = None) -> str:
+        return await self.agenerate(join_prompt(system, prompt))
+
+    def session(self, role: str, system: str, **options: Any) -> ProviderSession:
+        """A :class:`ProviderSession` for ``role`` (see :mod:`deepr.models.session`)."""
+        return ProviderSession(self, role, system, **options)
+
+    def generate_json(
+        self, prompt: str, schema: Schema = None, system: str = "", session: Optional[ProviderSession] = None
+    ) -> Any:
+        """Generate JSON (enforced by the backend where supported) validated into ``schema``.
+
+        ``schema`` is a pydantic model class (the result is an instance of it),
+        a JSON schema dict, or None for any JSON. Raises
+        :class:`~deepr.models.structured.StructuredOutputError` on bad output.
+        """
+        return parse_structured(self._generate_structured(system, prompt, schema, session), schema)
+
+    async def agenerate_json(
+        self, prompt: str, schema: Schema = None, system: str = "", session: Optional[ProviderSession] = None
+    ) -> Any:
+        return parse_structured(await self._agenerate_structured(system, prompt, schema, session), schema)
+
+    def stream_json(
+        self, prompt: str, schema: Schema = None, paths: Sequence[str] = (), system: str = ""
+    ) -> Iterator[JSONItem]:
+        """Stream a JSON response, yielding values at ``paths`` (e.g. ``"actions.*"``)
+        as soon as each is complete, then the whole validated document (path ``()``).
+        """
+        parser = IncrementalJSONParser([p for p in paths if p])
+        for chunk in self._stream_structured(system, prompt, schema):
+            yield from parser.feed(chunk)
+        yield JSONItem((), validate(parser.close(), schema, parser.text))
+
+    async def astream_json(
+        self, prompt: str, schema: Schema = None, paths: Sequence[str] = (), system: str = ""
+    ) -> AsyncIterator[JSONItem]:
+        """Async counterpart of :meth:`stream_json`."""
+        parser = IncrementalJSONParser([p for p in paths if p])
+        async for chunk in self._astream_structured(system, prompt, schema):
+            for item in parser.feed(chunk):
+                yield item
+        yield JSONItem((), validate(parser.close(), schema, parser.text))
+
+    # Backends override these to switch on their JSON mode; the defaults only ask for JSON in the prompt.
+    def _generate_structured(self, system: str, prompt: str, schema: Schema, session: Optional[ProviderSession] = None) -> str:
+        return self.generate_chat(json_system(system, schema), prompt, session)
+
+    async def _agenerate_structured(
+        self, system: str, prompt: str, schema: Schema, session: Optional[ProviderSession] = None
+    ) -> str:
+        return await self.agenerate_chat(json_system(system, schema), prompt, session)
+
+    def _stream_structured(self, system: str, prompt: str, schema: Schema) -> Iterable[str]:
+        return self.stream(join_prompt(json_system(system, schema), prompt))
+
+    def _astream_structured(self, system: str, prompt: str, schema: Schema) -> AsyncIterator[str]:
+        return self.astream(join_prompt(json_system(system, schema), prompt))
+
+    def generate_batch(self, prompts: Sequence[str], max_concurrency: Optional[int] = None) -> list[BatchResult]:
+        """Generate for many prompts with bounded concurrency.
+
+        Results are returned in prompt order; a failing prompt yields a
+        ``BatchResult`` carrying its exception instead of aborting the batch.
+        """
+        def one(prompt: str) -> BatchResult:
+            try:
+                return BatchResult(text=self.generate(prompt))
+            except Exception as exc:
+                return BatchResult(error=exc)
+
+        if len(prompts) <= 1:
+            return [one(p) for p in prompts]
+        workers = max(1, min(max_concurrency or self.batch_concurrency, len(prompts)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(one, prompts))
+
+    async def agenerate_batch(self, prompts: Sequence[str], max_concurrency: Optional[int] = None) -> list[BatchResult]:
+        """Async counterpart of :meth:`generate_batch` built on ``agenerate``."""
+        sem = asyncio.Semaphore(max(1, max_concurrency or self.batch_concurrency))
+
+        async def one(prompt: str) -> BatchResult:
+            async with sem:
+                try:
+                    return BatchResult(text=await self.agenerate(prompt))
+                except Exception as exc:
+                    return BatchResult(error=exc)
+
+        return list(await asyncio.gather(*(one(p) for p in prompts)))
+
+    def add_metrics_hook(self, hook: MetricsHook) -> None:
+        """Register ``hook`` to receive the metrics of every call on this provider."""
+        self.metrics_hooks = [*self.metrics_hooks, hook]
+
+    def _record(self, kind: str) -> CallRecorder:
+        return CallRecorder(type(self).__name__, getattr(self, "model", None), kind, self.metrics_hooks)
+
+    def _timed(self, kind: str, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args, call)`` and report its metrics when it returns or raises."""
+        call = self._record(kind)
+        try:
+            return fn(*args, call)
+        except Exception as exc:
+            call.finish(exc)
+            raise
+        finally:
+            call.finish()
+
+    async def _atimed(self, kind: str, fn: Callable[..., Any], *args: Any) -> Any:
+        call = self._record(kind)
+        try:
+            return await fn(*args, call)
+        except Exception as exc:
+            call.finish(exc)
+            raise
+        finally:
+            call.finish()
+
+    def _timed_stream(self, fn: Callable[..., Iterable[str]], *args: Any) -> Iterator[str]:
+        call = self._record("stream")
+        try:
+            for chunk in fn(*args, call):
+                call.first_token()
+                yield chunk
+        except Exception as exc:
+            call.finish(exc)
+            raise
+        finally:
+            call.finish()
+
+    async def _atimed_stream(self, fn: Callable[..., AsyncIterable[str]], *args: Any) -> AsyncIterator[str]:
+        call = self._record("stream")
+        try:
+            async for chunk in fn(*args, call):
+                call.first_token()
+                yield chunk
+        except Exception as exc:
+            call.finish(exc)
+            raise
+        finally:
+            call.finish()
+
 class DummyProvider(ModelProvider):
     def generate(self, prompt: str) -> str:  # pragma: no cover
         return f"echo: {prompt[:20]}"
 
 
-class OllamaProvider(ModelProvider):
+class _HTTPProvider(ModelProvider):
+    """Shared connection-pool plumbing for HTTP-backed providers.
+
+    Each provider owns one long-lived ``httpx.Client`` (created lazily on first
+    use) so consecutive calls reuse keep-alive connections instead of paying
+    TCP setup per prompt. ``max_connections`` bounds concurrent requests to the
+    server; call :meth:`close` (or use the provider as a context manager) to
+    release the pool.
+
+    The async API uses a separate ``httpx.AsyncClient`` with the same limits.
+    It is bound to the event loop that first uses it; release it with
+    :meth:`aclose` (or ``async with``) before that loop shuts down.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        max_connections: int = 10,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 60.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_connections = max_connections
+        self.max_keepalive_connections = (
+            max_connections if max_keepalive_connections is None else max_keepalive_connections
+        )
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        # one in-flight prompt per pooled connection
+        self.batch_concurrency = max_connections
+        self._client: Any = None
+        self._async_client: Any = None
+        self._client_lock = threading.Lock()
+
+    def _httpx(self) -> Any:
+        try:
+            import httpx
+        except Exception as exc:  # pragma: no cover - environment dependent
+            raise RuntimeError(f"httpx is required for {type(self).__name__}") from exc
+        return httpx
+
+    def _limits(self) -> Any:
+        return self._httpx().Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def _get_client(self) -> Any:
+        """Return the pooled sync client, creating it on first use."""
+        if self._client is not None:
+            return self._client
+        httpx = self._httpx()
+        with self._client_lock:
+            if self._client is None:
+                self._client = httpx.Client(limits=self._limits(), timeout=self.timeout)
+        return self._client
+
+    def _get_async_client(self) -> Any:
+        """Return the pooled async client, creating it on first use."""
+        if self._async_client is None:
+            httpx = self._httpx()
+            self._async_client = httpx.AsyncClient(limits=self._limits(), timeout=self.timeout)
+        return self._async_client
+
+    def close(self) -> None:
+        """Close pooled connections. The provider may be reused afterwards."""
+        with self._client_lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    async def aclose(self) -> None:
+        """Close both the async and the sync connection pools."""
+        client, self._async_client = self._async_client, None
+        if client is not None:
+            await client.aclose()
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+
+class OllamaProvider(_HTTPProvider):
     """Simple Ollama HTTP-backed provider.
 
     This performs a POST to the configured Ollama HTTP endpoint. The exact
@@ -32,84 +318,87 @@ class OllamaProvider(ModelProvider):
         model: str = "qwen3-coder",
         temperature: Optional[float] = 0.2,
         max_tokens: Optional[int] = None,
+        keep_alive: Optional[str] = None,
+        **pool_options: Any,
     ):
-        self.base_url = base_url.rstrip("/")
+        super().__init__(base_url, **pool_options)
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
+        # how long the server keeps the model (and its prompt cache) loaded after a call
+        self.keep_alive = keep_alive
 
-    def generate(self, prompt: str) -> str:
-        try:
-            import httpx
-            import json
-        except Exception as exc:  # pragma: no cover - environment dependent
-            raise RuntimeError("httpx is required for OllamaProvider") from exc
-
-        url = f"{self.base_url}/api/generate"
-        payload = {"model": self.model, "prompt": prompt}
+    def _payload(self, prompt: str) -> dict[str, Any]:
+        payload: dict[str, Any] = {"model": self.model, "prompt": prompt}
         if self.temperature is not None:
             payload["temperature"] = self.temperature
         if self.max_tokens is not None:
             payload["max_tokens"] = self.max_tokens
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return payload
 
-        # Try streaming response first (Ollama often streams chunked JSON objects)
+    def _chat_payload(self, system: str, prompt: str, session: Optional[ProviderSession]) -> dict[str, Any]:
+        payload = self._payload(prompt)
+        if session is not None and session.carry_context and session.context:
+            payload["context"] = session.context  # already holds the session's system prompt
+            if system and system != session.system:
+                payload["system"] = system  # e.g. with a JSON schema instruction added
+        elif system:
+            payload["system"] = system
+        if session is not None and session.keep_alive is not None:
+            payload["keep_alive"] = session.keep_alive
+        return payload
+
+    def _json_payload(self, system: str, prompt: str, schema: Schema, session: Optional[ProviderSession] = None) -> dict[str, Any]:
+        payload = self._chat_payload(json_system(system, schema), prompt, session)
+        # a JSON schema constrains decoding to it; "json" to any JSON value
+        payload["format"] = json_schema(schema) or "json"
+        return payload
+
+    @staticmethod
+    def _keep_context(obj: Any, session: Optional[ProviderSession]) -> None:
+        if session is not None and isinstance(obj, dict) and isinstance(obj.get("context"), list):
+            session.context = obj["context"]
+
+    def _line_text(
+        self, line: str, call: Optional[CallRecorder] = None, session: Optional[ProviderSession] = None
+    ) -> Optional[str]:
+        """Extract the text fragment carried by one newline-delimited stream line."""
         try:
-            with httpx.Client(timeout=60.0) as client:
-                with client.stream("POST", url, json=payload) as resp:
-                    resp.raise_for_status()
-                    parts: list[str] = []
-                    buffer = ""
-                    for chunk in resp.iter_text(chunk_size=1024):
-                        if not chunk:
-                            continue
-                        buffer += chunk
-                        # process complete lines (server often sends newline-separated JSON objects)
-                        while "\n" in buffer:
-                            line, buffer = buffer.split("\n", 1)
-                            line = line.strip()
-                            if not line:
-                                continue
-                            # try to parse JSON line
-                            try:
-                                obj = json.loads(line)
-                            except Exception:
-                                # not JSON line, append raw
-                                parts.append(line)
-                                continue
-                            # extract common keys
-                            if isinstance(obj, dict):
-                                if "response" in obj and isinstance(obj["response"], str):
-                                    parts.append(obj["response"])
-                                    continue
-                                if "text" in obj and isinstance(obj["text"], str):
-                                    parts.append(obj["text"])
-                                    continue
-                                if "results" in obj and isinstance(obj["results"], list):
-                                    for r in obj["results"]:
-                                        if isinstance(r, dict) and "content" in r and isinstance(r["content"], str):
-                                            parts.append(r["content"])
-                                            break
-                                # fallback: try to stringify the object
-                                # (rare for Ollama streaming but safe)
-                                # continue to next
-                    # after stream ends, if we collected parts return their concatenation
-                    if parts:
-                        # join without separator to preserve spacing sent by server fragments
-                        return "".join(parts)
+            obj = json.loads(line)
         except Exception:
-            # streaming not available or failed — fall back to single-shot request
-            pass
-
-        # Single-shot request (existing behavior)
-        resp = httpx.post(url, json=payload, timeout=30.0)
-        resp.raise_for_status()
+            # not JSON line, keep raw
+            return line
+        if call is not None:
+            # the final (done) object carries eval_count / eval_duration
+            call.observe(obj)
+        # ... and the context token array
+        self._keep_context(obj, session)
+        # extract common keys
+        if isinstance(obj, dict):
+            if "response" in obj and isinstance(obj["response"], str):
+                return obj["response"]
+            if "text" in obj and isinstance(obj["text"], str):
+                return obj["text"]
+            if "results" in obj and isinstance(obj["results"], list):
+                for r in obj["results"]:
+                    if isinstance(r, dict) and "content" in r and isinstance(r["content"], str):
+                        return r["content"]
+        return None
 
+    def _response_text(
+        self, resp: Any, call: Optional[CallRecorder] = None, session: Optional[ProviderSession] = None
+    ) -> str:
+        """Best-effort extraction of text from a single-shot response."""
         try:
             data = resp.json()
         except Exception:
             return resp.text
+        if call is not None:
+            call.observe(data)
+        self._keep_context(data, session)
 
-        # Best-effort extraction of text from common response shapes
         if isinstance(data, dict):
             if "text" in data and isinstance(data["text"], str):
                 return data["text"]
@@ -127,15 +416,176 @@ class OllamaProvider(ModelProvider):
         # Fallback to raw response text
         return resp.text
 
-    def list_models(self) -> list[str]:
-        """Return available model ids from the Ollama server (best-effort)."""
+    def _stream_texts(
+        self, client: Any, url: str, payload: dict[str, Any], call: CallRecorder, session: Optional[ProviderSession] = None
+    ) -> Iterator[str]:
+        """Yield text fragments from Ollama's newline-delimited JSON stream."""
+        with client.stream("POST", url, json=payload) as resp:
+            resp.raise_for_status()
+            for line in iter_lines(resp.iter_bytes()):
+                text = self._line_text(line, call, session)
+                if text is not None:
+                    if text:
+                        call.first_token()
+                    yield text
+
+    async def _astream_texts(
+        self, client: Any, url: str, payload: dict[str, Any], call: CallRecorder, session: Optional[ProviderSession] = None
+    ) -> AsyncIterator[str]:
+        async with client.stream("POST", url, json=payload) as resp:
+            resp.raise_for_status()
+            async for line in aiter_lines(resp.aiter_bytes()):
+                text = self._line_text(line, call, session)
+                if text is not None:
+                    if text:
+                        call.first_token()
+                    yield text
+
+    def generate(self, prompt: str) -> str:
+        return self._timed("generate", self._generate, prompt)
+
+    async def agenerate(self, prompt: str) -> str:
+        return await self._atimed("generate", self._agenerate, prompt)
+
+    def generate_chat(self, system: str, prompt: str, session: Optional[ProviderSession] = None) -> str:
+        """Generate with ``system`` sent as Ollama's system prompt; with a session,
+        also its ``keep_alive`` and (``carry_context``) the previous ``context``."""
+        payload = self._chat_payload(system, prompt, session)
+        return self._timed("generate", partial(self._post_generate, session=session), payload)
+
+    async def agenerate_chat(self, system: str, prompt: str, session: Optional[ProviderSession] = None) -> str:
+        payload = self._chat_payload(system, prompt, session)
+        return await self._atimed("generate", partial(self._apost_generate, session=session), payload)
+
+    def _generate_structured(self, system: str, prompt: str, schema: Schema, session: Optional[ProviderSession] = None) -> str:
+        payload = self._json_payload(system, prompt, schema, session)
+        return self._timed("generate", partial(self._post_generate, session=session), payload)
+
+    async def _agenerate_structured(
+        self, system: str, prompt: str, schema: Schema, session: Optional[ProviderSession] = None
+    ) -> str:
+        payload = self._json_payload(system, prompt, schema, session)
+        return await self._atimed("generate", partial(self._apost_generate, session=session), payload)
+
+    def _stream_structured(self, system: str, prompt: str, schema: Schema) -> Iterable[str]:
+        return self._timed_stream(self._stream_payload, self._json_payload(system, prompt, schema))
+
+    def _astream_structured(self, system: str, prompt: str, schema: Schema) -> AsyncIterator[str]:
+        return self._atimed_stream(self._astream_payload, self._json_payload(system, prompt, schema))
+
+    def _stream_payload(self, payload: dict[str, Any], call: CallRecorder) -> Iterator[str]:
+        for text in self._stream_texts(self._get_client(), f"{self.base_url}/api/generate", payload, call):
+            if text:
+                yield text
+
+    async def _astream_payload(self, payload: dict[str, Any], call: CallRecorder) -> AsyncIterator[str]:
+        async for text in self._astream_texts(self._get_async_client(), f"{self.base_url}/api/generate", payload, call):
+            if text:
+                yield text
+
+    def stream(self, prompt: str) -> Iterable[str]:
+        """Yield response fragments as Ollama emits them.
+
+        Falls back to a single-shot request (one chunk) when streaming fails
+        before anything was produced; failures mid-stream are re-raised.
+        """
+        return self._timed_stream(self._stream, prompt)
+
+    def astream(self, prompt: str) -> AsyncIterator[str]:
+        """Async counterpart of :meth:`stream`."""
+        return self._atimed_stream(self._astream, prompt)
+
+    def _generate(self, prompt: str, call: CallRecorder) -> str:
+        return self._post_generate(self._payload(prompt), call)
+
+    def _post_generate(self, payload: dict[str, Any], call: CallRecorder, session: Optional[ProviderSession] = None) -> str:
+        url = f"{self.base_url}/api/generate"
+        client = self._get_client()
+
+        # Try streaming response first (Ollama often streams chunked JSON objects)
         try:
-            import httpx
-        except Exception as exc:  # pragma: no cover - environment dependent
-            raise RuntimeError("httpx is required for OllamaProvider") from exc
+            parts = list(self._stream_texts(client, url, payload, call, session))
+            if parts:
+                # join without separator to preserve spacing sent by server fragments
+                return "".join(parts)
+        except Exception:
+            # streaming not available or failed — fall back to single-shot request
+            pass
+
+        call.retry()
+        resp = client.post(url, json=payload, timeout=30.0)
+        resp.raise_for_status()
+        return self._response_text(resp, call, session)
 
+    async def _agenerate(self, prompt: str, call: CallRecorder) -> str:
+        return await self._apost_generate(self._payload(prompt), call)
+
+    async def _apost_generate(
+        self, payload: dict[str, Any], call: CallRecorder, session: Optional[ProviderSession] = None
+    ) -> str:
+        url = f"{self.base_url}/api/generate"
+        client = self._get_async_client()
+
+        try:
+            parts = [text async for text in self._astream_texts(client, url, payload, call, session)]
+            if parts:
+                return "".join(parts)
+        except Exception:
+            pass
+
+        call.retry()
+        resp = await client.post(url, json=payload, timeout=30.0)
+        resp.raise_for_status()
+        return self._response_text(resp, call, session)
+
+    def _stream(self, prompt: str, call: CallRecorder) -> Iterator[str]:
+        url = f"{self.base_url}/api/generate"
+        payload = self._payload(prompt)
+        client = self._get_client()
+
+        yielded_any = False
+        try:
+            for text in self._stream_texts(client, url, payload, call):
+                yielded_any = True
+                if text:
+                    yield text
+        except Exception:
+            if yielded_any:
+                raise
+        if yielded_any:
+            return
+
+        call.retry()
+        resp = client.post(url, json=payload, timeout=30.0)
+        resp.raise_for_status()
+        yield self._response_text(resp, call)
+
+    async def _astream(self, prompt: str, call: CallRecorder) -> AsyncIterator[str]:
+        url = f"{self.base_url}/api/generate"
+        payload = self._payload(prompt)
+        client = self._get_async_client()
+
+        yielded_any = False
+        try:
+            async for text in self._astream_texts(client, url, payload, call):
+                yielded_any = True
+                if text:
+                    yield text
+        except Exception:
+            if yielded_any:
+                raise
+        if yielded_any:
+            return
+
+        call.retry()
+        resp = await client.post(url, json=payload, timeout=30.0)
+        resp.raise_for_status()
+        yield self._response_text(resp, call)
+
+    def list_models(self) -> list[str]:
+        """Return available model ids from the Ollama server (best-effort)."""
         url = f"{self.base_url}/v1/models"
-        resp = httpx.get(url, timeout=10.0)
+        resp = self._get_client().get(url, timeout=10.0)
         resp.raise_for_status()
 
         try:
@@ -153,7 +603,7 @@ class OllamaProvider(ModelProvider):
         return []
 
 
-class LMStudioProvider(ModelProvider):
+class LMStudioProvider(_HTTPProvider):
     """Simple LM Studio HTTP-backed provider.
 
     Targets LMStudio's OpenAI-compatible endpoints by default. The provider
@@ -164,8 +614,21 @@ class LMStudioProvider(ModelProvider):
     - List models: GET {base_url}/v1/models
     - Chat generate: POST {base_url}/v1/chat/completions
     - Text generate: POST {base_url}/v1/completions
+
+    The first (path, payload shape) combination that works is remembered in
+    ``routes`` per base_url + model and tried first on later calls, so only a
+    failing server pays for re-probing.
     """
 
+    GENERATE_PATHS = ["/v1/chat/completions", "/v1/completions", "/api/generate", "/api/v1/generate", "/generate"]
+    STREAM_PATHS = ["/v1/chat/completions", "/v1/completions", "/api/generate", "/generate"]
+    PAYLOAD_SHAPES = ["chat", "completion", "model_inputs", "inputs", "input"]
+    # OpenAI completions accept a list of prompts and return one choice each
+    BATCH_PATH = "/v1/completions"
+    # statuses meaning "this server does not take prompt lists" rather than a transient failure
+    BATCH_UNSUPPORTED = frozenset({400, 404, 405, 422, 501})
+    server_batch_size = 16
+
     def __init__(
         self,
         base_url: str = "http://localhost:1234",
@@ -173,13 +636,16 @@ class LMStudioProvider(ModelProvider):
         temperature: Optional[float] = 0.2,
         max_tokens: Optional[int] = None,
         endpoint: Optional[str] = None,
+        routes: Optional[NegotiationCache] = None,
+        **pool_options: Any,
     ):
-        self.base_url = base_url.rstrip("/")
+        super().__init__(base_url, **pool_options)
         # if endpoint provided, it will be tried first; otherwise prefer chat
         self.endpoint = endpoint
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.routes = routes if routes is not None else NegotiationCache()
 
     def _extract_text(self, data) -> Optional[str]:
         """Best-effort extraction including OpenAI/LMStudio shapes."""
@@ -239,206 +705,445 @@ class LMStudioProvider(ModelProvider):
             return data
         return None
 
-    def generate(self, prompt: str) -> str:
-        try:
-            import httpx
-            import json
-        except Exception as exc:  # pragma: no cover - environment dependent
-            raise RuntimeError("httpx is required for LMStudioProvider") from exc
-
-        # Prefer OpenAI-compatible endpoints
-        candidate_paths = []
+    def _candidate_paths(self, defaults: list[str]) -> list[str]:
+        paths: list[str] = []
         if self.endpoint:
-            candidate_paths.append(self.endpoint)
-        candidate_paths.extend(["/v1/chat/completions", "/v1/completions", "/api/generate", "/api/v1/generate", "/generate"]) 
-
-        def build_url(path: str) -> str:
-            if path.startswith("http://") or path.startswith("https://"):
-                return path
-            if not path.startswith("/"):
-                path = "/" + path
-            return f"{self.base_url}{path}"
-
-        # Prepare OpenAI-style payloads first (chat then completion)
-        params = {}
+            paths.append(self.endpoint)
+        paths.extend(defaults)
+        return paths
+
+    def _build_url(self, path: str) -> str:
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        if not path.startswith("/"):
+            path = "/" + path
+        return f"{self.base_url}{path}"
+
+    def _params(self) -> dict[str, Any]:
+        params: dict[str, Any] = {}
         if self.temperature is not None:
             params["temperature"] = self.temperature
         if self.max_tokens is not None:
             params["max_tokens"] = self.max_tokens
+        return params
 
-        payload_variants = [
-            # chat-style
-            {"model": self.model, "messages": [{"role": "user", "content": prompt}], **({} if not params else {k: v for k, v in params.items()})},
-            # completion-style
-            {"model": self.model, "prompt": prompt, **({} if not params else {k: v for k, v in params.items()})},
-            # generic shapes
-            {"model": self.model, "inputs": prompt},
-            {"inputs": prompt},
-            {"input": prompt},
-        ]
+    def _payload(
+        self, shape: str, prompt: str, system: Optional[str] = None, response_format: Optional[dict[str, Any]] = None
+    ) -> dict[str, Any]:
+        params = self._params()
+        if response_format is not None:
+            params["response_format"] = response_format
+        if shape == "chat":
+            messages = [{"role": "system", "content": system}] if system else []
+            messages.append({"role": "user", "content": prompt})
+            return {"model": self.model, "messages": messages, **params}
+        if system:
+            # non-chat shapes have no system slot
+            prompt = join_prompt(system, prompt)
+        if shape == "completion":
+            return {"model": self.model, "prompt": prompt, **params}
+        # generic shapes
+        if shape == "model_inputs":
+            return {"model": self.model, "inputs": prompt}
+        return {shape: prompt}
 
-        last_exc: Optional[Exception] = None
-        for path in candidate_paths:
-            url = build_url(path)
-            for payload in payload_variants:
-                try:
-                    resp = httpx.post(url, json=payload, timeout=30.0)
-                    resp.raise_for_status()
-                except Exception as exc:  # try next combination
-                    last_exc = exc
-                    continue
+    def _generate_attempts(self) -> list[tuple[str, str]]:
+        """Candidate (path, payload shape) pairs, remembered route first."""
+        # Prefer OpenAI-style payloads first (chat then completion)
+        attempts = [(path, shape) for path in self._candidate_paths(self.GENERATE_PATHS) for shape in self.PAYLOAD_SHAPES]
+        route = self.routes.get(self.base_url, self.model, "generate")
+        if route is not None and route.path is not None:
+            known = (route.path, route.payload)
+            attempts = [known] + [a for a in attempts if a != known]
+        return attempts
 
-                try:
-                    data = resp.json()
-                except Exception:
-                    return resp.text
+    def _stream_attempts(self) -> list[str]:
+        """Candidate streaming paths, remembered route first (empty if none work)."""
+        paths = self._candidate_paths(self.STREAM_PATHS)
+        route = self.routes.get(self.base_url, self.model, "stream")
+        if route is None:
+            return paths
+        if route.path is None:
+            return []
+        return [route.path] + [p for p in paths if p != route.path]
 
-                text = self._extract_text(data)
-                if text is not None:
-                    return text
+    def _remember(self, kind: str, route: EndpointRoute, persist: bool = True) -> None:
+        self.routes.remember(self.base_url, self.model, kind, route, persist=persist)
 
-                return resp.text
+    def _stream_payload(
+        self, prompt: str, system: Optional[str] = None, response_format: Optional[dict[str, Any]] = None
+    ) -> dict[str, Any]:
+        return {**self._payload("chat", prompt, system, response_format), "stream": True}
 
-        if last_exc is not None:
-            raise RuntimeError(f"LMStudio generation failed: {last_exc}") from last_exc
-        return ""
+    @staticmethod
+    def _response_format(schema: Schema) -> dict[str, Any]:
+        spec = json_schema(schema)
+        if spec is None:
+            return {"type": "json_object"}
+        name = getattr(schema, "__name__", None) or str(spec.get("title") or "response")
+        return {"type": "json_schema", "json_schema": {"name": name, "schema": spec}}
+
+    def _response_text(self, resp: Any, call: Optional[CallRecorder] = None) -> str:
+        try:
+            data = resp.json()
+        except Exception:
+            return resp.text
+        if call is not None:
+            call.observe(data)
+
+        text = self._extract_text(data)
+        if text is not None:
+            return text
+        return resp.text
+
+    def _stream_line_chunks(self, line: str, call: Optional[CallRecorder] = None) -> Optional[list[str]]:
+        """Return the text chunks carried by one stream line, or None on ``[DONE]``."""
+        # OpenAI-style SSE: lines prefixed with 'data: '
+        payload_line = sse_data(line)
+        if payload_line is not None:
+            if payload_line == "[DONE]":
+                return None
+            try:
+                obj = json.loads(payload_line)
+            except Exception:
+                return [payload_line]
+            if call is not None:
+                call.observe(obj)
+            chunks: list[str] = []
+            # try to extract incremental delta content
+            # choices[].delta.content or choices[].message.content
+            if isinstance(obj, dict) and "choices" in obj:
+                for c in obj["choices"]:
+                    if not isinstance(c, dict):
+                        continue
+                    # delta-based streaming
+                    delta = c.get("delta")
+                    if isinstance(delta, dict):
+                        dcont = delta.get("content") or delta.get("text")
+                        if isinstance(dcont, str):
+                            chunks.append(dcont)
+                            continue
+                    # full message in streaming chunk
+                    msg = c.get("message")
+                    if isinstance(msg, dict):
+                        cont = msg.get("content")
+                        if isinstance(cont, str):
+                            chunks.append(cont)
+                            continue
+                    txt = c.get("text")
+                    if isinstance(txt, str):
+                        chunks.append(txt)
+            if not chunks:
+                # fallback: try full-object extraction
+                t = self._extract_text(obj)
+                if t:
+                    chunks.append(t)
+            return chunks
+        # not SSE, try parsing as JSON
+        try:
+            obj = json.loads(line)
+        except Exception:
+            return [line]
+        if call is not None:
+            call.observe(obj)
+        t = self._extract_text(obj)
+        return [t] if t else []
+
+    def generate(self, prompt: str) -> str:
+        return self._timed("generate", self._generate, prompt)
+
+    async def agenerate(self, prompt: str) -> str:
+        return await self._atimed("generate", self._agenerate, prompt)
+
+    def generate_chat(self, system: str, prompt: str, session: Optional[ProviderSession] = None) -> str:
+        """Generate with ``system`` as a separate system message (chat payloads)."""
+        return self._timed("generate", partial(self._generate, system=system), prompt)
+
+    async def agenerate_chat(self, system: str, prompt: str, session: Optional[ProviderSession] = None) -> str:
+        return await self._atimed("generate", partial(self._agenerate, system=system), prompt)
+
+    def _generate_structured(self, system: str, prompt: str, schema: Schema, session: Optional[ProviderSession] = None) -> str:
+        fn = partial(self._generate, system=json_system(system, schema), response_format=self._response_format(schema))
+        return self._timed("generate", fn, prompt)
+
+    async def _agenerate_structured(
+        self, system: str, prompt: str, schema: Schema, session: Optional[ProviderSession] = None
+    ) -> str:
+        fn = partial(self._agenerate, system=json_system(system, schema), response_format=self._response_format(schema))
+        return await self._atimed("generate", fn, prompt)
+
+    def _stream_structured(self, system: str, prompt: str, schema: Schema) -> Iterable[str]:
+        fn = partial(self._stream, system=json_system(system, schema), response_format=self._response_format(schema))
+        return self._timed_stream(fn, prompt)
+
+    def _astream_structured(self, system: str, prompt: str, schema: Schema) -> AsyncIterator[str]:
+        fn = partial(self._astream, system=json_system(system, schema), response_format=self._response_format(schema))
+        return self._atimed_stream(fn, prompt)
 
     def stream(self, prompt: str) -> Iterable[str]:
         """Attempt streaming generation with OpenAI-style parsing (data: chunks).
 
         Falls back to non-stream generate() if streaming unsupported.
         """
-        try:
-            import httpx
-            import json
-        except Exception as exc:  # pragma: no cover - environment dependent
-            raise RuntimeError("httpx is required for LMStudioProvider") from exc
-
-        candidate_paths = []
-        if self.endpoint:
-            candidate_paths.append(self.endpoint)
-        candidate_paths.extend(["/v1/chat/completions", "/v1/completions", "/api/generate", "/generate"]) 
+        return self._timed_stream(self._stream, prompt)
 
-        params = {}
-        if self.temperature is not None:
-            params["temperature"] = self.temperature
-        if self.max_tokens is not None:
-            params["max_tokens"] = self.max_tokens
+    def astream(self, prompt: str) -> AsyncIterator[str]:
+        """Async counterpart of :meth:`stream` with the same fallback behaviour."""
+        return self._atimed_stream(self._astream, prompt)
 
-        payload = {"model": self.model, "messages": [{"role": "user", "content": prompt}]}
-        if params:
-            payload.update(params)
+    def _generate(
+        self,
+        prompt: str,
+        call: CallRecorder,
+        system: Optional[str] = None,
+        response_format: Optional[dict[str, Any]] = None,
+    ) -> str:
+        client = self._get_client()
+        last_exc: Optional[Exception] = None
+        for path, shape in self._generate_attempts():
+            url = self._build_url(path)
+            try:
+                resp = client.post(url, json=self._payload(shape, prompt, system, response_format), timeout=30.0)
+                resp.raise_for_status()
+            except Exception as exc:  # try next combination
+                last_exc = exc
+                call.retry()
+                continue
+            self._remember("generate", EndpointRoute(path, shape))
+            return self._response_text(resp, call)
 
-        def build_url(path: str) -> str:
-            if path.startswith("http://") or path.startswith("https://"):
-                return path
-            if not path.startswith("/"):
-                path = "/" + path
-            return f"{self.base_url}{path}"
+        self.routes.forget(self.base_url, self.model, "generate")
+        if last_exc is not None:
+            raise RuntimeError(f"LMStudio generation failed: {last_exc}") from last_exc
+        return ""
 
+    async def _agenerate(
+        self,
+        prompt: str,
+        call: CallRecorder,
+        system: Optional[str] = None,
+        response_format: Optional[dict[str, Any]] = None,
+    ) -> str:
+        client = self._get_async_client()
         last_exc: Optional[Exception] = None
-        yielded_any = False
-        for path in candidate_paths:
-            url = build_url(path)
+        for path, shape in self._generate_attempts():
+            url = self._build_url(path)
             try:
-                with httpx.Client(timeout=60.0) as client:
-                    with client.stream("POST", url, json=payload) as resp:
-                        resp.raise_for_status()
-                        # stream may come as SSE-like lines starting with 'data: '
-                        buffer = ""
-                        for chunk in resp.iter_text(chunk_size=1024):
-                            if not chunk:
-                                continue
-                            buffer += chunk
-                            # process completed lines
-                            while "\n" in buffer:
-                                line, buffer = buffer.split("\n", 1)
-                                line = line.strip()
-                                if not line:
-                                    continue
-                                # OpenAI-style SSE: lines prefixed with 'data: '
-                                if line.startswith("data:"):
-                                    payload_line = line[len("data:"):].strip()
-                                    if payload_line == "[DONE]":
-                                        if yielded_any:
-                                            return
-                                        # if nothing yielded yet, break to try fallback endpoints
-                                        raise RuntimeError("stream signaled done without chunks")
-                                    try:
-                                        obj = json.loads(payload_line)
-                                    except Exception:
-                                        yielded_any = True
-                                        yield payload_line
-                                        continue
-                                    # try to extract incremental delta content
-                                    # choices[].delta.content or choices[].message.content
-                                    if isinstance(obj, dict) and "choices" in obj:
-                                        for c in obj["choices"]:
-                                            if isinstance(c, dict):
-                                                # delta-based streaming
-                                                delta = c.get("delta")
-                                                if isinstance(delta, dict):
-                                                    dcont = delta.get("content") or delta.get("text")
-                                                    if isinstance(dcont, str):
-                                                        yielded_any = True
-                                                        yield dcont
-                                                        continue
-                                                # full message in streaming chunk
-                                                msg = c.get("message")
-                                                if isinstance(msg, dict):
-                                                    cont = msg.get("content")
-                                                    if isinstance(cont, str):
-                                                        yielded_any = True
-                                                        yield cont
-                                                        continue
-                                                txt = c.get("text")
-                                                if isinstance(txt, str):
-                                                    yielded_any = True
-                                                    yield txt
-                                                    continue
-                                    # fallback: try full-object extraction
-                                    t = self._extract_text(obj)
-                                    if t:
-                                        yielded_any = True
-                                        yield t
-                                else:
-                                    # not SSE, try parsing as JSON
-                                    try:
-                                        obj = json.loads(line)
-                                        t = self._extract_text(obj)
-                                        if t:
-                                            yielded_any = True
-                                            yield t
-                                            continue
-                                    except Exception:
-                                        yielded_any = True
-                                        yield line
-                        # if stream ended normally, return if we yielded something
-                        if yielded_any:
-                            return
-                        # otherwise continue to next candidate path
+                resp = await client.post(url, json=self._payload(shape, prompt, system, response_format), timeout=30.0)
+                resp.raise_for_status()
             except Exception as exc:
                 last_exc = exc
+                call.retry()
+                continue
+            self._remember("generate", EndpointRoute(path, shape))
+            return self._response_text(resp, call)
+
+        self.routes.forget(self.base_url, self.model, "generate")
+        if last_exc is not None:
+            raise RuntimeError(f"LMStudio generation failed: {last_exc}") from last_exc
+        return ""
+
+    def _stream(
+        self,
+        prompt: str,
+        call: CallRecorder,
+        system: Optional[str] = None,
+        response_format: Optional[dict[str, Any]] = None,
+    ) -> Iterator[str]:
+        client = self._get_client()
+        payload = self._stream_payload(prompt, system, response_format)
+        yielded_any = False
+        for path in self._stream_attempts():
+            url = self._build_url(path)
+            fmt: Optional[str] = None
+            try:
+                with client.stream("POST", url, json=payload) as resp:
+                    resp.raise_for_status()
+                    # stream may come as SSE-like lines starting with 'data: '
+                    for line in iter_lines(resp.iter_bytes()):
+                        if fmt is None:
+                            fmt = "sse" if line.startswith("data:") else "ndjson"
+                        chunks = self._stream_line_chunks(line, call)
+                        if chunks is None:
+                            if yielded_any:
+                                break
+                            # if nothing yielded yet, break to try fallback endpoints
+                            raise RuntimeError("stream signaled done without chunks")
+                        for chunk in chunks:
+                            yielded_any = True
+                            yield chunk
+            except Exception:
+                call.retry()
                 continue
+            # if stream ended normally, return if we yielded something
+            if yielded_any:
+                self._remember("stream", EndpointRoute(path, "chat", fmt))
+                return
+            # otherwise continue to next candidate path
 
         # streaming failed for all endpoints or produced no chunks -> fallback
         try:
-            gen_out = self.generate(prompt)
+            gen_out = self._generate(prompt, call, system, response_format)
         except Exception as exc:
             raise RuntimeError("LMStudio streaming and fallback generate both failed") from exc
+        # skip stream probing for the rest of this process (re-checked on restart)
+        self._remember("stream", EndpointRoute(None), persist=False)
         # yield generate output as a single chunk
         yield gen_out
 
-    def list_models(self) -> list[str]:
-        """List models using LMStudio's OpenAI-compatible `/v1/models` endpoint."""
+    async def _astream(
+        self,
+        prompt: str,
+        call: CallRecorder,
+        system: Optional[str] = None,
+        response_format: Optional[dict[str, Any]] = None,
+    ) -> AsyncIterator[str]:
+        client = self._get_async_client()
+        payload = self._stream_payload(prompt, system, response_format)
+        yielded_any = False
+        for path in self._stream_attempts():
+            url = self._build_url(path)
+            fmt: Optional[str] = None
+            try:
+                async with client.stream("POST", url, json=payload) as resp:
+                    resp.raise_for_status()
+                    async for line in aiter_lines(resp.aiter_bytes()):
+                        if fmt is None:
+                            fmt = "sse" if line.startswith("data:") else "ndjson"
+                        chunks = self._stream_line_chunks(line, call)
+                        if chunks is None:
+                            if yielded_any:
+                                break
+                            raise RuntimeError("stream signaled done without chunks")
+                        for chunk in chunks:
+                            yielded_any = True
+                            yield chunk
+            except Exception:
+                call.retry()
+                continue
+            if yielded_any:
+                self._remember("stream", EndpointRoute(path, "chat", fmt))
+                return
+
         try:
-            import httpx
-        except Exception as exc:  # pragma: no cover - environment dependent
-            raise RuntimeError("httpx is required for LMStudioProvider") from exc
+            gen_out = await self._agenerate(prompt, call, system, response_format)
+        except Exception as exc:
+            raise RuntimeError("LMStudio streaming and fallback generate both failed") from exc
+        self._remember("stream", EndpointRoute(None), persist=False)
+        yield gen_out
+
+    def _server_batching(self) -> bool:
+        route = self.routes.get(self.base_url, self.model, "batch")
+        return route is None or route.path is not None
 
+    def _batch_texts(self, resp: Any, n: int, call: CallRecorder) -> Optional[list[str]]:
+        """Map a multi-prompt completion response back to prompt order."""
+        try:
+            data = resp.json()
+        except Exception:
+            return None
+        call.observe(data)
+        choices = data.get("choices") if isinstance(data, dict) else None
+        if not isinstance(choices, list) or len(choices) != n:
+            return None
+        texts: list[Optional[str]] = [None] * n
+        for pos, c in enumerate(choices):
+            if not isinstance(c, dict):
+                return None
+            idx = c.get("index", pos)
+            text = c.get("text")
+            if not isinstance(idx, int) or not 0 <= idx < n or not isinstance(text, str):
+                return None
+            texts[idx] = text
+        if any(t is None for t in texts):
+            return None
+        return texts  # type: ignore[return-value]
+
+    def _batch_unsupported(self, exc: BaseException) -> bool:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+        return status in self.BATCH_UNSUPPORTED
+
+    def _record_batch(
+        self, results: list[Optional[BatchResult]], start: int, texts: Optional[list[str]], unsupported: bool
+    ) -> bool:
+        if texts is None:
+            if unsupported:
+                # server can't batch; use per-prompt concurrency for this process
+                self._remember("batch", EndpointRoute(None), persist=False)
+            # otherwise a transient failure: only this call falls back to single prompts
+            return False
+        self._remember("batch", EndpointRoute(self.BATCH_PATH, "completion_batch"))
+        for i, text in enumerate(texts):
+            results[start + i] = BatchResult(text=text)
+        return True
+
+    def generate_batch(self, prompts: Sequence[str], max_concurrency: Optional[int] = None) -> list[BatchResult]:
+        """Batch generate, using server-side multi-prompt completions when supported.
+
+        Prompts are sent ``server_batch_size`` at a time to ``/v1/completions``;
+        anything the server cannot batch falls back to concurrent per-prompt
+        calls (see :meth:`ModelProvider.generate_batch`).
+        """
+        results: list[Optional[BatchResult]] = [None] * len(prompts)
+        if len(prompts) > 1 and self._server_batching():
+            client = self._get_client()
+            url = self._build_url(self.BATCH_PATH)
+            for start in range(0, len(prompts), self.server_batch_size):
+                group = list(prompts[start:start + self.server_batch_size])
+                call = self._record("batch")
+                try:
+                    resp = client.post(url, json={"model": self.model, "prompt": group, **self._params()})
+                    resp.raise_for_status()
+                    texts = self._batch_texts(resp, len(group), call)
+                    # a 2xx reply we cannot map back to the prompts: the server does not batch
+                    unsupported = texts is None
+                except Exception as exc:
+                    call.finish(exc)
+                    texts = None
+                    unsupported = self._batch_unsupported(exc)
+                call.finish()
+                if not self._record_batch(results, start, texts, unsupported):
+                    break
+        pending = [i for i, r in enumerate(results) if r is None]
+        if pending:
+            rest = super().generate_batch([prompts[i] for i in pending], max_concurrency)
+            for i, r in zip(pending, rest):
+                results[i] = r
+        return results  # type: ignore[return-value]
+
+    async def agenerate_batch(self, prompts: Sequence[str], max_concurrency: Optional[int] = None) -> list[BatchResult]:
+        results: list[Optional[BatchResult]] = [None] * len(prompts)
+        if len(prompts) > 1 and self._server_batching():
+            client = self._get_async_client()
+            url = self._build_url(self.BATCH_PATH)
+            for start in range(0, len(prompts), self.server_batch_size):
+                group = list(prompts[start:start + self.server_batch_size])
+                call = self._record("batch")
+                try:
+                    resp = await client.post(url, json={"model": self.model, "prompt": group, **self._params()})
+                    resp.raise_for_status()
+                    texts = self._batch_texts(resp, len(group), call)
+                    # a 2xx reply we cannot map back to the prompts: the server does not batch
+                    unsupported = texts is None
+                except Exception as exc:
+                    call.finish(exc)
+                    texts = None
+                    unsupported = self._batch_unsupported(exc)
+                call.finish()
+                if not self._record_batch(results, start, texts, unsupported):
+                    break
+        pending = [i for i, r in enumerate(results) if r is None]
+        if pending:
+            rest = await super().agenerate_batch([prompts[i] for i in pending], max_concurrency)
+            for i, r in zip(pending, rest):
+                results[i] = r
+        return results  # type: ignore[return-value]
+
+    def list_models(self) -> list[str]:
+        """List models using LMStudio's OpenAI-compatible `/v1/models` endpoint."""
         url = f"{self.base_url}/v1/models"
         try:
-            resp = httpx.get(url, timeout=10.0)
+            resp = self._get_client().get(url, timeout=10.0)
             resp.raise_for_status()
         except Exception:
             return []
@@ -457,4 +1162,4 @@ class LMStudioProvider(ModelProvider):
         return []
 
 
-__all__ = ["ModelProvider", "DummyProvider", "OllamaProvider", "LMStudioProvider"]
+__all__ = ["BatchResult", "ModelProvider", "DummyProvider", "OllamaProvider", "LMStudioProvider", "join_prompt", "json_system"]
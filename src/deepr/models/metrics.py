@@ -0,0 +1,178 @@
+"""Per-call token and latency metrics for model providers.
+
+Providers time each call with a :class:`CallRecorder`, feed it the usage
+fields servers report (Ollama ``prompt_eval_count``/``eval_count``/
+``eval_duration``, OpenAI ``usage``) and, when the call ends, hand the
+resulting :class:`CallMetrics` to their hooks and to the ``deepr.metrics``
+JSON logger. :class:`RunMetrics` is a hook that aggregates a whole run.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Optional
+
+log = logging.getLogger("deepr.metrics")
+
+MetricsHook = Callable[["CallMetrics"], None]
+
+
+@dataclass
+class CallMetrics:
+    provider: str
+    model: Optional[str]
+    kind: str  # generate | stream | batch
+    started: float  # wall-clock epoch seconds
+    duration: float = 0.0
+    ttft: Optional[float] = None  # seconds to first streamed token
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    eval_seconds: Optional[float] = None  # server-reported generation time
+    retries: int = 0
+    ok: bool = True
+    error: Optional[str] = None
+
+    @property
+    def tokens_per_second(self) -> Optional[float]:
+        if not self.completion_tokens:
+            return None
+        seconds = self.eval_seconds
+        if seconds is None:
+            seconds = self.duration - (self.ttft or 0.0)
+        return self.completion_tokens / seconds if seconds > 0 else None
+
+    def to_dict(self) -> dict[str, Any]:
+        d = asdict(self)
+        d["tokens_per_second"] = self.tokens_per_second
+        return d
+
+
+def _int(v: Any) -> Optional[int]:
+    return v if isinstance(v, int) and not isinstance(v, bool) else None
+
+
+class CallRecorder:
+    """Collects timing and usage for one provider call."""
+
+    def __init__(self, provider: str, model: Optional[str], kind: str, hooks: list[MetricsHook]) -> None:
+        self.metrics = CallMetrics(provider=provider, model=model, kind=kind, started=time.time())
+        self._t0 = time.perf_counter()
+        self._hooks = hooks
+        self._done = False
+
+    def first_token(self) -> None:
+        if self.metrics.ttft is None:
+            self.metrics.ttft = time.perf_counter() - self._t0
+
+    def retry(self) -> None:
+        self.metrics.retries += 1
+
+    def observe(self, data: Any) -> None:
+        """Pick up token usage from a parsed response/stream object, if present."""
+        if not isinstance(data, dict):
+            return
+        m = self.metrics
+        # Ollama: counts on the final (done) object, durations in nanoseconds
+        if "eval_count" in data or "prompt_eval_count" in data:
+            m.prompt_tokens = _int(data.get("prompt_eval_count")) or m.prompt_tokens
+            m.completion_tokens = _int(data.get("eval_count")) or m.completion_tokens
+            dur = _int(data.get("eval_duration"))
+            if dur:
+                m.eval_seconds = dur / 1e9
+        # OpenAI-compatible usage block
+        usage = data.get("usage")
+        if isinstance(usage, dict):
+            m.prompt_tokens = _int(usage.get("prompt_tokens")) or m.prompt_tokens
+            m.completion_tokens = _int(usage.get("completion_tokens")) or m.completion_tokens
+
+    def finish(self, error: Optional[BaseException] = None) -> CallMetrics:
+        m = self.metrics
+        if self._done:
+            return m
+        self._done = True
+        m.duration = time.perf_counter() - self._t0
+        if error is not None:
+            m.ok = False
+            m.error = f"{type(error).__name__}: {error}"
+        log.info("llm_call", extra={"llm": m.to_dict()})
+        for hook in self._hooks:
+            try:
+                hook(m)
+            except Exception:  # a broken hook must not fail the model call
+                log.exception("metrics hook failed")
+        return m
+
+
+@dataclass
+class _Totals:
+    calls: int = 0
+    errors: int = 0
+    retries: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    durations: list[float] = field(default_factory=list)
+    ttfts: list[float] = field(default_factory=list)
+    eval_seconds: float = 0.0
+
+    def add(self, m: CallMetrics) -> None:
+        self.calls += 1
+        self.errors += 0 if m.ok else 1
+        self.retries += m.retries
+        self.prompt_tokens += m.prompt_tokens or 0
+        self.completion_tokens += m.completion_tokens or 0
+        self.durations.append(m.duration)
+        if m.ttft is not None:
+            self.ttfts.append(m.ttft)
+        if m.completion_tokens:
+            self.eval_seconds += m.eval_seconds if m.eval_seconds is not None else max(m.duration - (m.ttft or 0.0), 0.0)
+
+    def summary(self) -> dict[str, Any]:
+        d = sorted(self.durations)
+
+        def pct(p: float) -> Optional[float]:
+            return d[min(len(d) - 1, int(p * len(d)))] if d else None
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "latency_p50": pct(0.5),
+            "latency_p95": pct(0.95),
+            "latency_total": sum(d),
+            "ttft_mean": sum(self.ttfts) / len(self.ttfts) if self.ttfts else None,
+            "tokens_per_second": self.completion_tokens / self.eval_seconds if self.eval_seconds > 0 else None,
+        }
+
+
+class RunMetrics:
+    """Metrics hook aggregating every call of a run, overall and per provider/model."""
+
+    def __init__(self, run_id: Optional[str] = None) -> None:
+        self.run_id = run_id
+        self._total = _Totals()
+        self._by_model: dict[str, _Totals] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, m: CallMetrics) -> None:
+        key = f"{m.provider}:{m.model}"
+        with self._lock:
+            self._total.add(m)
+            self._by_model.setdefault(key, _Totals()).add(m)
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "run_id": self.run_id,
+                **self._total.summary(),
+                "by_model": {k: t.summary() for k, t in self._by_model.items()},
+            }
+
+    def log_summary(self) -> None:
+        log.info("llm_run_summary", extra={"llm_run": self.summary()})
+
+
+__all__ = ["CallMetrics", "CallRecorder", "MetricsHook", "RunMetrics"]
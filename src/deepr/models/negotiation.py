@@ -0,0 +1,119 @@
+"""Remembered endpoint/payload combinations for OpenAI-ish local servers.
+
+LM Studio and similar servers expose different subsets of the OpenAI API.
+Providers probe candidate (path, payload shape) pairs until one works; this
+module remembers the winner per ``base_url`` + ``model`` so later calls go
+straight to it and only re-probe when it stops working.
+"""
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class EndpointRoute:
+    """A negotiated way of talking to a server.
+
+    ``path`` is None for a stream route when the server has no working
+    streaming endpoint and callers should go straight to non-stream generate.
+    """
+
+    path: Optional[str]
+    payload: str = "chat"
+    stream_format: Optional[str] = None  # "sse" | "ndjson" for stream routes
+
+
+class NegotiationCache:
+    """In-memory route cache, optionally mirrored to a JSON file.
+
+    Entries are keyed by ``(base_url, model, kind)`` where ``kind`` is
+    ``"generate"`` or ``"stream"``. When ``path`` is given the file is loaded
+    lazily on first access and rewritten on every persistent change.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = Path(path) if path is not None else None
+        self._routes: dict[str, dict[str, EndpointRoute]] = {}
+        self._volatile: set[tuple[str, str]] = set()
+        self._loaded = self.path is None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(base_url: str, model: str) -> str:
+        return f"{base_url.rstrip('/')}|{model}"
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))  # type: ignore[union-attr]
+        except Exception:
+            return
+        if not isinstance(raw, dict):
+            return
+        for key, kinds in raw.items():
+            if not isinstance(kinds, dict):
+                continue
+            for kind, route in kinds.items():
+                try:
+                    self._routes.setdefault(key, {})[kind] = EndpointRoute(**route)
+                except Exception:
+                    continue
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        data = {
+            key: {kind: asdict(route) for kind, route in kinds.items() if (key, kind) not in self._volatile}
+            for key, kinds in self._routes.items()
+        }
+        data = {k: v for k, v in data.items() if v}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
+            tmp.replace(self.path)
+        except OSError:
+            # persistence is best-effort; the in-memory entry still applies
+            pass
+
+    def get(self, base_url: str, model: str, kind: str) -> Optional[EndpointRoute]:
+        with self._lock:
+            self._load()
+            return self._routes.get(self._key(base_url, model), {}).get(kind)
+
+    def remember(self, base_url: str, model: str, kind: str, route: EndpointRoute, persist: bool = True) -> None:
+        """Record ``route``; ``persist=False`` keeps it for this process only."""
+        key = self._key(base_url, model)
+        with self._lock:
+            self._load()
+            if self._routes.get(key, {}).get(kind) == route and ((key, kind) in self._volatile) != persist:
+                return
+            self._routes.setdefault(key, {})[kind] = route
+            if persist:
+                self._volatile.discard((key, kind))
+            else:
+                self._volatile.add((key, kind))
+            self._save()
+
+    def forget(self, base_url: str, model: str, kind: Optional[str] = None) -> None:
+        """Drop one kind (or all kinds) of remembered route for a server/model."""
+        key = self._key(base_url, model)
+        with self._lock:
+            self._load()
+            kinds = self._routes.get(key)
+            if not kinds:
+                return
+            if kind is None:
+                self._routes.pop(key, None)
+            else:
+                kinds.pop(kind, None)
+            self._save()
+
+
+__all__ = ["EndpointRoute", "NegotiationCache"]
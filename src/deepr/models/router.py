@@ -0,0 +1,274 @@
+"""Routing provider that spreads calls across several model servers.
+
+Each request goes to the healthy backend with the fewest in-flight requests
+(ties broken by the fewest served, giving round-robin under light load). A
+backend that errors or times out is taken out of rotation for ``cooldown``
+seconds and the request fails over to the next one; streams fail over only
+until their first chunk has been yielded. Session calls (``generate_chat``)
+stay on the backend that served the session before, while it is healthy, so
+that server's prompt cache for the role keeps being reused.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Iterator, Optional, Sequence, TypeVar
+
+from .llm_provider import ModelProvider
+from .metrics import MetricsHook
+from .session import ProviderSession
+from .structured import Schema
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Backend:
+    provider: ModelProvider
+    name: str
+    outstanding: int = 0
+    served: int = 0
+    failures: int = 0
+    down_until: float = 0.0
+
+
+class RouterProvider(ModelProvider):
+    """Least-outstanding-requests load balancer with failover.
+
+    ``providers`` are any :class:`ModelProvider` instances, typically one
+    Ollama/LM Studio provider per server. ``model``/``temperature``/
+    ``max_tokens`` describe the logical model served (used e.g. for cache keys).
+    Batches fan out to the sum of the backends' ``batch_concurrency``, so each
+    added server adds its own share of parallel requests.
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[ModelProvider],
+        cooldown: float = 30.0,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ) -> None:
+        if not providers:
+            raise ValueError("RouterProvider needs at least one backend")
+        self.backends = [
+            _Backend(p, f"{type(p).__name__}@{getattr(p, 'base_url', i)}") for i, p in enumerate(providers)
+        ]
+        self.batch_concurrency = sum(p.batch_concurrency for p in providers)
+        self.cooldown = cooldown
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def _acquire(self, tried: list[_Backend], prefer: Optional[str] = None) -> Optional[_Backend]:
+        with self._lock:
+            now = time.monotonic()
+            remaining = [b for b in self.backends if b not in tried]
+            # prefer healthy backends; if every one is cooling down, still try them
+            candidates = [b for b in remaining if b.down_until <= now] or remaining
+            if not candidates:
+                return None
+            pinned = [b for b in candidates if b.name == prefer and b.down_until <= now]
+            backend = pinned[0] if pinned else min(candidates, key=lambda b: (b.outstanding, b.served))
+            backend.outstanding += 1
+            backend.served += 1
+            return backend
+
+    def _release(self, backend: _Backend, exc: Optional[BaseException] = None) -> None:
+        with self._lock:
+            backend.outstanding -= 1
+            if exc is None:
+                backend.failures = 0
+                backend.down_until = 0.0
+                return
+            backend.failures += 1
+            backend.down_until = time.monotonic() + self.cooldown
+        log.warning("model backend failed", extra={"backend": backend.name, "error": str(exc)})
+
+    def _exhausted(self, last_exc: Optional[BaseException]) -> RuntimeError:
+        return RuntimeError(f"all {len(self.backends)} model backends failed: {last_exc}")
+
+    def health_check(self) -> dict[str, bool]:
+        """Probe every backend via ``list_models`` and update its health.
+
+        A backend without ``list_models`` is assumed healthy; one that raises
+        or reports no models is put into cooldown.
+        """
+        status: dict[str, bool] = {}
+        for b in self.backends:
+            list_models = getattr(b.provider, "list_models", None)
+            ok = True
+            if list_models is not None:
+                try:
+                    ok = bool(list_models())
+                except Exception:
+                    ok = False
+            with self._lock:
+                if ok:
+                    b.failures = 0
+                    b.down_until = 0.0
+                else:
+                    b.down_until = time.monotonic() + self.cooldown
+            status[b.name] = ok
+        return status
+
+    def add_metrics_hook(self, hook: MetricsHook) -> None:
+        """Register ``hook`` on every backend; the router itself makes no model calls."""
+        for b in self.backends:
+            b.provider.add_metrics_hook(hook)
+
+    @staticmethod
+    def _pin(backend: _Backend, session: Optional[ProviderSession]) -> None:
+        if session is not None and session.backend != backend.name:
+            session.context = None  # another server's context is meaningless here
+            session.backend = backend.name
+
+    def _call(self, fn: Callable[[ModelProvider], T], session: Optional[ProviderSession] = None) -> T:
+        """Run ``fn(provider)`` on the best backend, failing over on errors."""
+        tried: list[_Backend] = []
+        last_exc: Optional[BaseException] = None
+        while (backend := self._acquire(tried, session.backend if session else None)) is not None:
+            tried.append(backend)
+            self._pin(backend, session)
+            try:
+                out = fn(backend.provider)
+            except Exception as exc:
+                self._release(backend, exc)
+                last_exc = exc
+                continue
+            self._release(backend)
+            return out
+        raise self._exhausted(last_exc) from last_exc
+
+    async def _acall(self, fn: Callable[[ModelProvider], Awaitable[T]], session: Optional[ProviderSession] = None) -> T:
+        tried: list[_Backend] = []
+        last_exc: Optional[BaseException] = None
+        while (backend := self._acquire(tried, session.backend if session else None)) is not None:
+            tried.append(backend)
+            self._pin(backend, session)
+            try:
+                out = await fn(backend.provider)
+            except Exception as exc:
+                self._release(backend, exc)
+                last_exc = exc
+                continue
+            self._release(backend)
+            return out
+        raise self._exhausted(last_exc) from last_exc
+
+    def _stream_from(self, fn: Callable[[ModelProvider], Iterable[str]]) -> Iterator[str]:
+        """Stream ``fn(provider)``, failing over only until the first chunk."""
+        tried: list[_Backend] = []
+        last_exc: Optional[BaseException] = None
+        while (backend := self._acquire(tried)) is not None:
+            tried.append(backend)
+            yielded_any = False
+            try:
+                for chunk in fn(backend.provider):
+                    yielded_any = True
+                    yield chunk
+            except Exception as exc:
+                self._release(backend, exc)
+                if yielded_any:
+                    raise
+                last_exc = exc
+                continue
+            except BaseException:
+                # consumer stopped early (GeneratorExit) — not a backend failure
+                self._release(backend)
+                raise
+            self._release(backend)
+            return
+        raise self._exhausted(last_exc) from last_exc
+
+    async def _astream_from(self, fn: Callable[[ModelProvider], AsyncIterable[str]]) -> AsyncIterator[str]:
+        tried: list[_Backend] = []
+        last_exc: Optional[BaseException] = None
+        while (backend := self._acquire(tried)) is not None:
+            tried.append(backend)
+            yielded_any = False
+            try:
+                async for chunk in fn(backend.provider):
+                    yielded_any = True
+                    yield chunk
+            except Exception as exc:
+                self._release(backend, exc)
+                if yielded_any:
+                    raise
+                last_exc = exc
+                continue
+            except BaseException:
+                self._release(backend)
+                raise
+            self._release(backend)
+            return
+        raise self._exhausted(last_exc) from last_exc
+
+    def generate(self, prompt: str) -> str:
+        return self._call(lambda p: p.generate(prompt))
+
+    async def agenerate(self, prompt: str) -> str:
+        return await self._acall(lambda p: p.agenerate(prompt))
+
+    def generate_chat(self, system: str, prompt: str, session: Optional[ProviderSession] = None) -> str:
+        return self._call(lambda p: p.generate_chat(system, prompt, session), session)
+
+    async def agenerate_chat(self, system: str, prompt: str, session: Optional[ProviderSession] = None) -> str:
+        return await self._acall(lambda p: p.agenerate_chat(system, prompt, session), session)
+
+    def stream(self, prompt: str) -> Iterable[str]:
+        return self._stream_from(lambda p: p.stream(prompt))
+
+    def astream(self, prompt: str) -> AsyncIterator[str]:
+        return self._astream_from(lambda p: p.astream(prompt))
+
+    # structured output: each backend applies its own JSON mode
+    def _generate_structured(self, system: str, prompt: str, schema: Schema, session: Optional[ProviderSession] = None) -> str:
+        return self._call(lambda p: p._generate_structured(system, prompt, schema, session), session)
+
+    async def _agenerate_structured(
+        self, system: str, prompt: str, schema: Schema, session: Optional[ProviderSession] = None
+    ) -> str:
+        return await self._acall(lambda p: p._agenerate_structured(system, prompt, schema, session), session)
+
+    def _stream_structured(self, system: str, prompt: str, schema: Schema) -> Iterable[str]:
+        return self._stream_from(lambda p: p._stream_structured(system, prompt, schema))
+
+    def _astream_structured(self, system: str, prompt: str, schema: Schema) -> AsyncIterator[str]:
+        return self._astream_from(lambda p: p._astream_structured(system, prompt, schema))
+
+    def list_models(self) -> list[str]:
+        """Union of the models reported by all reachable backends."""
+        seen: dict[str, None] = {}
+        for b in self.backends:
+            try:
+                for m in getattr(b.provider, "list_models", lambda: [])():
+                    seen.setdefault(m, None)
+            except Exception:
+                continue
+        return list(seen)
+
+    def close(self) -> None:
+        for b in self.backends:
+            close = getattr(b.provider, "close", None)
+            if close is not None:
+                close()
+
+    async def aclose(self) -> None:
+        for b in self.backends:
+            aclose: Any = getattr(b.provider, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            else:
+                close = getattr(b.provider, "close", None)
+                if close is not None:
+                    close()
+
+
+__all__ = ["RouterProvider"]
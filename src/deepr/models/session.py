@@ -0,0 +1,51 @@
+"""Per-role model sessions for prompt-prefix reuse.
+
+A :class:`ProviderSession` pins an agent role (Researcher, Synthesizer, ...)
+to its system prompt. Calls made through it send the system prompt separately
+from the user message — Ollama's ``system`` field, an OpenAI-style ``system``
+message for LM Studio — so every call for the role starts with the same
+tokens and the server's prompt cache can reuse that prefix. The session also
+carries Ollama's ``keep_alive``, so the model (and its KV cache) stays loaded
+between calls.
+
+With ``carry_context=True`` the ``context`` token array Ollama returns is sent
+back on the next call, which continues the role's conversation without
+resending (or re-evaluating) anything before it. Use it for a role that
+really builds on its previous turns, and :meth:`ProviderSession.reset` to
+start over.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .llm_provider import ModelProvider
+
+
+@dataclass
+class ProviderSession:
+    provider: "ModelProvider"
+    role: str
+    system: str
+    keep_alive: Optional[str] = None  # e.g. "30m"; None uses the provider's default
+    carry_context: bool = False
+    context: Optional[list[int]] = field(default=None, repr=False)  # last Ollama context
+    backend: Optional[str] = None  # set by RouterProvider to keep the role on one server
+    calls: int = 0
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        return self.provider.generate_chat(self.system, prompt, self)
+
+    async def agenerate(self, prompt: str) -> str:
+        self.calls += 1
+        return await self.provider.agenerate_chat(self.system, prompt, self)
+
+    def reset(self) -> None:
+        """Forget the carried context (and server pinning); the next call starts fresh."""
+        self.context = None
+        self.backend = None
+
+
+__all__ = ["ProviderSession"]
@@ -0,0 +1,85 @@
+"""Incremental decoding of streamed NDJSON / SSE model responses.
+
+Servers stream generations either as newline-delimited JSON (Ollama) or as
+OpenAI-style server-sent events (``data: {...}`` lines). :class:`LineDecoder`
+turns raw byte chunks into complete lines while touching each byte a constant
+number of times: only the unterminated tail of a chunk is carried over, so
+cost per chunk stays flat however long the generation gets.
+"""
+from __future__ import annotations
+
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Optional
+
+
+class LineDecoder:
+    """Split a byte stream into stripped, non-empty text lines.
+
+    Lines are decoded as UTF-8 only once complete, so multi-byte characters
+    split across network chunks are reassembled correctly.
+    """
+
+    def __init__(self, encoding: str = "utf-8") -> None:
+        self.encoding = encoding
+        self._pending = bytearray()
+
+    def _emit(self, raw: bytes, out: list[str]) -> None:
+        line = raw.decode(self.encoding, errors="replace").strip()
+        if line:
+            out.append(line)
+
+    def feed(self, data: bytes) -> list[str]:
+        """Consume ``data`` and return the lines it completed."""
+        lines: list[str] = []
+        start = 0
+        while True:
+            idx = data.find(b"\n", start)
+            if idx < 0:
+                break
+            if self._pending:
+                self._pending += data[start:idx]
+                self._emit(bytes(self._pending), lines)
+                self._pending.clear()
+            else:
+                self._emit(data[start:idx], lines)
+            start = idx + 1
+        if start < len(data):
+            self._pending += data[start:]
+        return lines
+
+    def flush(self) -> list[str]:
+        """Return the trailing line left when the stream ends without a newline."""
+        lines: list[str] = []
+        if self._pending:
+            self._emit(bytes(self._pending), lines)
+            self._pending.clear()
+        return lines
+
+
+def sse_data(line: str) -> Optional[str]:
+    """Return the payload of an SSE ``data:`` line, or None for any other line."""
+    if line.startswith("data:"):
+        return line[5:].strip()
+    return None
+
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Yield complete lines from an iterable of byte chunks."""
+    decoder = LineDecoder()
+    for chunk in chunks:
+        if chunk:
+            yield from decoder.feed(chunk)
+    yield from decoder.flush()
+
+
+async def aiter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Async counterpart of :func:`iter_lines`."""
+    decoder = LineDecoder()
+    async for chunk in chunks:
+        if chunk:
+            for line in decoder.feed(chunk):
+                yield line
+    for line in decoder.flush():
+        yield line
+
+
+__all__ = ["LineDecoder", "sse_data", "iter_lines", "aiter_lines"]
@@ -0,0 +1,262 @@
+"""Structured (JSON) model output.
+
+Providers request JSON where the backend can enforce it — Ollama's ``format``
+(``"json"`` or a JSON schema), OpenAI-style ``response_format`` for LM Studio —
+and the text is validated into a pydantic model (see
+:meth:`~deepr.models.llm_provider.ModelProvider.generate_json`).
+
+:class:`IncrementalJSONParser` consumes a response while it streams and emits
+each value as soon as it is complete, addressed by its path in the document
+(``("actions", 0)``, ``("phases", 1, "tasks", 2)``). A caller can therefore
+dispatch the first Researcher action while the model is still writing the
+second. Text before the JSON (a preamble, a Markdown code fence) and after it
+is ignored. Each new chunk is scanned once.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any, Iterator, Optional, Sequence, Union
+
+from pydantic import BaseModel, ValidationError
+
+log = logging.getLogger(__name__)
+
+Schema = Union[type[BaseModel], dict[str, Any], None]
+Path = tuple[Union[str, int], ...]
+
+_STRING_STOP = re.compile(r'["\\]')
+_WHITESPACE = " \t\r\n"
+
+
+class StructuredOutputError(ValueError):
+    """Raised when model output is not valid JSON or does not match the schema."""
+
+    def __init__(self, message: str, text: str = "") -> None:
+        super().__init__(message)
+        self.text = text
+
+
+@dataclass(frozen=True)
+class JSONItem:
+    path: Path
+    value: Any
+
+
+@dataclass
+class _Frame:
+    kind: str  # "{" or "["
+    start: int
+    path: Path
+    index: int = 0
+    key: Optional[str] = None
+    expect_key: bool = True
+
+
+def json_schema(schema: Schema) -> Optional[dict[str, Any]]:
+    """JSON schema for ``schema`` (a pydantic model class or a schema dict)."""
+    if schema is None:
+        return None
+    if isinstance(schema, dict):
+        return schema
+    return schema.model_json_schema()
+
+
+def schema_instruction(schema: Schema) -> str:
+    """Prompt suffix asking for JSON, for backends that cannot enforce it."""
+    spec = json_schema(schema)
+    if spec is None:
+        return "Respond with a single JSON value and nothing else."
+    return "Respond with a single JSON value and nothing else, matching this JSON schema:\n" + json.dumps(spec)
+
+
+def validate(value: Any, schema: Schema, text: str = "") -> Any:
+    """``value`` validated into ``schema``'s model (dict schemas are not checked)."""
+    if schema is None or isinstance(schema, dict):
+        return value
+    try:
+        return schema.model_validate(value)
+    except ValidationError as exc:
+        raise StructuredOutputError(f"output does not match {schema.__name__}: {exc}", text) from exc
+
+
+def _matches(path: Path, pattern: Sequence[str]) -> bool:
+    return len(path) == len(pattern) and all(p == "*" or p == str(c) for c, p in zip(path, pattern))
+
+
+class IncrementalJSONParser:
+    """Streaming JSON parser emitting values as they complete.
+
+    ``paths`` are dotted patterns (``"actions.*"``, ``"phases.*.tasks.*"``);
+    :meth:`feed` yields a :class:`JSONItem` for every completed value whose
+    path matches one. With ``paths=None`` every completed value is yielded.
+    Once the top-level value closes, :attr:`done` is set and :attr:`value`
+    holds the whole document.
+    """
+
+    def __init__(self, paths: Optional[Sequence[str]] = None) -> None:
+        self.patterns = None if paths is None else [tuple(p.split(".")) if p else () for p in paths]
+        self.done = False
+        self.value: Any = None
+        self._parts: list[str] = []
+        self._joined = ""
+        self._length = 0
+        self._stack: list[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._string_is_key = False
+        self._scalar_start = -1
+
+    @property
+    def text(self) -> str:
+        if len(self._joined) != self._length:
+            self._joined = "".join(self._parts)
+            self._parts = [self._joined]
+        return self._joined
+
+    def _wanted(self, path: Path) -> bool:
+        return self.patterns is None or any(_matches(path, p) for p in self.patterns)
+
+    def _complete(self, start: int, end: int) -> Optional[JSONItem]:
+        """A value spanning ``text[start:end]`` finished inside the top frame."""
+        if not self._stack:
+            return None
+        parent = self._stack[-1]
+        if parent.kind == "[":
+            path = parent.path + (parent.index,)
+            parent.index += 1
+        else:
+            path = parent.path + (parent.key or "",)
+        if not self._wanted(path):
+            return None
+        try:
+            return JSONItem(path, json.loads(self.text[start:end]))
+        except ValueError:
+            log.debug("unparseable JSON value in stream", extra={"path": list(path)})
+            return None
+
+    def _child_path(self) -> Path:
+        parent = self._stack[-1]
+        return parent.path + ((parent.index,) if parent.kind == "[" else (parent.key or "",))
+
+    def _end_scalar(self, pos: int) -> Optional[JSONItem]:
+        if self._scalar_start < 0:
+            return None
+        start, self._scalar_start = self._scalar_start, -1
+        return self._complete(start, pos)
+
+    def feed(self, chunk: str) -> Iterator[JSONItem]:
+        """Consume the next piece of the response and yield newly completed values."""
+        if not chunk or self.done:
+            return
+        base = self._length
+        self._parts.append(chunk)
+        self._length += len(chunk)
+        i, n = 0, len(chunk)
+        while i < n and not self.done:
+            if self._in_string:
+                if self._escape:  # the escaped character may start the next chunk
+                    self._escape = False
+                    i += 1
+                    continue
+                m = _STRING_STOP.search(chunk, i)
+                if m is None:
+                    break
+                i = m.start()
+                if chunk[i] == "\\":
+                    self._escape = True
+                    i += 1
+                    continue
+                self._in_string = False
+                pos = base + i
+                if self._string_is_key:
+                    self._stack[-1].key = json.loads(self.text[self._string_start : pos + 1])
+                else:
+                    item = self._complete(self._string_start, pos + 1)
+                    if item is not None:
+                        yield item
+                i += 1
+                continue
+
+            c = chunk[i]
+            pos = base + i
+            if not self._stack:
+                # before the document: skip prose / code fences up to the first container
+                if c in "{[":
+                    self._stack.append(_Frame(c, pos, ()))
+                i += 1
+                continue
+            top = self._stack[-1]
+            if c == '"':
+                self._in_string = True
+                self._string_start = pos
+                self._string_is_key = top.kind == "{" and top.expect_key
+            elif c in "{[":
+                self._stack.append(_Frame(c, pos, self._child_path()))
+            elif c in "}]":
+                item = self._end_scalar(pos)
+                if item is not None:
+                    yield item
+                frame = self._stack.pop()
+                if not self._stack:
+                    self.done = True
+                    try:
+                        self.value = json.loads(self.text[frame.start : pos + 1])
+                    except ValueError as exc:
+                        raise StructuredOutputError(f"invalid JSON: {exc}", self.text) from exc
+                    if self._wanted(()):
+                        yield JSONItem((), self.value)
+                else:
+                    item = self._complete(frame.start, pos + 1)
+                    if item is not None:
+                        yield item
+            elif c == ",":
+                item = self._end_scalar(pos)
+                if item is not None:
+                    yield item
+                if top.kind == "{":
+                    top.expect_key = True
+            elif c == ":":
+                top.expect_key = False
+            elif c not in _WHITESPACE and self._scalar_start < 0:
+                self._scalar_start = pos
+            i += 1
+
+    def close(self) -> Any:
+        """The parsed document; raises :class:`StructuredOutputError` if it never completed."""
+        if not self.done:
+            raise StructuredOutputError("response ended before the JSON value was complete", self.text)
+        return self.value
+
+
+def extract_json(text: str) -> Any:
+    """The first JSON object/array in ``text`` (surrounding prose is ignored)."""
+    parser = IncrementalJSONParser(paths=[])
+    for _ in parser.feed(text):
+        pass
+    if parser.done:
+        return parser.value
+    try:
+        return json.loads(text)
+    except ValueError as exc:
+        raise StructuredOutputError(f"no JSON value in model output: {exc}", text) from exc
+
+
+def parse_structured(text: str, schema: Schema = None) -> Any:
+    """Extract the JSON in ``text`` and validate it into ``schema``."""
+    return validate(extract_json(text), schema, text)
+
+
+__all__ = [
+    "IncrementalJSONParser",
+    "JSONItem",
+    "StructuredOutputError",
+    "extract_json",
+    "parse_structured",
+    "json_schema",
+    "schema_instruction",
+    "validate",
+]
@@ -0,0 +1,252 @@
+"""Incremental checkpointing of :class:`SharedGraphState`.
+
+Each :meth:`Checkpointer.checkpoint` call appends only what changed since the
+previous one (new or modified documents, new findings, critiques and tasks;
+completed task ids; plan/report when replaced) as one JSON line to
+``<workspace_root>/<run_id>/state/journal.jsonl``. Every ``snapshot_every``
+entries the journal is compacted into ``snapshot.json``. Resume loads the
+snapshot and replays the journal entries recorded after it.
+
+Layout::
+
+    runs/<run_id>/state/
+      snapshot.json   # full state as of sequence number "seq"
+      journal.jsonl   # deltas with seq > snapshot seq
+    runs/<run_id>/documents.sqlite   # DocumentStore, if the run uses one
+
+A :class:`~deepr.graph.state.DocumentMap` (the default ``state.documents``)
+tracks which documents were assigned since the last checkpoint, so a
+checkpoint journals exactly those, without scanning the others; reassign
+``documents[doc_id] = doc`` (or ``touch`` it) after mutating one in place.
+Other plain mappings only have new documents journaled. When
+``state.documents`` is a :class:`DocumentStore` the documents are already on
+disk, so checkpoints record only their ids.
+"""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+from ..graph.scheduler import TaskScheduler
+from ..graph.state import DocumentMap, SharedGraphState
+from ..retrieval.doc_store import DocumentStore
+
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, default=str, separators=(",", ":"))
+
+
+class Checkpointer:
+    """Journals one run's state under ``<workspace_root>/<run_id>/state``.
+
+    Use one instance per run: it remembers what it has already written, so
+    :meth:`checkpoint` serializes only new or replaced items. Call
+    :meth:`resume` on a fresh instance to reload a run after a crash.
+    """
+
+    def __init__(self, workspace_root: Path, run_id: str, snapshot_every: int = 50, fsync: bool = False) -> None:
+        self.run_id = run_id
+        self.dir = Path(workspace_root) / run_id / "state"
+        self.journal_path = self.dir / "journal.jsonl"
+        self.snapshot_path = self.dir / "snapshot.json"
+        self.document_store_path = self.dir.parent / "documents.sqlite"
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self._seq = 0
+        self._entries_since_snapshot = 0
+        # what has already been persisted, so each checkpoint writes only the delta
+        self._plan: Optional[str] = None
+        self._report: Optional[str] = None
+        self._doc_ids: set[str] = set()
+        self._n_findings = 0
+        self._n_critiques = 0
+        self._task_ids: set[str] = set()
+        self._done_ids: set[str] = set()
+
+    def exists(self) -> bool:
+        return self.snapshot_path.exists() or self.journal_path.exists()
+
+    def open_document_store(self, hot_size: int = 64) -> DocumentStore:
+        """The run's out-of-core document store, for use as ``state.documents``."""
+        return DocumentStore(self.document_store_path, hot_size=hot_size)
+
+    # -- writing -----------------------------------------------------------
+
+    def _delta(self, state: SharedGraphState) -> dict[str, Any]:
+        delta: dict[str, Any] = {}
+        plan = _dumps(state.plan)
+        if plan != self._plan:
+            delta["plan"] = state.plan
+        report = _dumps(state.report)
+        if report != self._report:
+            delta["report"] = state.report
+        doc_ids = state.documents.keys()
+        added = [d for d in doc_ids if d not in self._doc_ids]
+        if added and isinstance(state.documents, DocumentStore):
+            delta["documents_stored"] = added
+        elif isinstance(state.documents, DocumentMap) and state.documents.dirty:
+            dirty = state.documents.dirty
+            delta["documents"] = {d: state.documents[d] for d in doc_ids if d in dirty or d not in self._doc_ids}
+        elif added:
+            delta["documents"] = {d: state.documents[d] for d in added}
+        if len(self._doc_ids) + len(added) != len(doc_ids):
+            delta["documents_removed"] = sorted(self._doc_ids - set(doc_ids))
+        for name, seen in (("findings", self._n_findings), ("critiques", self._n_critiques)):
+            items = getattr(state, name)
+            if len(items) < seen:
+                delta[name + "_reset"] = items
+            elif len(items) > seen:
+                delta[name] = items[seen:]
+        new_tasks = [t for t in state.tasks.pending() if str(t["id"]) not in self._task_ids]
+        if new_tasks:
+            delta["tasks"] = new_tasks
+        done = [t for t in state.tasks.completed_ids() if t not in self._done_ids]
+        if done:
+            delta["tasks_done"] = done
+        return delta
+
+    def _mark_persisted(self, state: SharedGraphState) -> None:
+        self._plan = _dumps(state.plan)
+        self._report = _dumps(state.report)
+        self._doc_ids = set(state.documents.keys())
+        if isinstance(state.documents, DocumentMap):
+            state.documents.dirty.clear()
+        self._n_findings = len(state.findings)
+        self._n_critiques = len(state.critiques)
+        self._task_ids.update(str(t["id"]) for t in state.tasks.pending())
+        self._done_ids = set(state.tasks.completed_ids())
+
+    def checkpoint(self, state: SharedGraphState) -> bool:
+        """Append the changes since the last checkpoint; returns False if nothing changed."""
+        delta = self._delta(state)
+        if not delta:
+            return False
+        self._seq += 1
+        delta["seq"] = self._seq
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with open(self.journal_path, "a", encoding="utf-8") as fh:
+            fh.write(_dumps(delta) + "\n")
+            if self.fsync:
+                fh.flush()
+                os.fsync(fh.fileno())
+        self._mark_persisted(state)
+        self._entries_since_snapshot += 1
+        if self.snapshot_every and self._entries_since_snapshot >= self.snapshot_every:
+            self.compact(state)
+        return True
+
+    def compact(self, state: SharedGraphState) -> None:
+        """Write a full snapshot of ``state`` and truncate the journal."""
+        if isinstance(state.documents, DocumentStore):
+            docs: dict[str, Any] = {"documents_stored": list(state.documents)}
+        else:
+            docs = {"documents": dict(state.documents.items())}
+        snapshot = {
+            "run_id": state.run_id,
+            "seq": self._seq,
+            "plan": state.plan,
+            "report": state.report,
+            **docs,
+            "findings": state.findings,
+            "critiques": state.critiques,
+            "tasks": state.tasks.pending(),
+            "tasks_done": state.tasks.completed_ids(),
+        }
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.snapshot_path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(_dumps(snapshot))
+            fh.flush()
+            if self.fsync:
+                os.fsync(fh.fileno())
+        tmp.replace(self.snapshot_path)
+        # entries up to seq are now in the snapshot; replay skips them even if
+        # the truncate below is lost to a crash
+        with open(self.journal_path, "w", encoding="utf-8"):
+            pass
+        self._mark_persisted(state)
+        self._entries_since_snapshot = 0
+
+    # -- reading -----------------------------------------------------------
+
+    def _journal_entries(self) -> list[dict[str, Any]]:
+        if not self.journal_path.exists():
+            return []
+        entries: list[dict[str, Any]] = []
+        with open(self.journal_path, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    break  # torn final write from a crash
+        return entries
+
+    def resume(self) -> SharedGraphState:
+        """Rebuild the latest checkpointed state and continue journaling after it."""
+        snap: dict[str, Any] = {}
+        if self.snapshot_path.exists():
+            snap = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+        seq = int(snap.get("seq", 0))
+        plan = snap.get("plan")
+        report = snap.get("report")
+        documents: dict[str, Any] = dict(snap.get("documents") or {})
+        stored: dict[str, None] = dict.fromkeys(snap.get("documents_stored") or ())
+        findings: list[Any] = list(snap.get("findings") or [])
+        critiques: list[Any] = list(snap.get("critiques") or [])
+        tasks: dict[str, dict[str, Any]] = {str(t["id"]): t for t in snap.get("tasks") or []}
+        done: set[str] = set(snap.get("tasks_done") or [])
+
+        entries = [e for e in self._journal_entries() if int(e.get("seq", 0)) > seq]
+        for e in entries:
+            seq = int(e["seq"])
+            if "plan" in e:
+                plan = e["plan"]
+            if "report" in e:
+                report = e["report"]
+            documents.update(e.get("documents") or {})
+            stored.update(dict.fromkeys(e.get("documents_stored") or ()))
+            for d in e.get("documents_removed") or ():
+                documents.pop(d, None)
+                stored.pop(d, None)
+            for name, items in (("findings", findings), ("critiques", critiques)):
+                if name + "_reset" in e:
+                    items[:] = e[name + "_reset"]
+                items.extend(e.get(name) or ())
+            for t in e.get("tasks") or ():
+                tasks[str(t["id"])] = t
+            done.update(e.get("tasks_done") or ())
+
+        scheduler = TaskScheduler()
+        for task_id in sorted(done):
+            scheduler.complete(task_id)
+        for task_id, task in tasks.items():
+            if task_id not in done:
+                scheduler.add(task)
+
+        doc_map: Any = DocumentMap(documents)
+        if stored or self.document_store_path.exists():
+            doc_map = self.open_document_store()
+            # drop documents the last checkpoint did not record (removed, or added after it)
+            for d in [d for d in doc_map if d not in stored and d not in documents]:
+                del doc_map[d]
+            for d, doc in documents.items():
+                doc_map[d] = doc
+
+        state = SharedGraphState(
+            run_id=snap.get("run_id", self.run_id),
+            plan=plan,
+            tasks=scheduler,
+            documents=doc_map,
+            findings=findings,
+            critiques=critiques,
+            report=report,
+        )
+        self._seq = seq
+        self._entries_since_snapshot = len(entries)
+        self._mark_persisted(state)
+        return state
+
+
+__all__ = ["Checkpointer"]
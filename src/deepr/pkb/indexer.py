@@ -0,0 +1,258 @@
+"""Incremental indexer for the personal knowledge base (``PKBConfig.paths``).
+
+Each run walks the configured paths and compares every file's mtime and size
+with ``manifest.json``; files whose stat is unchanged are skipped without
+being read. The rest are read, hashed and chunked in a process pool — a file
+whose content hash still matches is only re-stamped — and the chunks of
+changed files are embedded in batches and streamed into the PKB
+:class:`VectorStore` as workers finish. Chunks of deleted files are removed.
+
+Embedding stays in the parent process so the model is loaded once; the
+embedding cache makes re-embedding identical chunks free anyway.
+
+Replaced chunks leave tombstones in the store; once they make up
+``compact_ratio`` of its rows the store is compacted. From ``ivf_threshold``
+chunks on, the IVF index is (re)built whenever more than ``reindex_ratio`` of
+the chunks are not covered by it. Otherwise new chunks are appended to the
+saved vectors in place.
+
+Layout (``index_dir``, by default ``cache_dir/pkb``)::
+
+    manifest.json   {path: {"mtime_ns", "size", "sha256", "chunks"}}
+    vectors/        VectorStore
+"""
+from __future__ import annotations
+
+import concurrent.futures as cf
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional, Sequence
+
+from ..config.settings import DeepRSettings
+from ..ingestion.chunking import Chunker, estimator_for
+from ..models.embedding_provider import EmbeddingProvider
+from ..retrieval.vector_store import VectorStore
+
+log = logging.getLogger(__name__)
+
+DEFAULT_EXTENSIONS = (".md", ".markdown", ".txt", ".rst")
+
+# below this many changed files the process pool costs more than it saves
+_INLINE_FILES = 8
+
+
+@dataclass
+class IndexStats:
+    scanned: int = 0
+    unchanged: int = 0
+    updated: int = 0
+    removed: int = 0
+    chunks_added: int = 0
+    seconds: float = 0.0
+
+
+def _process_file(path: str, chunker: Chunker, known_sha: Optional[str]) -> tuple[str, str, Optional[list[str]]]:
+    """Read, hash and (if the content changed) chunk one file. Runs in a worker."""
+    with open(path, "rb") as fh:
+        data = fh.read()
+    sha = hashlib.sha256(data).hexdigest()
+    if sha == known_sha:
+        return path, sha, None
+    return path, sha, chunker.chunks(data.decode("utf-8", errors="replace"))
+
+
+class PKBIndexer:
+    def __init__(
+        self,
+        paths: Sequence[Path],
+        embedder: EmbeddingProvider,
+        index_dir: Path,
+        extensions: Iterable[str] = DEFAULT_EXTENSIONS,
+        max_workers: Optional[int] = None,
+        chunker: Optional[Chunker] = None,
+        embed_flush: int = 256,
+        compact_ratio: float = 0.25,
+        ivf_threshold: int = 50_000,
+        reindex_ratio: float = 0.2,
+    ) -> None:
+        self.paths = [Path(p) for p in paths]
+        self.embedder = embedder
+        self.index_dir = Path(index_dir)
+        self.extensions = tuple(e.lower() for e in extensions)
+        self.max_workers = max_workers
+        self.chunker = chunker or Chunker(256, 32, "sentence", estimator_for(embedder.name))
+        self.embed_flush = embed_flush
+        self.compact_ratio = compact_ratio
+        self.reindex_ratio = reindex_ratio
+        self.manifest_path = self.index_dir / "manifest.json"
+        self.store_path = self.index_dir / "vectors"
+        self.manifest: dict[str, dict[str, Any]] = self._load_manifest()
+        if (self.store_path / "ids.json").exists():
+            self.store = VectorStore.load(self.store_path, ivf_threshold=ivf_threshold)
+        else:
+            self.store = VectorStore(embedder.dim, path=self.store_path, ivf_threshold=ivf_threshold)
+
+    @classmethod
+    def from_settings(cls, settings: DeepRSettings, embedder: Optional[EmbeddingProvider] = None, **kwargs: Any) -> "PKBIndexer":
+        if embedder is None:
+            from ..agents.provider_selector import get_embedding_provider
+
+            embedder = get_embedding_provider(settings)
+        return cls(settings.pkb.paths, embedder, settings.cache_dir / "pkb", **kwargs)
+
+    def _load_manifest(self) -> dict[str, dict[str, Any]]:
+        try:
+            raw = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except Exception:
+            return {}
+        return raw if isinstance(raw, dict) else {}
+
+    def _maintain(self) -> None:
+        """Rebuild the IVF index or drop tombstones once enough have accumulated."""
+        store = self.store
+        if len(store) >= store.ivf_threshold and store.unindexed > self.reindex_ratio * len(store):
+            log.info("rebuilding pkb ivf index", extra={"rows": len(store), "unindexed": store.unindexed})
+            store.build_index()  # compacts as well
+        elif store.tombstones and store.tombstones >= self.compact_ratio * (len(store) + store.tombstones):
+            log.info("compacting pkb vectors", extra={"rows": len(store), "tombstones": store.tombstones})
+            store.compact()
+
+    def _save(self) -> None:
+        self.store.save(self.store_path)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(self.manifest), encoding="utf-8")
+        tmp.replace(self.manifest_path)
+
+    def _walk(self) -> Iterator[os.DirEntry[str] | Path]:
+        stack = []
+        for root in self.paths:
+            if root.is_file():
+                yield root
+            elif root.is_dir():
+                stack.append(str(root))
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not entry.name.startswith("."):
+                                stack.append(entry.path)
+                        elif entry.is_file() and entry.name.lower().endswith(self.extensions):
+                            yield entry
+            except OSError as exc:
+                log.warning("cannot scan PKB directory", extra={"error": str(exc)})
+
+    def _changed(self, stats: IndexStats) -> tuple[list[tuple[str, os.stat_result]], set[str]]:
+        changed: list[tuple[str, os.stat_result]] = []
+        seen: set[str] = set()
+        for entry in self._walk():
+            path = str(Path(entry).resolve()) if isinstance(entry, Path) else os.path.abspath(entry.path)
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            seen.add(path)
+            stats.scanned += 1
+            known = self.manifest.get(path)
+            if known and known.get("mtime_ns") == st.st_mtime_ns and known.get("size") == st.st_size:
+                stats.unchanged += 1
+            else:
+                changed.append((path, st))
+        return changed, seen
+
+    def _results(self, changed: list[tuple[str, os.stat_result]]) -> Iterator[tuple[str, str, Optional[list[str]]]]:
+        args = [(p, self.chunker, (self.manifest.get(p) or {}).get("sha256")) for p, _ in changed]
+        if len(args) <= _INLINE_FILES or self.max_workers == 1:
+            for a in args:
+                try:
+                    yield _process_file(*a)
+                except OSError as exc:
+                    log.warning("cannot read PKB file", extra={"path": a[0], "error": str(exc)})
+            return
+        workers = self.max_workers or os.cpu_count() or 1
+        with cf.ProcessPoolExecutor(max_workers=workers) as pool:
+            window = 4 * workers  # bound in-flight work (and held results)
+            pending: dict[cf.Future[Any], str] = {}
+            todo = iter(args)
+            while True:
+                for a in todo:
+                    pending[pool.submit(_process_file, *a)] = a[0]
+                    if len(pending) >= window:
+                        break
+                if not pending:
+                    return
+                done, _ = cf.wait(pending, return_when=cf.FIRST_COMPLETED)
+                for fut in done:
+                    path = pending.pop(fut)
+                    try:
+                        yield fut.result()
+                    except OSError as exc:
+                        log.warning("cannot read PKB file", extra={"path": path, "error": str(exc)})
+
+    def _drop(self, path: str) -> None:
+        entry = self.manifest.pop(path, None)
+        if entry:
+            self.store.delete([f"{path}#{i}" for i in range(int(entry.get("chunks", 0)))])
+
+    def index(self) -> IndexStats:
+        """Bring the index up to date with the files under ``paths``."""
+        t0 = time.perf_counter()
+        stats = IndexStats()
+        changed, seen = self._changed(stats)
+        for path in [p for p in self.manifest if p not in seen]:
+            self._drop(path)
+            stats.removed += 1
+
+        stat_of = dict(changed)
+        ids: list[str] = []
+        texts: list[str] = []
+
+        def flush() -> None:
+            if texts:
+                self.store.add(ids, self.embedder.embed(texts))
+                stats.chunks_added += len(texts)
+                ids.clear()
+                texts.clear()
+
+        for path, sha, chunks in self._results(changed):
+            st = stat_of[path]
+            if chunks is None:  # touched but identical content
+                self.manifest[path].update(mtime_ns=st.st_mtime_ns, size=st.st_size)
+                stats.unchanged += 1
+                continue
+            self._drop(path)
+            for i, chunk in enumerate(chunks):
+                ids.append(f"{path}#{i}")
+                texts.append(chunk)
+            self.manifest[path] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": sha, "chunks": len(chunks)}
+            stats.updated += 1
+            if len(texts) >= self.embed_flush:
+                flush()
+        flush()
+
+        if stats.updated or stats.removed or changed:
+            self._maintain()
+            self._save()
+        stats.seconds = time.perf_counter() - t0
+        log.info("pkb indexed", extra={"pkb": vars(stats)})
+        return stats
+
+    def search(self, query: str, k: int = 10) -> list[tuple[str, float]]:
+        """Top-``k`` ``("<path>#<chunk>", score)`` hits for ``query``."""
+        return self.store.search(self.embedder.embed_one(query), k)
+
+
+def auto_index(settings: DeepRSettings) -> Optional[IndexStats]:
+    """Run the PKB indexer if ``pkb.auto_index`` is set and paths are configured."""
+    if not (settings.pkb.auto_index and settings.pkb.paths):
+        return None
+    return PKBIndexer.from_settings(settings).index()
+
+
+__all__ = ["PKBIndexer", "IndexStats", "auto_index", "DEFAULT_EXTENSIONS"]
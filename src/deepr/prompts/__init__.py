@@ -1 +1,2 @@
-from .open_deep_research_prompts import *  # noqa: F401,F403
\ No newline at end of file
+from .open_deep_research_prompts import *  # noqa: F401,F403
+from .schemas import *  # noqa: F401,F403
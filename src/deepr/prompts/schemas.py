@@ -0,0 +1,81 @@
+"""Pydantic models for the JSON each agent prompt asks for.
+
+Pass them as ``schema`` to :meth:`~deepr.models.llm_provider.ModelProvider.generate_json`
+or ``astream_json``. Unknown fields are ignored and list fields default to
+empty, so a model that omits an optional part still validates.
+"""
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from pydantic import BaseModel, Field, field_validator
+
+
+class PlanTask(BaseModel):
+    id: str
+    description: str
+
+
+class PlanPhase(BaseModel):
+    name: str
+    goals: list[str] = Field(default_factory=list)
+    tasks: list[PlanTask] = Field(default_factory=list)
+
+
+class PlannerOutput(BaseModel):
+    phases: list[PlanPhase]
+
+
+class ToolAction(BaseModel):
+    tool: str
+    input: dict[str, Any] = Field(default_factory=dict)
+
+
+class ResearcherOutput(BaseModel):
+    task_id: Optional[str] = None
+    actions: list[ToolAction] = Field(default_factory=list)
+    notes: list[str] = Field(default_factory=list)
+
+
+class FindingPoint(BaseModel):
+    text: str
+    sources: list[str] = Field(default_factory=list)
+
+
+class MergedFinding(BaseModel):
+    theme: str
+    points: list[FindingPoint] = Field(default_factory=list)
+
+
+class SynthesizerOutput(BaseModel):
+    merged_findings: list[MergedFinding] = Field(default_factory=list)
+
+
+class NewTask(BaseModel):
+    description: str
+
+
+class CriticOutput(BaseModel):
+    coverage: float = 0.0  # percent
+    issues: list[str] = Field(default_factory=list)
+    new_tasks: list[NewTask] = Field(default_factory=list)
+
+    @field_validator("coverage", mode="before")
+    @classmethod
+    def _percent(cls, value: Any) -> Any:
+        # models often answer "80%"
+        return value.strip().rstrip("%") if isinstance(value, str) else value
+
+
+__all__ = [
+    "PlannerOutput",
+    "PlanPhase",
+    "PlanTask",
+    "ResearcherOutput",
+    "ToolAction",
+    "SynthesizerOutput",
+    "MergedFinding",
+    "FindingPoint",
+    "CriticOutput",
+    "NewTask",
+]
@@ -0,0 +1,123 @@
+"""Out-of-core document store for ``SharedGraphState.documents``.
+
+Fetched pages are mostly raw text. :class:`DocumentStore` keeps only each
+document's metadata (everything but ``body_fields``) in memory and spills the
+bodies to a SQLite file under the run workspace. Full documents are loaded
+lazily on access and a small LRU keeps recently used ones hot.
+
+It is a ``MutableMapping[str, dict]``, so it drops in where a plain dict was
+used. Documents returned from the store are copies once evicted from the hot
+set: reassign ``store[doc_id] = doc`` after mutating one to persist the change.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+Document = dict[str, Any]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id TEXT PRIMARY KEY,
+    meta TEXT NOT NULL,
+    body TEXT NOT NULL
+)
+"""
+
+# keys treated as bulky content and kept on disk
+BODY_FIELDS = ("text", "content", "raw", "html", "markdown")
+
+
+class DocumentStore(MutableMapping):
+    """SQLite-backed mapping of document id to document dict.
+
+    ``hot_size`` bounds how many full documents are cached in memory.
+    Reopening an existing ``path`` restores the stored documents. Safe to
+    share between threads.
+    """
+
+    def __init__(self, path: Path, hot_size: int = 64, body_fields: tuple[str, ...] = BODY_FIELDS) -> None:
+        self.path = Path(path)
+        self.hot_size = hot_size
+        self.body_fields = tuple(body_fields)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(_SCHEMA)
+        self._meta: dict[str, Document] = {
+            doc_id: json.loads(meta) for doc_id, meta in self._db.execute("SELECT id, meta FROM documents ORDER BY rowid")
+        }
+        self._hot: OrderedDict[str, Document] = OrderedDict()
+
+    def _split(self, doc: Document) -> tuple[Document, Document]:
+        meta = {k: v for k, v in doc.items() if k not in self.body_fields}
+        body = {k: v for k, v in doc.items() if k in self.body_fields}
+        return meta, body
+
+    def _touch(self, doc_id: str, doc: Document) -> None:
+        self._hot[doc_id] = doc
+        self._hot.move_to_end(doc_id)
+        while len(self._hot) > self.hot_size:
+            self._hot.popitem(last=False)
+
+    def __getitem__(self, doc_id: str) -> Document:
+        with self._lock:
+            doc = self._hot.get(doc_id)
+            if doc is not None:
+                self._hot.move_to_end(doc_id)
+                return doc
+            if doc_id not in self._meta:
+                raise KeyError(doc_id)
+            row = self._db.execute("SELECT body FROM documents WHERE id = ?", (doc_id,)).fetchone()
+            doc = {**self._meta[doc_id], **json.loads(row[0])}
+            self._touch(doc_id, doc)
+            return doc
+
+    def __setitem__(self, doc_id: str, doc: Document) -> None:
+        meta, body = self._split(doc)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO documents (id, meta, body) VALUES (?, ?, ?)",
+                (doc_id, json.dumps(meta, default=str), json.dumps(body, default=str)),
+            )
+            self._meta[doc_id] = meta
+            self._touch(doc_id, doc)
+
+    def __delitem__(self, doc_id: str) -> None:
+        with self._lock:
+            if doc_id not in self._meta:
+                raise KeyError(doc_id)
+            self._db.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+            del self._meta[doc_id]
+            self._hot.pop(doc_id, None)
+
+    def __contains__(self, doc_id: object) -> bool:
+        return doc_id in self._meta
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._meta))
+
+    def __len__(self) -> int:
+        return len(self._meta)
+
+    def meta(self, doc_id: str) -> Document:
+        """Metadata of ``doc_id`` without loading its body."""
+        return self._meta[doc_id]
+
+    def get_meta(self, doc_id: str, default: Optional[Document] = None) -> Optional[Document]:
+        return self._meta.get(doc_id, default)
+
+    def close(self) -> None:
+        with self._lock:
+            self._hot.clear()
+            self._db.close()
+
+
+__all__ = ["DocumentStore", "BODY_FIELDS"]
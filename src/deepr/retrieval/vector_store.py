@@ -0,0 +1,331 @@
+"""In-process vector index with exact and IVF approximate cosine search.
+
+Vectors are L2-normalized on insert, so cosine similarity is a dot product.
+Small collections are searched exactly with one matmul over all rows. Once a
+collection passes ``ivf_threshold`` rows and :meth:`VectorStore.build_index`
+has run, searches use an inverted-file (IVF) index: rows are clustered with
+k-means and stored grouped by cluster, so a query scores the centroids, then
+only the contiguous row ranges of the ``n_probe`` closest clusters. Rows added
+after the index was built are searched exactly until the next rebuild.
+
+Deletes are tombstones; :meth:`VectorStore.compact` drops them. A store saved
+with :meth:`VectorStore.save` is reopened with the vectors memory-mapped, so
+large PKB indexes load without reading them into memory. Rows added to a
+reopened store are appended to ``vectors.npy`` in place (the file grows by
+doubling), so an incremental update neither copies the existing vectors into
+memory nor rewrites them on save.
+
+Layout of a saved store (``path`` is a directory, e.g. under ``cache_dir``)::
+
+    vectors.npy    float32 (capacity, dim); rows past len(ids) are unused
+    alive.npy      bool (n,)
+    ids.json       {"dim": ..., "ids": [...]}
+    ivf.npz        centroids, offsets, indexed row count (if built)
+"""
+from __future__ import annotations
+
+import io
+import json
+import math
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+
+def _numpy() -> Any:
+    try:
+        import numpy
+    except Exception as exc:  # pragma: no cover - import-time failure
+        raise RuntimeError("numpy is required for VectorStore") from exc
+    return numpy
+
+
+class VectorStore:
+    """Cosine top-k index over string ids.
+
+    ``path`` is where :meth:`save` writes; ``ivf_threshold`` is the size from
+    which an IVF index (if built) replaces exact search.
+    """
+
+    def __init__(self, dim: int, path: Optional[Path] = None, ivf_threshold: int = 50_000, n_probe: int = 8) -> None:
+        np = _numpy()
+        self.dim = dim
+        self.path = Path(path) if path is not None else None
+        self.ivf_threshold = ivf_threshold
+        self.n_probe = n_probe
+        self._vecs: Any = np.empty((0, dim), dtype=np.float32)
+        self._alive: Any = np.empty(0, dtype=bool)
+        self._n = 0
+        self._ids: list[str] = []
+        self._rows: dict[str, int] = {}
+        # IVF: rows [0, _indexed) are grouped by cluster; cluster c is rows offsets[c]:offsets[c+1]
+        self._centroids: Any = None
+        self._offsets: Any = None
+        self._indexed = 0
+
+    # -- storage -------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, item_id: object) -> bool:
+        return item_id in self._rows
+
+    def _normalize(self, vectors: Any) -> Any:
+        np = _numpy()
+        v = np.array(vectors, dtype=np.float32, ndmin=2, copy=True)
+        if v.shape[1] != self.dim:
+            raise ValueError(f"expected vectors of dim {self.dim}, got {v.shape[1]}")
+        norms = np.linalg.norm(v, axis=1, keepdims=True)
+        np.divide(v, norms, out=v, where=norms > 0)
+        return v
+
+    @property
+    def tombstones(self) -> int:
+        """Deleted rows still taking space until :meth:`compact`."""
+        return self._n - len(self._rows)
+
+    @property
+    def unindexed(self) -> int:
+        """Rows the IVF index does not cover (all of them if it is not built)."""
+        return self._n - self._indexed
+
+    def _mapped_file(self, path: Optional[Path] = None) -> bool:
+        """Whether the vectors are memory-mapped from ``path``'s (default: own) ``vectors.npy``."""
+        np = _numpy()
+        path = path or self.path
+        if path is None or not isinstance(self._vecs, np.memmap) or self._vecs.filename is None:
+            return False
+        return Path(self._vecs.filename).resolve() == (Path(path) / "vectors.npy").resolve()
+
+    def _grow_mapped(self, rows: int) -> Any:
+        """Extend the mapped ``vectors.npy`` to ``rows`` rows in place; None if it cannot be."""
+        np = _numpy()
+        fmt = np.lib.format
+        if not self._mapped_file():
+            return None
+        filename = self._vecs.filename
+        with open(filename, "r+b") as fh:
+            if fmt.read_magic(fh) != (1, 0):
+                return None
+            shape, fortran_order, dtype = fmt.read_array_header_1_0(fh)
+            offset = fh.tell()
+            if fortran_order or dtype != np.float32 or len(shape) != 2:
+                return None
+            header = io.BytesIO()
+            fmt.write_array_header_1_0(header, {"descr": fmt.dtype_to_descr(dtype), "fortran_order": False, "shape": (rows, self.dim)})
+            if header.tell() != offset:  # the new shape does not fit the header's padding
+                return None
+            # rows past len(ids) are ignored on load, so a crash after this is harmless
+            fh.seek(0)
+            fh.write(header.getvalue())
+            fh.truncate(offset + rows * self.dim * np.dtype(np.float32).itemsize)
+        return np.memmap(filename, dtype=np.float32, mode="r+", offset=offset, shape=(rows, self.dim))
+
+    def _reserve(self, extra: int) -> None:
+        np = _numpy()
+        need = self._n + extra
+        writable = not isinstance(self._vecs, np.memmap) or self._vecs.mode == "r+"
+        if need <= len(self._vecs) and writable:
+            return
+        # a read-only map with spare rows only needs reopening writable
+        cap = len(self._vecs) if need <= len(self._vecs) else max(need, 2 * len(self._vecs), 1024)
+        alive = np.zeros(cap, dtype=bool)
+        alive[: self._n] = self._alive[: self._n]
+        grown = self._grow_mapped(cap)
+        if grown is not None:
+            self._vecs, self._alive = grown, alive
+            return
+        vecs = np.empty((cap, self.dim), dtype=np.float32)
+        vecs[: self._n] = self._vecs[: self._n]
+        self._vecs, self._alive = vecs, alive
+
+    def add(self, ids: Sequence[str], vectors: Any) -> None:
+        """Insert vectors; an existing id is replaced."""
+        v = self._normalize(vectors)
+        if len(ids) != len(v):
+            raise ValueError("ids and vectors differ in length")
+        self.delete([i for i in ids if i in self._rows])
+        self._reserve(len(v))
+        start = self._n
+        self._vecs[start : start + len(v)] = v
+        self._alive[start : start + len(v)] = True
+        for offset, item_id in enumerate(ids):
+            self._rows[item_id] = start + offset
+        self._ids.extend(ids)
+        self._n += len(v)
+
+    def delete(self, ids: Sequence[str]) -> int:
+        removed = 0
+        for item_id in ids:
+            row = self._rows.pop(item_id, None)
+            if row is None:
+                continue
+            self._alive[row] = False
+            removed += 1
+        return removed
+
+    def compact(self) -> None:
+        """Drop deleted rows (keeps the IVF grouping of the remaining rows)."""
+        np = _numpy()
+        alive = self._alive[: self._n]
+        if alive.all():
+            return
+        keep = np.flatnonzero(alive)
+        if self._offsets is not None:
+            indexed_alive = alive[: self._indexed]
+            labels = np.repeat(np.arange(len(self._centroids)), np.diff(self._offsets))
+            counts = np.bincount(labels[indexed_alive], minlength=len(self._centroids))
+            self._offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+            self._indexed = int(indexed_alive.sum())
+        self._vecs = np.ascontiguousarray(self._vecs[keep])
+        self._alive = np.ones(len(keep), dtype=bool)
+        self._ids = [self._ids[i] for i in keep]
+        self._rows = {item_id: row for row, item_id in enumerate(self._ids)}
+        self._n = len(keep)
+
+    # -- IVF -----------------------------------------------------------------
+
+    @property
+    def indexed(self) -> bool:
+        return self._centroids is not None
+
+    def build_index(self, n_lists: Optional[int] = None, iterations: int = 10, sample: int = 256, seed: int = 0) -> None:
+        """Cluster the live rows with k-means and regroup storage by cluster.
+
+        ``n_lists`` defaults to ~sqrt(n). k-means is trained on at most
+        ``sample`` rows per list; assignment covers every row.
+        """
+        np = _numpy()
+        self.compact()
+        n = self._n
+        if n == 0:
+            return
+        n_lists = max(1, min(n, n_lists or int(math.sqrt(n))))
+        rng = np.random.default_rng(seed)
+        vecs = self._vecs[:n]
+        train = vecs[rng.choice(n, size=min(n, n_lists * sample), replace=False)]
+        centroids = train[rng.choice(len(train), size=n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assign = self._assign(train, centroids)
+            counts = np.bincount(assign, minlength=n_lists)
+            nonempty = counts > 0
+            starts = np.cumsum(counts) - counts
+            grouped = train[np.argsort(assign, kind="stable")]
+            centroids[nonempty] = np.add.reduceat(grouped, starts[nonempty], axis=0)
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            np.divide(centroids, norms, out=centroids, where=norms > 0)
+
+        assign = self._assign(vecs, centroids)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=n_lists)
+        self._vecs = np.ascontiguousarray(vecs[order])
+        self._alive = np.ones(n, dtype=bool)
+        self._ids = [self._ids[i] for i in order]
+        self._rows = {item_id: row for row, item_id in enumerate(self._ids)}
+        self._centroids = centroids
+        self._offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self._indexed = n
+
+    @staticmethod
+    def _assign(vecs: Any, centroids: Any, block: int = 65536) -> Any:
+        np = _numpy()
+        out = np.empty(len(vecs), dtype=np.int64)
+        for start in range(0, len(vecs), block):
+            out[start : start + block] = np.argmax(vecs[start : start + block] @ centroids.T, axis=1)
+        return out
+
+    # -- search --------------------------------------------------------------
+
+    def _top_k(self, scores: Any, rows: Any, k: int) -> list[tuple[str, float]]:
+        np = _numpy()
+        live = self._alive[rows]
+        scores, rows = scores[live], rows[live]
+        if len(scores) > k:
+            part = np.argpartition(-scores, k - 1)[:k]
+            scores, rows = scores[part], rows[part]
+        best = np.argsort(-scores, kind="stable")
+        return [(self._ids[rows[i]], float(scores[i])) for i in best]
+
+    def search(self, query: Any, k: int = 10, exact: Optional[bool] = None, n_probe: Optional[int] = None) -> list[tuple[str, float]]:
+        """Top-``k`` ``(id, cosine)`` pairs, best first.
+
+        Uses the IVF index when built and the store has at least
+        ``ivf_threshold`` rows, unless ``exact`` says otherwise.
+        """
+        np = _numpy()
+        if self._n == 0 or k <= 0:
+            return []
+        q = self._normalize(query)[0]
+        use_ivf = self.indexed and (exact is False or (exact is None and self._n >= self.ivf_threshold))
+        if not use_ivf:
+            rows = np.arange(self._n)
+            return self._top_k(self._vecs[: self._n] @ q, rows, k)
+        n_probe = min(n_probe or self.n_probe, len(self._centroids))
+        lists = np.argpartition(-(self._centroids @ q), n_probe - 1)[:n_probe]
+        ranges = [np.arange(self._offsets[c], self._offsets[c + 1]) for c in lists]
+        ranges.append(np.arange(self._indexed, self._n))  # rows added since the build
+        rows = np.concatenate(ranges)
+        # lists are contiguous, so score them as slices rather than gathering rows
+        scores = np.concatenate(
+            [self._vecs[self._offsets[c] : self._offsets[c + 1]] @ q for c in lists]
+            + [self._vecs[self._indexed : self._n] @ q]
+        )
+        return self._top_k(scores, rows, k)
+
+    def search_many(self, queries: Any, k: int = 10, **kwargs: Any) -> list[list[tuple[str, float]]]:
+        return [self.search(q, k, **kwargs) for q in self._normalize(queries)]
+
+    # -- persistence ---------------------------------------------------------
+
+    def save(self, path: Optional[Path] = None) -> Path:
+        np = _numpy()
+        path = Path(path or self.path or "")
+        if not str(path):
+            raise ValueError("VectorStore.save needs a path")
+        path.mkdir(parents=True, exist_ok=True)
+        arrays = [("alive.npy", self._alive[: self._n])]
+        if self._mapped_file(path):
+            # saved rows are untouched and new ones were written into the file directly
+            if self._vecs.mode == "r+":
+                self._vecs.flush()
+        else:
+            arrays.insert(0, ("vectors.npy", self._vecs[: self._n]))
+        for name, arr in arrays:
+            tmp = path / (name + ".tmp")
+            with open(tmp, "wb") as fh:
+                np.save(fh, np.ascontiguousarray(arr))
+            tmp.replace(path / name)
+        tmp = path / "ids.json.tmp"
+        tmp.write_text(json.dumps({"dim": self.dim, "ids": self._ids}), encoding="utf-8")
+        tmp.replace(path / "ids.json")
+        ivf = path / "ivf.npz"
+        if self.indexed:
+            with open(path / "ivf.npz.tmp", "wb") as fh:
+                np.savez(fh, centroids=self._centroids, offsets=self._offsets, indexed=np.int64(self._indexed))
+            (path / "ivf.npz.tmp").replace(ivf)
+        elif ivf.exists():
+            ivf.unlink()
+        self.path = path
+        return path
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True, **kwargs: Any) -> "VectorStore":
+        """Open a saved store; with ``mmap`` the vectors stay on disk until modified."""
+        np = _numpy()
+        path = Path(path)
+        meta = json.loads((path / "ids.json").read_text(encoding="utf-8"))
+        store = cls(int(meta["dim"]), path=path, **kwargs)
+        store._vecs = np.load(path / "vectors.npy", mmap_mode="r" if mmap else None)
+        store._alive = np.load(path / "alive.npy")
+        store._ids = list(meta["ids"])
+        store._n = len(store._ids)
+        store._rows = {item_id: row for row, item_id in enumerate(store._ids) if store._alive[row]}
+        if (path / "ivf.npz").exists():
+            with np.load(path / "ivf.npz") as ivf:
+                store._centroids = ivf["centroids"]
+                store._offsets = ivf["offsets"]
+                store._indexed = int(ivf["indexed"])
+        return store
+
+
+__all__ = ["VectorStore"]
@@ -9,6 +9,7 @@ class ToolResult(BaseModel):
     ok: bool = True
     data: Any | None = None
     error: str | None = None
+    partial: bool = False  # some sources failed or were cut off; cached only briefly
 
 class BaseTool(Protocol):
     name: str
@@ -0,0 +1,154 @@
+"""Result cache and single-flight deduplication for tools.
+
+:class:`CachedTool` wraps any :class:`BaseTool`. Results are stored in a
+:class:`~deepr.utils.disk_cache.DiskCache` under a key made of the tool name
+and the canonical JSON of its validated :class:`ToolInput`, so identical calls
+across tasks and runs hit the cache. Concurrent identical calls that miss the
+cache share one underlying ``run`` (single-flight), so a parallel fan-out never
+fetches the same URL twice. Only successful results are cached by default,
+and results marked ``partial`` only for ``partial_ttl`` seconds.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Mapping, Optional
+
+from ..config.settings import DeepRSettings
+from ..utils.disk_cache import NEVER_EXPIRE, DiskCache
+from .base import BaseTool, ToolInput, ToolRegistry, ToolResult
+
+log = logging.getLogger(__name__)
+
+
+class CachedTool:
+    """Wrap ``tool`` so repeated inputs are served from ``cache``.
+
+    ``ttl`` (seconds) bounds how long results stay valid; ``None`` uses the
+    cache's default and :data:`~deepr.utils.disk_cache.NEVER_EXPIRE` keeps
+    results until evicted. ``partial`` results (e.g. a search some engines
+    did not answer) are kept for at most ``partial_ttl`` seconds, or not at
+    all if it is 0. ``name``, ``description``, ``InputModel`` and any other
+    attributes are forwarded to the wrapped tool.
+    """
+
+    def __init__(
+        self,
+        tool: BaseTool,
+        cache: DiskCache,
+        ttl: Optional[float] = None,
+        cache_errors: bool = False,
+        partial_ttl: float = 300.0,
+    ) -> None:
+        self.tool = tool
+        self.cache = cache
+        self.ttl = ttl
+        self.cache_errors = cache_errors
+        self.partial_ttl = partial_ttl
+        self._inflight: dict[str, asyncio.Future[ToolResult]] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.tool, name)
+
+    def cache_key(self, inp: ToolInput) -> str:
+        canonical = json.dumps(inp.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+        digest = hashlib.sha256(f"{self.tool.name}\n{canonical}".encode("utf-8")).hexdigest()
+        return f"tool:{self.tool.name}:{digest}"
+
+    def _lookup(self, key: str) -> Optional[ToolResult]:
+        raw = self.cache.get(key)
+        if raw is None:
+            return None
+        try:
+            return ToolResult.model_validate_json(raw)
+        except Exception:
+            self.cache.delete(key)
+            return None
+
+    def _store(self, key: str, result: ToolResult) -> None:
+        if not (result.ok or self.cache_errors):
+            return
+        ttl = self.ttl
+        if result.partial:
+            if self.partial_ttl <= 0:
+                return
+            full = ttl if ttl is not None else self.cache.ttl
+            ttl = self.partial_ttl if full is None else min(full, self.partial_ttl)
+        try:
+            raw = result.model_dump_json().encode("utf-8")
+        except Exception:  # data not JSON-serializable: just don't cache it
+            log.debug("tool result not cacheable", extra={"tool": self.tool.name})
+            return
+        self.cache.set(key, raw, ttl=ttl)
+
+    async def _call(self, key: str, inp: ToolInput) -> ToolResult:
+        try:
+            result = await self.tool.run(inp)
+            self._store(key, result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    async def run(self, inp: ToolInput) -> ToolResult:
+        key = self.cache_key(inp)
+        hit = self._lookup(key)
+        if hit is not None:
+            return hit
+        fut = self._inflight.get(key)
+        if fut is None:
+            fut = self._inflight[key] = asyncio.ensure_future(self._call(key, inp))
+        # shield: one caller being cancelled must not cancel the shared call
+        return await asyncio.shield(fut)
+
+
+def tool_ttl(ttls: Mapping[str, Optional[float]], name: str, default: Optional[float] = None) -> Optional[float]:
+    """``CachedTool`` ttl for tool ``name``: its ``ttls`` entry, else ``default``.
+
+    An explicit ``None`` entry means "never expire" (:data:`NEVER_EXPIRE`),
+    not "use the default".
+    """
+    if name not in ttls:
+        return default
+    ttl = ttls[name]
+    return NEVER_EXPIRE if ttl is None else ttl
+
+
+def cache_registry(
+    registry: ToolRegistry,
+    cache: DiskCache,
+    ttls: Optional[Mapping[str, Optional[float]]] = None,
+    default_ttl: Optional[float] = None,
+) -> ToolRegistry:
+    """Wrap every tool registered in ``registry`` in a :class:`CachedTool` (in place).
+
+    ``ttls`` gives per-tool lifetimes (``None`` = never expire); tools not
+    listed use ``default_ttl``.
+    """
+    ttls = ttls or {}
+    for name in registry.list():
+        tool = registry.get(name)
+        if isinstance(tool, CachedTool):
+            continue
+        registry.register(CachedTool(tool, cache, ttl=tool_ttl(ttls, name, default_ttl)))  # type: ignore[arg-type]
+    return registry
+
+
+def tool_cache(settings: DeepRSettings) -> DiskCache:
+    """The shared tool-result cache at ``cache_dir/tool_results.sqlite``."""
+    return DiskCache(
+        settings.cache_dir / "tool_results.sqlite",
+        max_bytes=settings.cache.tool_max_mb * 1024 * 1024,
+        ttl=settings.cache.tool_ttl_seconds,
+    )
+
+
+def cache_registry_from_settings(registry: ToolRegistry, settings: DeepRSettings) -> ToolRegistry:
+    """Apply ``settings.cache`` tool caching (if enabled) to ``registry``."""
+    if not settings.cache.tool_results:
+        return registry
+    return cache_registry(registry, tool_cache(settings), settings.cache.tool_ttls, settings.cache.tool_ttl_seconds)
+
+
+__all__ = ["CachedTool", "cache_registry", "tool_ttl", "cache_registry_from_settings", "tool_cache"]
@@ -0,0 +1,173 @@
+"""Concurrent execution of tool actions on top of :class:`ToolRegistry`.
+
+:class:`ToolExecutor` runs a batch of actions — the Researcher's
+``actions: [{tool, input}]`` — concurrently and returns one
+:class:`ToolResult` per action, in the same order. Each tool gets its own
+:class:`ToolLimits`: a concurrency cap, an optional token-bucket rate limit
+and a timeout. Failures, timeouts and unknown tools become ``ok=False``
+results rather than exceptions; cancelling :meth:`ToolExecutor.run` cancels
+every in-flight tool call.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Mapping, Optional, Sequence
+
+from pydantic import ValidationError
+
+from .base import BaseTool, ToolInput, ToolRegistry, ToolResult, registry as default_registry
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ..agents.policies import BudgetController
+    from ..config.settings import DeepRSettings
+
+log = logging.getLogger(__name__)
+
+Action = Mapping[str, Any]
+
+
+@dataclass(frozen=True)
+class ToolLimits:
+    max_concurrency: int = 4
+    rate: Optional[float] = None  # calls per second; None = unlimited
+    burst: int = 1
+    timeout: Optional[float] = 30.0
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` tokens per second, holding at most ``capacity``."""
+
+    def __init__(self, rate: float, capacity: int = 1, clock: Callable[[], float] = time.monotonic) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._clock = clock
+        self._tokens = float(self.capacity)
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        # the lock keeps waiters FIFO: each sleeps until its own token is due
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class _ToolSlot:
+    def __init__(self, limits: ToolLimits) -> None:
+        self.limits = limits
+        self.semaphore = asyncio.Semaphore(max(1, limits.max_concurrency))
+        self.bucket = TokenBucket(limits.rate, limits.burst) if limits.rate else None
+
+
+def parse_actions(payload: Any) -> list[dict[str, Any]]:
+    """Actions from a Researcher reply: JSON text, ``{"actions": [...]}`` or a list."""
+    if isinstance(payload, str):
+        payload = json.loads(payload)
+    if isinstance(payload, Mapping):
+        payload = payload.get("actions") or []
+    return [dict(a) for a in payload if isinstance(a, Mapping)]
+
+
+class ToolExecutor:
+    """Runs tool actions concurrently within per-tool and global limits.
+
+    ``limits`` maps tool names to :class:`ToolLimits`; other tools use
+    ``default_limits``. ``max_parallel`` caps calls in flight across all
+    tools. With a ``budget``, timeouts are also bounded by the run's
+    remaining time.
+    """
+
+    def __init__(
+        self,
+        registry: Optional[ToolRegistry] = None,
+        limits: Optional[Mapping[str, ToolLimits]] = None,
+        default_limits: ToolLimits = ToolLimits(),
+        max_parallel: int = 16,
+        budget: Optional["BudgetController"] = None,
+    ) -> None:
+        self.registry = registry or default_registry
+        self.limits = dict(limits or {})
+        self.default_limits = default_limits
+        self.max_parallel = max(1, max_parallel)
+        self.budget = budget
+        self._slots: dict[str, _ToolSlot] = {}
+        self._global: Optional[asyncio.Semaphore] = None
+
+    @classmethod
+    def from_settings(cls, settings: "DeepRSettings", **kwargs: Any) -> "ToolExecutor":
+        """Executor capped by ``concurrency.max_tool_parallel``, with fetch tools at ``max_fetch_parallel``."""
+        limits = dict(kwargs.pop("limits", None) or {})
+        limits.setdefault("web_fetch", ToolLimits(max_concurrency=settings.concurrency.max_fetch_parallel))
+        return cls(limits=limits, max_parallel=settings.concurrency.max_tool_parallel, **kwargs)
+
+    def _slot(self, name: str) -> _ToolSlot:
+        slot = self._slots.get(name)
+        if slot is None:
+            slot = self._slots[name] = _ToolSlot(self.limits.get(name, self.default_limits))
+        return slot
+
+    def _timeout(self, limits: ToolLimits) -> Optional[float]:
+        timeouts = [t for t in (limits.timeout, self.budget.remaining_seconds if self.budget else None) if t is not None]
+        return min(timeouts) if timeouts else None
+
+    async def run_one(self, name: str, inp: ToolInput | Mapping[str, Any] | None) -> ToolResult:
+        try:
+            tool: BaseTool = self.registry.get(name)
+        except KeyError:
+            return ToolResult(ok=False, error=f"unknown tool: {name}")
+        if not isinstance(inp, ToolInput):
+            # model-generated actions may carry a string or list where an object belongs
+            if inp is not None and not isinstance(inp, Mapping):
+                return ToolResult(ok=False, error=f"invalid input for {name}: expected an object, got {type(inp).__name__}")
+            try:
+                inp = tool.InputModel(**dict(inp or {}))
+            except (ValidationError, TypeError) as exc:
+                return ToolResult(ok=False, error=f"invalid input for {name}: {exc}")
+        if self.budget is not None and (reason := self.budget.exhausted_reason()) is not None:
+            return ToolResult(ok=False, error=f"budget exhausted: {reason}")
+
+        if self._global is None:
+            self._global = asyncio.Semaphore(self.max_parallel)
+        slot = self._slot(name)
+        async with slot.semaphore, self._global:
+            if slot.bucket is not None:
+                await slot.bucket.acquire()
+            timeout = self._timeout(slot.limits)
+            started = time.perf_counter()
+            try:
+                async with asyncio.timeout(timeout) as deadline:
+                    return await tool.run(inp)
+            except Exception as exc:
+                # a TimeoutError the tool raised itself is an ordinary failure
+                if isinstance(exc, TimeoutError) and deadline.expired():
+                    return ToolResult(ok=False, error=f"{name} timed out after {timeout:.1f}s")
+                log.warning("tool failed", extra={"tool": name, "error": str(exc)})
+                return ToolResult(ok=False, error=f"{type(exc).__name__}: {exc}")
+            finally:
+                log.debug("tool call", extra={"tool": name, "seconds": time.perf_counter() - started})
+
+    async def run(self, actions: Sequence[Action]) -> list[ToolResult]:
+        """Run ``actions`` (``{"tool": ..., "input": {...}}``) concurrently; results keep their order."""
+        tasks = [asyncio.ensure_future(self.run_one(str(a.get("tool")), a.get("input"))) for a in actions]
+        try:
+            return list(await asyncio.gather(*tasks))
+        finally:
+            for t in tasks:
+                t.cancel()
+
+
+__all__ = ["ToolExecutor", "ToolLimits", "TokenBucket", "parse_actions"]
@@ -0,0 +1,274 @@
+"""Web search tool with parallel multi-engine fan-out.
+
+:class:`SearchTool` queries every configured :class:`SearchEngine`
+concurrently and merges results as they arrive. It returns as soon as
+``max_results`` unique hits are in, or — hedging against a slow engine —
+``hedge_delay`` seconds after the first engine answered, cancelling the
+stragglers. Hits are deduplicated by normalized URL and by near-identical
+title/snippet (64-bit SimHash within a small Hamming distance). A merge that
+is missing engines (failed, timed out or hedged away before ``max_results``
+hits) is returned with ``partial=True``, so caches keep it only briefly.
+
+Engines: Tavily (needs ``TAVILY_API_KEY``), DuckDuckGo's HTML endpoint, and
+:class:`StubEngine` for offline tests. Query results are cached by wrapping
+the tool in :class:`~deepr.tools.cache.CachedTool` (see :func:`build_search_tool`).
+"""
+from __future__ import annotations
+
+import asyncio
+import html as _html
+import logging
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Mapping, Optional, Sequence, Union
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit, urlunsplit
+
+from ..config.settings import DeepRSettings
+from ..ingestion.dedup import hamming, simhash
+from .base import BaseTool, ToolInput, ToolResult
+from .cache import CachedTool, tool_cache, tool_ttl
+
+log = logging.getLogger(__name__)
+
+Hit = dict[str, Any]  # {"title", "url", "snippet", "engine", "rank"}
+
+_TRACKING = re.compile(r"^(utm_.*|gclid|fbclid|mc_[a-z]+|ref|ref_src|igshid)$", re.I)
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form for dedup: lowercase host without ``www.``, no fragment,
+    tracking parameters or trailing slash, sorted query, scheme folded to https."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _TRACKING.match(k)))
+    path = parts.path.rstrip("/") or ""
+    return urlunsplit(("https", host, path, query, ""))
+
+
+class SearchEngine(ABC):
+    name: str
+
+    @abstractmethod
+    async def search(self, query: str, max_results: int) -> list[Hit]:
+        """Return up to ``max_results`` hits with at least ``title`` and ``url``."""
+
+    async def aclose(self) -> None:
+        return None
+
+
+class _HTTPEngine(SearchEngine):
+    def __init__(self, timeout: float = 15.0) -> None:
+        self.timeout = timeout
+        self._client: Any = None
+
+    def _get_client(self) -> Any:
+        if self._client is None:
+            try:
+                import httpx
+            except Exception as exc:  # pragma: no cover - environment dependent
+                raise RuntimeError(f"httpx is required for {type(self).__name__}") from exc
+            self._client = httpx.AsyncClient(timeout=self.timeout, follow_redirects=True)
+        return self._client
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+
+class TavilyEngine(_HTTPEngine):
+    name = "tavily"
+    URL = "https://api.tavily.com/search"
+
+    def __init__(self, api_key: Optional[str] = None, timeout: float = 15.0) -> None:
+        super().__init__(timeout)
+        self.api_key = api_key or os.environ.get("TAVILY_API_KEY")
+
+    async def search(self, query: str, max_results: int) -> list[Hit]:
+        resp = await self._get_client().post(self.URL, json={"api_key": self.api_key, "query": query, "max_results": max_results})
+        resp.raise_for_status()
+        return [
+            {"title": r.get("title", ""), "url": r.get("url", ""), "snippet": r.get("content", "")}
+            for r in resp.json().get("results", [])
+            if r.get("url")
+        ]
+
+
+class DuckDuckGoEngine(_HTTPEngine):
+    name = "duckduckgo"
+    URL = "https://html.duckduckgo.com/html/"
+    _RESULT = re.compile(r'class="result__a"[^>]*href="([^"]+)"[^>]*>(.*?)</a>', re.S)
+    _SNIPPET = re.compile(r'class="result__snippet"[^>]*>(.*?)</a>', re.S)
+    _TAG = re.compile(r"<[^>]+>")
+
+    def _clean(self, fragment: str) -> str:
+        return _html.unescape(self._TAG.sub("", fragment)).strip()
+
+    @staticmethod
+    def _target(href: str) -> str:
+        # result links go through a redirect: //duckduckgo.com/l/?uddg=<url>
+        q = dict(parse_qsl(urlsplit(_html.unescape(href)).query))
+        return unquote(q["uddg"]) if "uddg" in q else _html.unescape(href)
+
+    async def search(self, query: str, max_results: int) -> list[Hit]:
+        resp = await self._get_client().post(self.URL, data={"q": query}, headers={"User-Agent": "Mozilla/5.0"})
+        resp.raise_for_status()
+        text = resp.text
+        snippets = [self._clean(s) for s in self._SNIPPET.findall(text)]
+        hits = []
+        for i, (href, title) in enumerate(self._RESULT.findall(text)[:max_results]):
+            hits.append({"title": self._clean(title), "url": self._target(href), "snippet": snippets[i] if i < len(snippets) else ""})
+        return hits
+
+
+class StubEngine(SearchEngine):
+    """Offline engine: canned results per query (or from a callable), optional delay."""
+
+    def __init__(
+        self,
+        results: Union[Mapping[str, Sequence[Hit]], Callable[[str], Sequence[Hit]]],
+        name: str = "stub",
+        delay: float = 0.0,
+    ) -> None:
+        self.results = results
+        self.name = name
+        self.delay = delay
+        self.calls = 0
+
+    async def search(self, query: str, max_results: int) -> list[Hit]:
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        hits = self.results(query) if callable(self.results) else self.results.get(query, [])
+        return [dict(h) for h in hits][:max_results]
+
+
+class SearchInput(ToolInput):
+    query: str
+    max_results: Optional[int] = None
+
+
+class _Merger:
+    def __init__(self, limit: int, max_distance: int) -> None:
+        self.limit = limit
+        self.max_distance = max_distance
+        self.hits: list[Hit] = []
+        self._urls: set[str] = set()
+        self._hashes: list[int] = []
+
+    def add(self, engine: str, hits: Sequence[Hit]) -> None:
+        for rank, hit in enumerate(hits):
+            if len(self.hits) >= self.limit:
+                return
+            url = hit.get("url") or ""
+            key = normalize_url(url)
+            if not url or key in self._urls:
+                continue
+            sig = simhash(f"{hit.get('title', '')} {hit.get('snippet', '')}")
+            if sig and any(hamming(sig, h) <= self.max_distance for h in self._hashes):
+                continue
+            self._urls.add(key)
+            self._hashes.append(sig)
+            self.hits.append({**hit, "engine": engine, "rank": rank})
+
+    @property
+    def full(self) -> bool:
+        return len(self.hits) >= self.limit
+
+
+class SearchTool:
+    name = "search"
+    description = "Search the web with all enabled engines and return deduplicated results"
+    InputModel = SearchInput
+
+    def __init__(
+        self,
+        engines: Sequence[SearchEngine],
+        max_results: int = 8,
+        hedge_delay: float = 1.0,
+        timeout: float = 20.0,
+        max_distance: int = 3,
+    ) -> None:
+        self.engines = list(engines)
+        self.max_results = max_results
+        self.hedge_delay = hedge_delay
+        self.timeout = timeout
+        self.max_distance = max_distance
+
+    async def run(self, inp: SearchInput) -> ToolResult:  # type: ignore[override]
+        if not self.engines:
+            return ToolResult(ok=False, error="no search engines enabled")
+        limit = inp.max_results or self.max_results
+        merger = _Merger(limit, self.max_distance)
+        tasks = {asyncio.ensure_future(e.search(inp.query, limit)): e.name for e in self.engines}
+        order = list(tasks)
+        errors: list[str] = []
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        pending = set(tasks)
+        try:
+            while pending and not merger.full:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                # engines that finish together merge in configured order, not set order
+                for t in sorted(done, key=order.index):
+                    if t.exception() is not None:
+                        errors.append(f"{tasks[t]}: {t.exception()}")
+                        continue
+                    merger.add(tasks[t], t.result())
+                if merger.hits and pending:
+                    # hedge: give the slower engines a short grace period only
+                    deadline = min(deadline, loop.time() + self.hedge_delay)
+        finally:
+            for t in pending:
+                t.cancel()
+        if errors:
+            log.warning("search engines failed", extra={"errors": errors})
+        if not merger.hits and errors:
+            return ToolResult(ok=False, error="; ".join(errors))
+        # stragglers cancelled after the merge filled up did not cost any results
+        partial = bool(errors) or (bool(pending) and not merger.full)
+        return ToolResult(data=merger.hits, partial=partial)
+
+    async def aclose(self) -> None:
+        for e in self.engines:
+            await e.aclose()
+
+
+def engines_from_settings(settings: DeepRSettings) -> list[SearchEngine]:
+    engines: list[SearchEngine] = []
+    if settings.search.enable_tavily:
+        if os.environ.get("TAVILY_API_KEY"):
+            engines.append(TavilyEngine())
+        else:
+            log.info("tavily enabled but TAVILY_API_KEY is not set; skipping")
+    if settings.search.enable_duckduckgo:
+        engines.append(DuckDuckGoEngine())
+    return engines
+
+
+def build_search_tool(settings: DeepRSettings, engines: Optional[Sequence[SearchEngine]] = None) -> BaseTool:
+    """SearchTool for ``settings.search``, with query results cached per ``settings.cache``."""
+    tool: Any = SearchTool(engines if engines is not None else engines_from_settings(settings), max_results=settings.search.max_results)
+    if settings.cache.tool_results:
+        ttl = tool_ttl(settings.cache.tool_ttls, SearchTool.name, settings.cache.tool_ttl_seconds)
+        tool = CachedTool(tool, tool_cache(settings), ttl=ttl)
+    return tool
+
+
+__all__ = [
+    "SearchTool",
+    "SearchInput",
+    "SearchEngine",
+    "TavilyEngine",
+    "DuckDuckGoEngine",
+    "StubEngine",
+    "normalize_url",
+    "engines_from_settings",
+    "build_search_tool",
+]
@@ -0,0 +1,217 @@
+"""HTTP fetch tool.
+
+:class:`WebFetchTool` shares one pooled ``httpx.AsyncClient`` (HTTP/2 when the
+``h2`` package is installed) across all calls and caps concurrent requests per
+host. Responses are kept in a raw HTTP cache (a
+:class:`~deepr.utils.disk_cache.DiskCache` under ``cache_dir``): entries still
+fresh per ``Cache-Control: max-age`` are served without a request, stale ones
+are revalidated with ``If-None-Match`` / ``If-Modified-Since`` so unchanged
+pages cost a 304. Bodies are read as a stream — decompressed incrementally —
+and cut off after ``max_bytes``.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import importlib.util
+import json
+import logging
+import re
+import time
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+from ..config.settings import DeepRSettings
+from ..utils.disk_cache import DiskCache
+from .base import ToolInput, ToolResult
+
+log = logging.getLogger(__name__)
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class WebFetchInput(ToolInput):
+    url: str
+    max_bytes: Optional[int] = None  # defaults to the tool's limit
+
+
+def _pack(meta: dict[str, Any], body: bytes) -> bytes:
+    head = json.dumps(meta).encode("utf-8")
+    return len(head).to_bytes(4, "big") + head + body
+
+
+def _unpack(raw: bytes) -> tuple[dict[str, Any], bytes]:
+    n = int.from_bytes(raw[:4], "big")
+    return json.loads(raw[4 : 4 + n]), raw[4 + n :]
+
+
+class WebFetchTool:
+    name = "web_fetch"
+    description = "Fetch a URL over HTTP(S) and return its text content"
+    InputModel = WebFetchInput
+
+    def __init__(
+        self,
+        cache: Optional[DiskCache] = None,
+        max_connections: int = 20,
+        per_host: int = 4,
+        timeout: float = 20.0,
+        max_bytes: int = 5 * 1024 * 1024,
+        http2: Optional[bool] = None,
+        user_agent: str = "DeepR/0.0 (+research)",
+    ) -> None:
+        self.cache = cache
+        self.max_connections = max_connections
+        self.per_host = max(1, per_host)
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.http2 = importlib.util.find_spec("h2") is not None if http2 is None else http2
+        self.user_agent = user_agent
+        self._client: Any = None
+        self._hosts: dict[str, asyncio.Semaphore] = {}
+
+    @classmethod
+    def from_settings(cls, settings: DeepRSettings, **kwargs: Any) -> "WebFetchTool":
+        """Tool with its HTTP cache at ``cache_dir/http_cache.sqlite``."""
+        cache = DiskCache(settings.cache_dir / "http_cache.sqlite", max_bytes=settings.cache.tool_max_mb * 1024 * 1024)
+        kwargs.setdefault("per_host", settings.concurrency.max_fetch_parallel)
+        return cls(cache=cache, **kwargs)
+
+    def _httpx(self) -> Any:
+        try:
+            import httpx
+        except Exception as exc:  # pragma: no cover - environment dependent
+            raise RuntimeError(f"httpx is required for {type(self).__name__}") from exc
+        return httpx
+
+    def _get_client(self) -> Any:
+        if self._client is None:
+            httpx = self._httpx()
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                timeout=self.timeout,
+                follow_redirects=True,
+                headers={"User-Agent": self.user_agent},
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        slot = self._hosts.get(host)
+        if slot is None:
+            slot = self._hosts[host] = asyncio.Semaphore(self.per_host)
+        return slot
+
+    @staticmethod
+    def _cache_key(url: str) -> str:
+        return "http:" + hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _cached(self, url: str) -> Optional[tuple[dict[str, Any], bytes]]:
+        if self.cache is None:
+            return None
+        raw = self.cache.get(self._cache_key(url))
+        if raw is None:
+            return None
+        try:
+            return _unpack(raw)
+        except Exception:
+            return None
+
+    def _store(self, url: str, meta: dict[str, Any], body: bytes) -> None:
+        if self.cache is not None and "no-store" not in meta.get("cache_control", ""):
+            self.cache.set(self._cache_key(url), _pack(meta, body))
+
+    @staticmethod
+    def _fresh(meta: dict[str, Any]) -> bool:
+        m = _MAX_AGE.search(meta.get("cache_control", ""))
+        if not m or "no-cache" in meta.get("cache_control", ""):
+            return False
+        return time.time() < meta.get("stored", 0) + int(m.group(1))
+
+    @staticmethod
+    def _result(meta: dict[str, Any], body: bytes, cache: str) -> ToolResult:
+        text = body.decode(meta.get("encoding") or "utf-8", errors="replace")
+        ctype = meta.get("content_type", "")
+        data = {
+            "url": meta.get("url"),
+            "status": meta.get("status"),
+            "content_type": ctype,
+            "truncated": meta.get("truncated", False),
+            "cache": cache,  # "miss" | "hit" | "revalidated"
+        }
+        data["html" if "html" in ctype else "text"] = text
+        return ToolResult(data=data)
+
+    async def _read(self, resp: Any, limit: int) -> tuple[bytes, bool]:
+        chunks: list[bytes] = []
+        size = 0
+        async for chunk in resp.aiter_bytes():  # decoded (decompressed) incrementally
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= limit:
+                return b"".join(chunks)[:limit], True
+        return b"".join(chunks), False
+
+    async def run(self, inp: WebFetchInput) -> ToolResult:  # type: ignore[override]
+        url = inp.url
+        limit = inp.max_bytes or self.max_bytes
+        cached = self._cached(url)
+        # a body stored truncated below the requested limit can be neither served nor revalidated
+        short = cached is not None and bool(cached[0].get("truncated")) and len(cached[1]) < limit
+        if cached is not None and self._fresh(cached[0]) and not short:
+            return self._result(cached[0], cached[1][:limit], "hit")
+
+        headers: dict[str, str] = {}
+        if cached is not None and not short:
+            if cached[0].get("etag"):
+                headers["If-None-Match"] = cached[0]["etag"]
+            if cached[0].get("last_modified"):
+                headers["If-Modified-Since"] = cached[0]["last_modified"]
+
+        client = self._get_client()
+        try:
+            async with self._host_slot(url):
+                async with client.stream("GET", url, headers=headers) as resp:
+                    if resp.status_code == 304 and headers and cached is not None:
+                        meta, body = cached
+                        meta["stored"] = time.time()
+                        if resp.headers.get("cache-control"):
+                            meta["cache_control"] = resp.headers["cache-control"]
+                        self._store(url, meta, body)
+                        return self._result(meta, body[:limit], "revalidated")
+                    if resp.status_code >= 400:
+                        return ToolResult(ok=False, error=f"HTTP {resp.status_code} for {url}")
+                    body, truncated = await self._read(resp, limit)
+                    meta = {
+                        "url": str(resp.url),
+                        "status": resp.status_code,
+                        "content_type": resp.headers.get("content-type", ""),
+                        "encoding": resp.charset_encoding,
+                        "etag": resp.headers.get("etag"),
+                        "last_modified": resp.headers.get("last-modified"),
+                        "cache_control": resp.headers.get("cache-control", ""),
+                        "truncated": truncated,
+                        "stored": time.time(),
+                    }
+        except Exception as exc:
+            log.warning("fetch failed", extra={"url": url, "error": str(exc)})
+            return ToolResult(ok=False, error=f"{type(exc).__name__}: {exc}")
+        if resp.status_code == 200:
+            self._store(url, meta, body)
+        return self._result(meta, body, "miss")
+
+    async def fetch_document(self, url: str) -> Optional[dict[str, Any]]:
+        """Fetch ``url`` as an ingestion document (see ``IngestionPipeline``'s ``fetch``)."""
+        result = await self.run(WebFetchInput(url=url))
+        if not result.ok:
+            raise RuntimeError(result.error)
+        return result.data
+
+
+__all__ = ["WebFetchTool", "WebFetchInput"]
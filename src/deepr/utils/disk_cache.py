@@ -0,0 +1,147 @@
+"""Small SQLite-backed key/value cache with TTL and size-bounded eviction.
+
+Used for anything DeepR caches under ``DeepRSettings.cache_dir`` (model
+responses, tool results, fetched pages, embeddings). Values are opaque bytes;
+JSON helpers are provided for the common case. When the stored payload grows
+past ``max_bytes`` the least recently used entries are evicted.
+"""
+from __future__ import annotations
+
+import json
+import math
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+# per-entry ``ttl`` that keeps the entry until evicted, whatever the cache default
+NEVER_EXPIRE = math.inf
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL,
+    expires REAL
+)
+"""
+
+
+class DiskCache:
+    """Persistent bytes cache stored in a single SQLite file.
+
+    ``ttl`` (seconds) is the default lifetime for new entries; ``None`` keeps
+    them until evicted. :meth:`set` takes a per-entry ``ttl``: ``None`` uses
+    the default, :data:`NEVER_EXPIRE` keeps that entry until evicted.
+    ``max_bytes`` bounds the total size of stored values. Safe to share
+    between threads.
+    """
+
+    def __init__(self, path: Path, max_bytes: Optional[int] = 256 * 1024 * 1024, ttl: Optional[float] = None) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(_SCHEMA)
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed)")
+        row = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        self._total = int(row[0])
+
+    def get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, expires FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, expires = row
+            if expires is not None and expires <= now:
+                self._delete_locked(key)
+                return None
+            self._db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            return bytes(value)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        expires = now + ttl if ttl is not None and ttl != NEVER_EXPIRE else None
+        with self._lock:
+            old = self._db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, accessed, expires) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, expires),
+            )
+            self._total += len(value) - (old[0] if old else 0)
+            if self.max_bytes is not None and self._total > self.max_bytes:
+                self._evict_locked(now)
+
+    def get_json(self, key: str) -> Any:
+        raw = self.get(key)
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+
+    def set_json(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.set(key, json.dumps(value, ensure_ascii=False).encode("utf-8"), ttl=ttl)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._delete_locked(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+            self._total = 0
+
+    def evict(self) -> None:
+        """Drop expired entries, then LRU entries until within ``max_bytes``."""
+        with self._lock:
+            self._evict_locked(time.time())
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0])
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _delete_locked(self, key: str) -> None:
+        row = self._db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._total -= row[0]
+
+    def _evict_locked(self, now: float) -> None:
+        self._db.execute("DELETE FROM entries WHERE expires IS NOT NULL AND expires <= ?", (now,))
+        self._total = int(self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0])
+        if self.max_bytes is None or self._total <= self.max_bytes:
+            return
+        excess = self._total - self.max_bytes
+        victims: list[str] = []
+        freed = 0
+        for key, size in self._db.execute("SELECT key, size FROM entries ORDER BY accessed ASC"):
+            victims.append(key)
+            freed += size
+            if freed >= excess:
+                break
+        self._db.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in victims])
+        self._total -= freed
+
+
+__all__ = ["DiskCache", "NEVER_EXPIRE"]
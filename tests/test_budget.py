@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from deepr.agents.policies import BudgetController, BudgetExceeded, estimate_tokens
+from deepr.config.settings import BudgetConfig
+from deepr.models.llm_provider import ModelProvider
+from deepr.tools.base import ToolInput, ToolResult
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.t = 0.0
+
+    def __call__(self) -> float:
+        return self.t
+
+
+class ChattyProvider(ModelProvider):
+    def __init__(self) -> None:
+        self.closed = False
+
+    def generate(self, prompt: str) -> str:
+        return "".join(self.stream(prompt))
+
+    def stream(self, prompt: str):
+        try:
+            for _ in range(100):
+                yield "word"  # ~1 token each
+        finally:
+            self.closed = True
+
+    async def astream(self, prompt: str):
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            yield "word"
+
+
+def test_generation_truncated_at_token_limit():
+    inner = ChattyProvider()
+    budget = BudgetController(BudgetConfig(max_tokens=10))
+    p = budget.wrap(inner)
+    out = p.generate("hi")  # prompt ~1 token
+    assert out == "word" * 9
+    assert inner.closed
+    assert budget.tokens_used == 10
+    with pytest.raises(BudgetExceeded):
+        p.generate("again")
+
+
+def test_time_limit_and_degradation():
+    clock = FakeClock()
+    budget = BudgetController(BudgetConfig(max_time_seconds=100), clock=clock)
+    assert budget.allowed_tasks(10) == 10
+    clock.t = 40
+    assert budget.allowed_tasks(10) == 5
+    clock.t = 85
+    assert budget.allowed_tasks(10) == 0
+    clock.t = 100
+    with pytest.raises(BudgetExceeded):
+        budget.check()
+
+
+def test_unlimited_budget_never_degrades():
+    budget = BudgetController()
+    budget.charge(10**9)
+    assert not budget.exhausted
+    assert budget.allowed_tasks(3) == 3
+
+
+@pytest.mark.asyncio
+async def test_async_stream_cancelled_by_time_budget():
+    budget = BudgetController(BudgetConfig.model_construct(max_time_seconds=0.05, max_tokens=None))
+    out = await budget.wrap(ChattyProvider()).agenerate("hi")
+    assert 0 < len(out) < len("word" * 100)
+
+
+class SlowTool:
+    name = "slow"
+    description = "sleeps"
+    InputModel = ToolInput
+
+    async def run(self, inp: ToolInput) -> ToolResult:
+        await asyncio.sleep(1)
+        return ToolResult(data="done")
+
+
+@pytest.mark.asyncio
+async def test_tool_bounded_by_remaining_time():
+    budget = BudgetController(BudgetConfig.model_construct(max_time_seconds=0.05, max_tokens=None))
+    res = await budget.run_tool(SlowTool(), ToolInput())
+    assert not res.ok and "time limit" in res.error
+    assert estimate_tokens("abcd") == 1
+
+
+class SessionProvider(ModelProvider):
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.sessions = []
+
+    def generate(self, prompt: str) -> str:
+        return "x"
+
+    async def agenerate_chat(self, system, prompt, session=None):
+        await asyncio.sleep(self.delay)
+        return "answer"
+
+    def _generate_structured(self, system, prompt, schema, session=None):
+        self.sessions.append(session)
+        return '{"ok": true}'
+
+
+@pytest.mark.asyncio
+async def test_async_chat_over_time_budget_raises():
+    budget = BudgetController(BudgetConfig.model_construct(max_time_seconds=0.05, max_tokens=None))
+    with pytest.raises(BudgetExceeded):
+        await budget.wrap(SessionProvider(delay=1)).agenerate_chat("sys", "hi")
+    assert budget.tokens_used > 0  # the prompt is still charged
+
+
+def test_structured_call_keeps_session():
+    inner = SessionProvider()
+    budget = BudgetController(BudgetConfig(max_tokens=1000))
+    s = budget.wrap(inner).session("planner", "sys")
+    assert s.provider.generate_json("plan", system="sys", session=s) == {"ok": True}
+    assert inner.sessions == [s] and budget.tokens_used > 0
@@ -0,0 +1,136 @@
+import json
+
+from typer.testing import CliRunner
+
+from deepr.cli.main import app
+from deepr.graph.state import SharedGraphState
+from deepr.orchestration.checkpoint import Checkpointer
+
+
+def _journal(cp):
+    return [json.loads(l) for l in cp.journal_path.read_text().splitlines()]
+
+
+def test_checkpoint_writes_only_deltas(tmp_path):
+    cp = Checkpointer(tmp_path, 'r1', snapshot_every=0)
+    s = SharedGraphState(run_id='r1', plan={'q': 'x'})
+    s.documents['d1'] = {'text': 'a' * 1000}
+    s.add_task({'id': 't1'})
+    assert cp.checkpoint(s)
+    assert not cp.checkpoint(s)  # nothing changed
+    s.documents['d2'] = {'text': 'b'}
+    s.findings.append({'f': 1})
+    assert cp.checkpoint(s)
+    entries = _journal(cp)
+    assert len(entries) == 2
+    assert set(entries[1]) == {'seq', 'documents', 'findings'}
+    assert list(entries[1]['documents']) == ['d2']
+
+
+def test_resume_replays_journal(tmp_path):
+    cp = Checkpointer(tmp_path, 'r1', snapshot_every=0)
+    s = SharedGraphState(run_id='r1', plan={'q': 'x'})
+    s.add_task({'id': 't1'})
+    s.add_task({'id': 't2', 'depends_on': ['t1']})
+    cp.checkpoint(s)
+    task = s.next_task()
+    s.documents['d1'] = {'text': 'a'}
+    s.complete_task(task['id'])
+    s.findings.append({'f': 1})
+    s.report = {'title': 'r'}
+    cp.checkpoint(s)
+
+    r = Checkpointer(tmp_path, 'r1').resume()
+    assert r.plan == {'q': 'x'} and r.report == {'title': 'r'}
+    assert r.documents == {'d1': {'text': 'a'}}
+    assert r.findings == [{'f': 1}]
+    assert r.tasks.completed_ids() == ['t1']
+    assert r.next_task()['id'] == 't2'
+
+
+def test_running_task_is_requeued_on_resume(tmp_path):
+    cp = Checkpointer(tmp_path, 'r1')
+    s = SharedGraphState(run_id='r1')
+    s.add_task({'id': 't1'})
+    s.next_task()
+    cp.checkpoint(s)
+    r = Checkpointer(tmp_path, 'r1').resume()
+    assert r.next_task()['id'] == 't1'
+
+
+def test_compaction_and_continued_journal(tmp_path):
+    cp = Checkpointer(tmp_path, 'r1', snapshot_every=2)
+    s = SharedGraphState(run_id='r1')
+    for i in range(5):
+        s.findings.append({'i': i})
+        cp.checkpoint(s)
+    assert cp.snapshot_path.exists()
+    assert len(_journal(cp)) == 1  # entries after the last snapshot only
+
+    cp2 = Checkpointer(tmp_path, 'r1', snapshot_every=2)
+    r = cp2.resume()
+    assert [f['i'] for f in r.findings] == [0, 1, 2, 3, 4]
+    r.findings.append({'i': 5})
+    cp2.checkpoint(r)
+    assert [f['i'] for f in Checkpointer(tmp_path, 'r1').resume().findings] == list(range(6))
+
+
+def test_stale_journal_entries_and_torn_line_are_ignored(tmp_path):
+    cp = Checkpointer(tmp_path, 'r1', snapshot_every=0)
+    s = SharedGraphState(run_id='r1')
+    s.findings.append({'i': 0})
+    cp.checkpoint(s)
+    journal = cp.journal_path.read_text()
+    cp.compact(s)
+    # simulate a crash between snapshot and truncate, plus a partial write
+    cp.journal_path.write_text(journal + '{"seq": 2, "findi')
+    r = Checkpointer(tmp_path, 'r1').resume()
+    assert r.findings == [{'i': 0}]
+
+
+def test_cli_resume(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runner = CliRunner()
+    result = runner.invoke(app, ['research', 'what is x'])
+    assert result.exit_code == 0
+    run_id = result.stdout.strip().rsplit('run ', 1)[1].rstrip(')')
+    result = runner.invoke(app, ['research', '--resume', run_id])
+    assert result.exit_code == 0
+    assert f'Resuming run {run_id}' in result.stdout
+    result = runner.invoke(app, ['research', '--resume', 'missing'])
+    assert result.exit_code == 1
+
+
+def test_document_store_checkpoints_ids_only(tmp_path):
+    cp = Checkpointer(tmp_path, 'r1', snapshot_every=0)
+    s = SharedGraphState(run_id='r1', documents=cp.open_document_store())
+    s.documents['d1'] = {'url': 'u', 'text': 'a' * 1000}
+    cp.checkpoint(s)
+    assert _journal(cp)[0]['documents_stored'] == ['d1']
+    s.documents['d2'] = {'url': 'u2', 'text': 'not checkpointed'}
+    r = Checkpointer(tmp_path, 'r1').resume()
+    assert list(r.documents) == ['d1']
+    assert r.documents['d1']['text'] == 'a' * 1000
+
+
+def test_reassigned_document_is_journaled(tmp_path):
+    cp = Checkpointer(tmp_path, 'r1', snapshot_every=0)
+    s = SharedGraphState(run_id='r1')
+    s.documents['d1'] = {'text': 'a', 'duplicates': []}
+    s.documents['d0'] = {'text': 'b'}
+    cp.checkpoint(s)
+    doc = s.documents['d1']
+    doc['duplicates'].append('d2')  # e.g. dedup merging a near-duplicate
+    s.documents['d1'] = doc
+    s.findings.append({'f': 1})
+    assert cp.checkpoint(s)
+    assert _journal(cp)[-1]['documents'] == {'d1': {'text': 'a', 'duplicates': ['d2']}}
+    assert not cp.checkpoint(s)
+    s.documents['d0']['text'] = 'c'
+    s.documents.touch('d0')
+    assert _journal(cp)[-1]['seq'] == 2 and cp.checkpoint(s)
+    assert list(_journal(cp)[-1]['documents']) == ['d0']
+
+    r = Checkpointer(tmp_path, 'r1').resume()
+    assert r.documents['d1']['duplicates'] == ['d2']
+    assert r.documents['d0']['text'] == 'c'
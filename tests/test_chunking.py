@@ -0,0 +1,55 @@
+from deepr.ingestion.chunking import Chunker, LengthEstimator, calibrate, chunk_text, estimator_for
+
+
+class WordTokenizer:
+    def encode(self, text):
+        return text.split()
+
+
+def test_fixed_chunks_respect_estimated_budget_and_overlap():
+    text = ' '.join(f'word{i:03d}' for i in range(300))  # 8 chars per word incl. space
+    chunks = list(Chunker(max_tokens=20, overlap=4).iter_chunks(text))
+    assert len(chunks) > 1
+    assert all(c.tokens <= 20 for c in chunks)
+    assert all(len(c.text) <= 80 for c in chunks)
+    # neighbours share words, and nothing is lost
+    assert set(chunks[0].text.split()) & set(chunks[1].text.split())
+    assert set(' '.join(c.text for c in chunks).split()) == set(text.split())
+
+
+def test_sentence_strategy_keeps_sentences_whole():
+    text = ' '.join(f'Sentence number {i} is here.' for i in range(50))
+    chunks = chunk_text(text, max_tokens=30, overlap=8, strategy='sentence')
+    assert len(chunks) > 1
+    for c in chunks:
+        assert c.startswith('Sentence') and c.endswith('here.')
+        assert LengthEstimator().count(c) <= 30
+    assert 'Sentence number 49 is here.' in chunks[-1]
+
+
+def test_oversized_sentence_falls_back_to_windows():
+    text = 'Short one. ' + 'x ' * 200 + '. Tail.'
+    chunks = chunk_text(text, max_tokens=10, overlap=0, strategy='sentence')
+    assert chunks[0] == 'Short one.'
+    assert all(len(c) <= 40 for c in chunks)
+
+
+def test_exact_tokenizer_splits_underestimated_chunks():
+    text = ' '.join(['a'] * 200)  # 2 chars per token, estimator assumes 4
+    chunks = list(Chunker(max_tokens=20, overlap=0, tokenizer=WordTokenizer()).iter_chunks(text))
+    assert all(c.tokens <= 20 for c in chunks)
+    assert sum(c.tokens for c in chunks) == 200
+
+
+def test_estimators():
+    assert estimator_for('llama3:8b').chars_per_token == 3.8
+    assert estimator_for('unknown').chars_per_token == 4.0
+    est = calibrate(['aaa bbb ccc'], WordTokenizer())
+    assert abs(est.chars_per_token - 11 / 3) < 1e-9
+    # non-ASCII text counts more tokens per character
+    assert LengthEstimator().count('日本語のテキスト') > LengthEstimator().count('abcdefgh')
+
+
+def test_empty_and_short_text():
+    assert chunk_text('') == []
+    assert chunk_text('  hello  ') == ['hello']
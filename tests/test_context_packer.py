@@ -0,0 +1,59 @@
+import pytest
+
+from deepr.agents.context_packer import ContextItem, ContextPacker, items_from_hits
+from deepr.config.settings import DeepRSettings, ModelConfig
+from deepr.ingestion.chunking import LengthEstimator
+
+SYSTEM = "You merge extracted notes into consolidated findings."
+
+
+def _items():
+    sentence = "Solar output rose sharply in the last quarter. "
+    return [
+        ContextItem("a#0", sentence * 10, score=0.2),
+        ContextItem("b#3", sentence * 10, score=0.9),
+        ContextItem("c#1", sentence * 10, score=0.5),
+        ContextItem("d#0", sentence * 10, score=0.1),
+    ]
+
+
+def test_pack_orders_by_score_and_respects_budget():
+    packer = ContextPacker(context_window=400, reserve=100, estimator=LengthEstimator(4.0), min_excerpt_tokens=20)
+    packed = packer.pack(SYSTEM, _items(), instruction="Return JSON.")
+    assert packed.tokens <= packer.budget
+    assert packed.included == ["b#3", "c#1"]
+    assert packed.truncated == ["a#0"] and packed.dropped == ["d#0"]
+    body = packed.body
+    assert body.index("[b] ") < body.index("[c] ") < body.index("[a] ")
+    assert "[a] Solar" in body and body.split("[a] ")[1].split("\n")[0].endswith("quarter. …")
+    assert packed.prompt.startswith(SYSTEM) and packed.prompt.rstrip().endswith("Return JSON.")
+
+
+def test_prefix_is_stable_as_findings_grow():
+    packer = ContextPacker(context_window=2000, reserve=200)
+    findings = [{"theme": "solar", "points": [{"text": "output rose", "sources": ["b"]}]}]
+    first = packer.pack(SYSTEM, _items(), findings=findings, role="synthesizer")
+    assert not first.prefix_reused and '"theme":"solar"' in first.prefix
+    findings.append({"theme": "wind", "points": []})
+    second = packer.pack(SYSTEM, _items()[:1], findings=findings, role="synthesizer")
+    assert second.prefix_reused and second.prefix.startswith(first.prefix)
+
+
+def test_findings_trimmed_to_share_of_budget():
+    packer = ContextPacker(context_window=300, reserve=50, max_findings_share=0.3)
+    findings = [f"finding {i} " + "x" * 100 for i in range(20)]
+    packed = packer.pack(SYSTEM, [], findings=findings)
+    assert "finding 19" in packed.prefix and "finding 0 " not in packed.prefix
+    assert packed.tokens <= packer.budget
+
+
+def test_from_settings_and_hits():
+    settings = DeepRSettings(model=ModelConfig(model="llama3", context_window=4096, max_tokens=512))
+    packer = ContextPacker.from_settings(settings)
+    assert (packer.budget, packer.estimator.chars_per_token) == (3584, 3.8)
+    items = items_from_hits([("d1#0", 0.8), ("d2#0", 0.3)], {"d1#0": "alpha"}.get)
+    assert [(i.id, i.cite, i.score) for i in items] == [("d1#0", "d1", 0.8)]
+    with pytest.raises(ValueError):
+        ContextPacker(context_window=100, reserve=100)
+    small = DeepRSettings(model=ModelConfig(model="llama3", context_window=2048, max_tokens=4096))
+    assert ContextPacker.from_settings(small).reserve == 1024
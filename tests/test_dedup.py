@@ -0,0 +1,85 @@
+import asyncio
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from deepr.config.settings import DeepRSettings
+from deepr.ingestion.chunking import Chunker
+from deepr.ingestion.dedup import NearDuplicateIndex, hamming, jaccard, shingles, simhash
+from deepr.ingestion.pipeline import IngestionPipeline
+from deepr.models.embedding_provider import HashingEmbeddingProvider
+from deepr.retrieval.vector_store import VectorStore
+
+WORDS = [f"w{i}" for i in range(5000)]
+
+
+def _article(seed, n=400):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def test_minhash_estimates_jaccard():
+    index = NearDuplicateIndex()
+    a = _article(1)
+    words = a.split()
+    b = " ".join(words[:380] + ["x"] * 20)
+    exact = len(shingles(a) & shingles(b)) / len(shingles(a) | shingles(b))
+    est = jaccard(index.signature(a), index.signature(b))
+    assert abs(est - exact) < 0.15
+    assert index.signature(a) == NearDuplicateIndex().signature(a)  # stable across instances
+    assert jaccard(index.signature(a), index.signature(_article(2))) < 0.1
+
+
+def test_index_finds_near_duplicates_only():
+    index = NearDuplicateIndex(threshold=0.7)
+    for i in range(200):
+        assert index.add(f"d{i}", index.signature(_article(i))) is None
+    mirror = _article(42).replace("w1 ", "w2 ", 1) + " (c) mirror site"
+    assert index.add("mirror", index.signature(mirror)) == "d42"
+    assert "mirror" not in index and len(index) == 200
+    assert index.add("d42", index.signature(_article(42))) is None  # re-adding itself is fine
+
+    index.remove("d42")
+    assert index.query(index.signature(mirror)) is None
+
+    rebuilt = NearDuplicateIndex.from_documents({"d7": {"minhash": index.signature(_article(7))}, "x": {}}, threshold=0.7)
+    assert len(rebuilt) == 1 and rebuilt.query(index.signature(_article(7))) == "d7"
+
+
+def test_simhash_hamming():
+    a = simhash("the quick brown fox jumps over the lazy dog")
+    assert hamming(a, simhash("The quick brown fox jumps over the lazy dog!")) == 0
+    assert hamming(a, simhash("completely different words about databases")) > 10
+
+
+@pytest.mark.asyncio
+async def test_pipeline_merges_duplicates_before_embedding():
+    base = _article(3)
+
+    async def fetch(url):
+        await asyncio.sleep(0)
+        text = base + " mirror footer" if "mirror" in url else (base if url.endswith("orig") else _article(7))
+        return {"url": url, "text": text}
+
+    store = VectorStore(16)
+    docs = {}
+    pipe = IngestionPipeline.from_settings(
+        DeepRSettings(), fetch, HashingEmbeddingProvider(dim=16), store, documents=docs, chunker=Chunker(100, 0)
+    )
+    stats = await pipe.run(["http://a/orig", "http://b/mirror", "http://c/other"])
+    assert stats.duplicates == 1 and len(docs) == 2
+    kept = next(d for d in docs.values() if d["url"] == "http://a/orig")
+    assert kept["duplicates"] == ["http://b/mirror"]
+    assert stats.embedded == len(store) == sum(len(d["chunks"]) for d in docs.values())
+
+
+def test_documents_without_words_are_never_duplicates():
+    index = NearDuplicateIndex()
+    assert index.signature("") == [] and index.signature(" -- ") == []
+    assert index.add("a", index.signature("")) is None
+    assert index.add("b", index.signature("...")) is None
+    assert index.add("c", index.signature("one two")) is None
+    assert index.add("d", index.signature("three four")) is None
+    assert len(index) == 2 and "a" not in index
@@ -0,0 +1,40 @@
+import time
+
+from deepr.utils.disk_cache import NEVER_EXPIRE, DiskCache
+
+
+def test_roundtrip_and_persistence(tmp_path):
+    c = DiskCache(tmp_path / "c.sqlite")
+    c.set("a", b"hello")
+    c.set_json("b", {"x": 1})
+    assert c.get("a") == b"hello"
+    assert c.get_json("b") == {"x": 1}
+    c.close()
+    c2 = DiskCache(tmp_path / "c.sqlite")
+    assert c2.get("a") == b"hello"
+    assert c2.total_bytes == len(b"hello") + len(b'{"x": 1}')
+
+
+def test_ttl_expiry(tmp_path):
+    c = DiskCache(tmp_path / "c.sqlite", ttl=0.05)
+    c.set("a", b"1")
+    c.set("b", b"2", ttl=60)
+    c.set("c", b"3", ttl=NEVER_EXPIRE)
+    time.sleep(0.1)
+    assert c.get("a") is None
+    assert c.get("b") == b"2"
+    assert c.get("c") == b"3"
+
+
+def test_lru_eviction_by_size(tmp_path):
+    c = DiskCache(tmp_path / "c.sqlite", max_bytes=30)
+    c.set("a", b"x" * 10)
+    time.sleep(0.01)
+    c.set("b", b"x" * 10)
+    time.sleep(0.01)
+    c.get("a")  # a becomes most recently used
+    time.sleep(0.01)
+    c.set("c", b"x" * 15)
+    assert c.get("b") is None
+    assert c.get("a") is not None and c.get("c") is not None
+    assert c.total_bytes <= 30
@@ -0,0 +1,31 @@
+from deepr.retrieval.doc_store import DocumentStore
+
+
+def test_mapping_interface(tmp_path):
+    store = DocumentStore(tmp_path / 'docs.sqlite')
+    store['a'] = {'url': 'u1', 'text': 'alpha'}
+    store['b'] = {'url': 'u2', 'text': 'beta'}
+    assert len(store) == 2 and 'a' in store and 'z' not in store
+    assert list(store) == ['a', 'b']
+    assert store['a']['text'] == 'alpha'
+    del store['a']
+    assert 'a' not in store and store.get('a') is None
+
+
+def test_bodies_spill_and_load_lazily(tmp_path):
+    store = DocumentStore(tmp_path / 'docs.sqlite', hot_size=2)
+    for i in range(10):
+        store[f'd{i}'] = {'url': f'u{i}', 'text': 'x' * 1000 + str(i)}
+    assert len(store._hot) == 2
+    assert store.meta('d0') == {'url': 'u0'}  # no body in memory
+    assert store['d0']['text'].endswith('0')
+    assert 'd0' in store._hot and len(store._hot) == 2
+
+
+def test_reopen_restores_documents(tmp_path):
+    path = tmp_path / 'docs.sqlite'
+    store = DocumentStore(path)
+    store['a'] = {'url': 'u1', 'text': 'alpha', 'score': 0.5}
+    store.close()
+    reopened = DocumentStore(path)
+    assert reopened['a'] == {'url': 'u1', 'text': 'alpha', 'score': 0.5}
@@ -0,0 +1,55 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from deepr.agents.provider_selector import get_embedding_provider
+from deepr.config.settings import DeepRSettings
+from deepr.models.embedding_provider import HashingEmbeddingProvider
+from deepr.utils.disk_cache import DiskCache
+
+
+class CountingProvider(HashingEmbeddingProvider):
+    def __init__(self, **kw):
+        super().__init__(**kw)
+        self.batches = []
+
+    def _encode(self, texts):
+        self.batches.append(list(texts))
+        return super()._encode(texts)
+
+
+def test_hashing_embeddings_are_deterministic_float32():
+    p = HashingEmbeddingProvider(dim=64)
+    v = p.embed(['the cat sat', 'a dog ran', 'the cat sat'])
+    assert v.shape == (3, 64) and v.dtype == np.float32 and v.flags['C_CONTIGUOUS']
+    assert np.allclose(v[0], v[2])
+    assert np.allclose(v, HashingEmbeddingProvider(dim=64).embed(['the cat sat', 'a dog ran', 'the cat sat']))
+    assert np.isclose(np.linalg.norm(v[0]), 1.0)
+    assert float(v[0] @ p.embed_one('cat sat')) > float(v[0] @ v[1])
+
+
+def test_batches_by_batch_size_and_dedupes():
+    p = CountingProvider(dim=16, batch_size=2)
+    p.embed(['a', 'b', 'a', 'c', 'd', 'e'])
+    assert [len(b) for b in p.batches] == [2, 2, 1]
+
+
+def test_disk_cache_skips_unchanged_text(tmp_path):
+    cache = DiskCache(tmp_path / 'emb.sqlite')
+    p = CountingProvider(dim=16, cache=cache)
+    first = p.embed(['one', 'two'])
+    p2 = CountingProvider(dim=16, cache=cache)
+    again = p2.embed(['two', 'three', 'one'])
+    assert p2.batches == [['three']]
+    assert np.allclose(again[0], first[1]) and np.allclose(again[2], first[0])
+
+
+def test_selector_builds_hashing_backend(tmp_path):
+    s = DeepRSettings()
+    s.cache_dir = tmp_path
+    s.embedding.provider = 'hashing'
+    s.embedding.dim = 32
+    s.concurrency.embed_batch_size = 8
+    p = get_embedding_provider(s)
+    assert isinstance(p, HashingEmbeddingProvider)
+    assert p.dim == 32 and p.batch_size == 8 and p.cache is not None
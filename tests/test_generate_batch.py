@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Batch generation API tests."""
+from __future__ import annotations
+
+import json
+import threading
+import time
+
+import pytest
+
+from deepr.models.llm_provider import LMStudioProvider, ModelProvider
+
+
+class SlowProvider(ModelProvider):
+    def __init__(self) -> None:
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt: str) -> str:
+        if prompt == "bad":
+            raise ValueError("bad prompt")
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02)
+        with self._lock:
+            self.active -= 1
+        return prompt.upper()
+
+
+def test_generate_batch_ordered_with_per_item_errors():
+    p = SlowProvider()
+    res = p.generate_batch(["a", "bad", "c", "d", "e"], max_concurrency=2)
+    assert [r.text for r in res] == ["A", None, "C", "D", "E"]
+    assert not res[1].ok and isinstance(res[1].error, ValueError)
+    assert p.peak <= 2
+
+
+@pytest.mark.asyncio
+async def test_agenerate_batch():
+    p = SlowProvider()
+    res = await p.agenerate_batch(["x", "bad", "y"], max_concurrency=3)
+    assert [r.ok for r in res] == [True, False, True]
+    assert res[2].text == "Y"
+
+
+respx = pytest.importorskip("respx")
+
+
+@respx.mock
+def test_lmstudio_server_side_batch():
+    def reply(request):
+        prompts = json.loads(request.content)["prompt"]
+        choices = [{"index": i, "text": p.upper()} for i, p in reversed(list(enumerate(prompts)))]
+        return respx.MockResponse(json={"choices": choices})
+
+    route = respx.post("http://localhost:1234/v1/completions").mock(side_effect=reply)
+    p = LMStudioProvider()
+    p.server_batch_size = 2
+    res = p.generate_batch(["a", "b", "c"])
+    assert [r.text for r in res] == ["A", "B", "C"]
+    assert route.call_count == 2
+
+
+@respx.mock
+def test_lmstudio_batch_falls_back_to_per_prompt():
+    def reply(request):
+        body = json.loads(request.content)
+        if isinstance(body.get("prompt"), list):
+            return respx.MockResponse(status_code=400)
+        return respx.MockResponse(json={"choices": [{"message": {"content": "ok"}}]})
+
+    respx.post(url__regex=r"http://localhost:1234/.*").mock(side_effect=reply)
+    p = LMStudioProvider()
+    res = p.generate_batch(["a", "b"])
+    assert [r.text for r in res] == ["ok", "ok"]
+    assert not p._server_batching()
+
+
+@respx.mock
+def test_lmstudio_transient_batch_error_keeps_batching_enabled():
+    calls = {"batch": 0}
+
+    def reply(request):
+        body = json.loads(request.content)
+        if isinstance(body.get("prompt"), list):
+            calls["batch"] += 1
+            if calls["batch"] == 1:
+                return respx.MockResponse(status_code=503)
+            return respx.MockResponse(json={"choices": [{"index": i, "text": "B"} for i in range(len(body["prompt"]))]})
+        return respx.MockResponse(json={"choices": [{"message": {"content": "ok"}}]})
+
+    respx.post(url__regex=r"http://localhost:1234/.*").mock(side_effect=reply)
+    p = LMStudioProvider()
+    assert [r.text for r in p.generate_batch(["a", "b"])] == ["ok", "ok"]
+    assert p._server_batching()  # a 503 is not "unsupported"
+    assert [r.text for r in p.generate_batch(["a", "b"])] == ["B", "B"]
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from deepr.ingestion.chunking import Chunker
+from deepr.ingestion.normalizer import normalize_document, normalize_text
+from deepr.ingestion.pipeline import IngestionPipeline
+from deepr.models.embedding_provider import HashingEmbeddingProvider
+from deepr.retrieval.vector_store import VectorStore
+
+
+def test_normalize_html_document():
+    doc = normalize_document({'html': '<html><script>x()</script><p>Hello&nbsp;<b>world</b></p><p>Bye</p></html>'})
+    assert doc['text'] == 'Hello world\n\nBye'
+    assert 'html' not in doc
+    assert normalize_text('a \t b\n\n\n\nc\x00') == 'a b\n\nc'
+
+
+@pytest.mark.asyncio
+async def test_pipeline_fetches_chunks_and_indexes():
+    async def fetch(url):
+        await asyncio.sleep(0)
+        if url.endswith('bad'):
+            raise RuntimeError('boom')
+        if url.endswith('skip'):
+            return None
+        return {'url': url, 'text': f'page {url} ' * 50}
+
+    emb = HashingEmbeddingProvider(dim=32)
+    store = VectorStore(32)
+    docs = {}
+    pipe = IngestionPipeline(fetch, emb, store, documents=docs, embed_batch_size=3, chunker=Chunker(50, 0))
+    stats = await pipe.run([f'http://x/{i}' for i in range(10)] + ['http://x/bad', 'http://x/skip'])
+    assert (stats.sources, stats.fetched, stats.failed) == (12, 10, 1)
+    assert stats.chunks == stats.embedded == len(store) > 10
+    assert len(docs) == 10
+    doc = next(iter(docs.values()))
+    assert doc['chunks'][0]['chunk_id'].endswith('#0')
+
+
+@pytest.mark.asyncio
+async def test_pipeline_bounds_in_flight_fetches_and_accepts_async_sources():
+    in_flight = 0
+    peak = 0
+
+    async def fetch(url):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return {'id': url, 'text': 'hello world'}
+
+    async def sources():
+        for i in range(40):
+            yield f's{i}'
+
+    store = VectorStore(16)
+    pipe = IngestionPipeline(fetch, HashingEmbeddingProvider(dim=16), store, max_fetch_parallel=3)
+    stats = await pipe.run(sources())
+    assert peak <= 3 and stats.embedded == 40 and 's7#0' in store
@@ -0,0 +1,60 @@
+import pytest
+
+from deepr.agents.provider_selector import get_provider
+from deepr.config.settings import DeepRSettings
+from deepr.models.cache import CachedProvider
+from deepr.models.llm_provider import ModelProvider
+from deepr.utils.disk_cache import DiskCache
+
+
+class CountingProvider(ModelProvider):
+    def __init__(self, model: str = "m", temperature: float = 0.0) -> None:
+        self.model = model
+        self.temperature = temperature
+        self.calls = 0
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        return prompt.upper()
+
+    def stream(self, prompt: str):
+        self.calls += 1
+        yield from prompt.upper().split(" ")
+
+
+def test_generate_served_from_cache(tmp_path):
+    inner = CountingProvider()
+    p = CachedProvider(inner, DiskCache(tmp_path / "llm.sqlite"))
+    assert p.generate("hi there") == "HI THERE"
+    assert p.generate("hi there") == "HI THERE"
+    assert inner.calls == 1
+    # key includes generation settings
+    inner.temperature = 0.7
+    p.generate("hi there")
+    assert inner.calls == 2
+
+
+def test_stream_replays_chunks(tmp_path):
+    inner = CountingProvider()
+    p = CachedProvider(inner, DiskCache(tmp_path / "llm.sqlite"))
+    assert list(p.stream("a b c")) == ["A", "B", "C"]
+    assert list(p.stream("a b c")) == ["A", "B", "C"]
+    assert p.generate("a b c") == "ABC"
+    assert inner.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_async_paths_share_cache(tmp_path):
+    inner = CountingProvider()
+    p = CachedProvider(inner, DiskCache(tmp_path / "llm.sqlite"))
+    assert await p.agenerate("x") == "X"
+    assert [c async for c in p.astream("x")] == ["X"]
+    assert inner.calls == 1
+
+
+def test_selector_wraps_when_enabled(tmp_path):
+    s = DeepRSettings(cache_dir=tmp_path)
+    s.cache.llm_responses = True
+    p = get_provider(s)
+    assert isinstance(p, CachedProvider)
+    assert p.model == s.model.model
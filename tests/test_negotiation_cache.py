@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""LMStudioProvider endpoint negotiation cache tests."""
+from __future__ import annotations
+
+import pytest
+respx = pytest.importorskip("respx")
+
+from deepr.models.llm_provider import LMStudioProvider
+from deepr.models.negotiation import EndpointRoute, NegotiationCache
+
+
+@respx.mock
+def test_generate_remembers_working_route():
+    chat = respx.post("http://localhost:1234/v1/chat/completions").respond(status_code=404)
+    comp = respx.post("http://localhost:1234/v1/completions").respond(json={"choices": [{"text": "4"}]})
+    p = LMStudioProvider()
+    assert p.generate("2+2=") == "4"
+    probes = chat.call_count
+    assert p.routes.get(p.base_url, p.model, "generate").path == "/v1/completions"
+
+    assert p.generate("3+1=") == "4"
+    assert chat.call_count == probes  # no re-probing once negotiated
+    assert comp.call_count == 2
+
+
+@respx.mock
+def test_generate_reprobes_when_route_fails():
+    routes = NegotiationCache()
+    routes.remember("http://localhost:1234", "glm-4.5-air-dwq", "generate", EndpointRoute("/v1/completions", "completion"))
+    respx.post("http://localhost:1234/v1/completions").respond(status_code=500)
+    respx.post("http://localhost:1234/v1/chat/completions").respond(json={"choices": [{"message": {"content": "ok"}}]})
+    p = LMStudioProvider(routes=routes)
+    assert p.generate("hi") == "ok"
+    assert routes.get(p.base_url, p.model, "generate") == EndpointRoute("/v1/chat/completions", "chat")
+
+
+@respx.mock
+def test_stream_route_and_format_remembered():
+    sse = b'data: {"choices": [{"delta":{"content":"4"}}]}\ndata: [DONE]\n'
+    respx.post("http://localhost:1234/v1/chat/completions").respond(status_code=404)
+    comp = respx.post("http://localhost:1234/v1/completions").respond(content=sse)
+    p = LMStudioProvider()
+    assert list(p.stream("2+2=")) == ["4"]
+    assert p.routes.get(p.base_url, p.model, "stream") == EndpointRoute("/v1/completions", "chat", "sse")
+
+
+def test_persisted_routes_survive_reload(tmp_path):
+    path = tmp_path / "routes.json"
+    a = NegotiationCache(path)
+    a.remember("http://h:1/", "m", "generate", EndpointRoute("/v1/completions", "completion"))
+    a.remember("http://h:1", "m", "stream", EndpointRoute(None), persist=False)
+
+    b = NegotiationCache(path)
+    assert b.get("http://h:1", "m", "generate") == EndpointRoute("/v1/completions", "completion")
+    assert b.get("http://h:1", "m", "stream") is None
+
+    b.forget("http://h:1", "m")
+    assert NegotiationCache(path).get("http://h:1", "m", "generate") is None
@@ -0,0 +1,102 @@
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from deepr.models.embedding_provider import HashingEmbeddingProvider
+from deepr.pkb.indexer import PKBIndexer
+
+
+class CountingEmbedder(HashingEmbeddingProvider):
+    def __init__(self):
+        super().__init__(dim=32)
+        self.embedded = 0
+
+    def _encode(self, texts):
+        self.embedded += len(texts)
+        return super()._encode(texts)
+
+
+def _kb(tmp_path, n=3):
+    kb = tmp_path / 'kb'
+    (kb / 'sub').mkdir(parents=True)
+    for i in range(n):
+        (kb / 'sub' / f'note{i}.md').write_text(f'note {i} about topic{i} ' * 5)
+    (kb / 'image.png').write_bytes(b'\x89PNG')
+    return kb
+
+
+def _indexer(tmp_path, kb, emb, **kw):
+    return PKBIndexer([kb], emb, tmp_path / 'index', **kw)
+
+
+def test_index_then_noop_reindex(tmp_path):
+    kb = _kb(tmp_path)
+    emb = CountingEmbedder()
+    stats = _indexer(tmp_path, kb, emb).index()
+    assert (stats.scanned, stats.updated, stats.chunks_added) == (3, 3, 3)
+    assert emb.embedded == 3
+
+    emb2 = CountingEmbedder()
+    again = _indexer(tmp_path, kb, emb2)
+    stats = again.index()
+    assert (stats.unchanged, stats.updated) == (3, 0) and emb2.embedded == 0
+    hit = again.search('topic1', k=1)[0][0]
+    assert hit.endswith('note1.md#0')
+
+
+def test_only_changed_and_deleted_files_are_processed(tmp_path):
+    kb = _kb(tmp_path)
+    _indexer(tmp_path, kb, CountingEmbedder()).index()
+    (kb / 'sub' / 'note0.md').write_text('rewritten text about zebras')
+    (kb / 'sub' / 'note2.md').unlink()
+    f1 = kb / 'sub' / 'note1.md'
+    st = f1.stat()
+    os.utime(f1, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))  # touched, same content
+
+    emb = CountingEmbedder()
+    idx = _indexer(tmp_path, kb, emb)
+    stats = idx.index()
+    assert (stats.updated, stats.removed, stats.unchanged) == (1, 1, 1)
+    assert emb.embedded == 1
+    assert len(idx.store) == 2
+    assert idx.search('zebras', k=1)[0][0].endswith('note0.md#0')
+
+
+def test_process_pool_path(tmp_path):
+    kb = _kb(tmp_path, n=12)
+    idx = _indexer(tmp_path, kb, CountingEmbedder(), max_workers=2, embed_flush=5)
+    stats = idx.index()
+    assert stats.updated == 12 and len(idx.store) == 12
+
+
+def test_repeated_edits_keep_store_bounded(tmp_path):
+    kb = _kb(tmp_path)
+    note = kb / 'sub' / 'note0.md'
+    sizes = []
+    for i in range(12):
+        note.write_text(f'edit {i} about zebras ' * 5)
+        st = note.stat()
+        os.utime(note, ns=(st.st_atime_ns, st.st_mtime_ns + i * 10**9))
+        idx = _indexer(tmp_path, kb, CountingEmbedder())
+        assert idx.index().updated == (3 if i == 0 else 1)
+        assert len(idx.store) == 3
+        assert idx.store.tombstones <= 1
+        sizes.append((tmp_path / 'index' / 'vectors' / 'vectors.npy').stat().st_size)
+    assert len(set(sizes)) == 1  # tombstones are compacted away: no growth
+    assert idx.search('edit 11 zebras', k=1)[0][0].endswith('note0.md#0')
+
+
+def test_ivf_index_built_past_threshold(tmp_path):
+    kb = _kb(tmp_path, n=4)
+    idx = _indexer(tmp_path, kb, CountingEmbedder(), ivf_threshold=4)
+    idx.index()
+    assert idx.store.indexed and idx.store.unindexed == 0
+
+    (kb / 'sub' / 'note0.md').write_text('rewritten text about zebras')
+    again = _indexer(tmp_path, kb, CountingEmbedder(), ivf_threshold=4)
+    assert again.store.indexed
+    again.index()
+    assert again.store.unindexed == 0 and again.store.tombstones == 0
+    assert again.search('zebras', k=1)[0][0].endswith('note0.md#0')
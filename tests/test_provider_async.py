@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Async provider API tests (agenerate / astream) using respx."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+respx = pytest.importorskip("respx")
+
+from deepr.models.llm_provider import DummyProvider, LMStudioProvider, OllamaProvider
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_ollama_agenerate_streaming():
+    route = respx.post("http://localhost:11434/api/generate").respond(
+        content=b'{"response":"The answer is "}\n{"response":"4"}\n'
+    )
+    async with OllamaProvider() as p:
+        out = await p.agenerate("Please answer: 2+2=")
+    assert out == "The answer is 4"
+    assert route.called
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_lmstudio_agenerate_falls_back_to_completion():
+    respx.post("http://localhost:1234/v1/chat/completions").respond(status_code=500)
+    respx.post("http://localhost:1234/v1/completions").respond(json={"choices": [{"text": "4"}]})
+    async with LMStudioProvider() as p:
+        assert await p.agenerate("2+2=") == "4"
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_lmstudio_astream_sse():
+    sse = b'data: {"choices": [{"delta":{"content":"The answer is "}}]}\ndata: {"choices": [{"delta":{"content":"4"}}]}\ndata: [DONE]\n'
+    respx.post("http://localhost:1234/v1/chat/completions").respond(
+        content=sse, headers={"Content-Type": "text/event-stream"}
+    )
+    async with LMStudioProvider() as p:
+        chunks = [c async for c in p.astream("2+2=")]
+    assert chunks == ["The answer is ", "4"]
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_concurrent_agenerate_shares_one_client():
+    respx.post("http://localhost:11434/api/generate").respond(json={"text": "ok"})
+    async with OllamaProvider(max_connections=4) as p:
+        outs = await asyncio.gather(*(p.agenerate(f"q{i}") for i in range(10)))
+        assert p._async_client is not None
+    assert outs == ["ok"] * 10
+
+
+@pytest.mark.asyncio
+async def test_default_async_api_wraps_sync():
+    p = DummyProvider()
+    assert await p.agenerate("hello") == "echo: hello"
+    assert [c async for c in p.astream("hello")] == ["echo: hello"]
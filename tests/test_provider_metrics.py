@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Token/latency instrumentation tests for provider calls."""
+from __future__ import annotations
+
+import logging
+
+import pytest
+respx = pytest.importorskip("respx")
+
+from deepr.agents.provider_selector import get_provider
+from deepr.config.settings import DeepRSettings, ModelEndpoint
+from deepr.models.llm_provider import LMStudioProvider, OllamaProvider
+from deepr.models.metrics import RunMetrics
+
+
+@respx.mock
+def test_ollama_stream_records_eval_counts():
+    respx.post("http://localhost:11434/api/generate").respond(
+        content=b'{"response":"4"}\n{"response":"","done":true,"prompt_eval_count":12,"eval_count":8,"eval_duration":400000000}\n'
+    )
+    seen = []
+    p = OllamaProvider()
+    p.add_metrics_hook(seen.append)
+    assert list(p.stream("2+2=")) == ["4"]
+    m = seen[0]
+    assert (m.kind, m.prompt_tokens, m.completion_tokens) == ("stream", 12, 8)
+    assert m.tokens_per_second == pytest.approx(20.0)
+    assert m.ttft is not None and m.ok
+
+
+@respx.mock
+def test_lmstudio_usage_and_retries(caplog):
+    respx.post("http://localhost:1234/v1/chat/completions").respond(status_code=500)
+    respx.post("http://localhost:1234/v1/completions").respond(
+        json={"choices": [{"text": "4"}], "usage": {"prompt_tokens": 5, "completion_tokens": 1}}
+    )
+    run = RunMetrics(run_id="r1")
+    p = LMStudioProvider()
+    p.add_metrics_hook(run)
+    with caplog.at_level(logging.INFO, logger="deepr.metrics"):
+        assert p.generate("2+2=") == "4"
+    summary = run.summary()
+    assert summary["calls"] == 1
+    assert summary["prompt_tokens"] == 5 and summary["completion_tokens"] == 1
+    assert summary["retries"] >= 1
+    assert "LMStudioProvider:glm-4.5-air-dwq" in summary["by_model"]
+    rec = [r for r in caplog.records if r.msg == "llm_call"][0]
+    assert rec.llm["completion_tokens"] == 1
+
+
+@respx.mock
+def test_failed_call_is_recorded():
+    respx.post("http://localhost:11434/api/generate").respond(status_code=503)
+    run = RunMetrics()
+    p = OllamaProvider()
+    p.add_metrics_hook(run)
+    with pytest.raises(Exception):
+        p.generate("x")
+    assert run.summary()["errors"] == 1
+
+
+@respx.mock
+def test_hooks_reach_backends_through_wrappers(tmp_path):
+    respx.post("http://gpu1:11434/api/generate").respond(
+        json={"response": "4", "done": True, "prompt_eval_count": 3, "eval_count": 1}
+    )
+    s = DeepRSettings(cache_dir=tmp_path)
+    s.model.endpoints = [ModelEndpoint(base_url="http://gpu1:11434")]
+    s.cache.llm_responses = True
+    run = RunMetrics()
+    p = get_provider(s, metrics=run)
+    seen = []
+    p.add_metrics_hook(seen.append)
+    assert p.generate("2+2=") == "4"
+    assert p.generate("2+2=") == "4"  # served from the cache: no backend call
+    assert run.summary()["calls"] == 1 and run.summary()["completion_tokens"] == 1
+    assert [m.provider for m in seen] == ["OllamaProvider"]
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Connection-pool lifecycle tests for the HTTP-backed providers."""
+from __future__ import annotations
+
+import pytest
+respx = pytest.importorskip("respx")
+
+from deepr.agents.provider_selector import get_provider
+from deepr.config.settings import DeepRSettings
+from deepr.models.llm_provider import LMStudioProvider, OllamaProvider
+
+
+@respx.mock
+def test_client_reused_across_calls():
+    respx.post("http://localhost:11434/api/generate").respond(json={"text": "4"})
+    p = OllamaProvider()
+    p.generate("a")
+    client = p._client
+    p.generate("b")
+    assert client is not None
+    assert p._client is client
+
+
+@respx.mock
+def test_close_and_context_manager():
+    respx.get("http://localhost:1234/v1/models").respond(json={"data": [{"id": "m"}]})
+    with LMStudioProvider(max_connections=2) as p:
+        assert p.list_models() == ["m"]
+        assert p._client is not None
+    assert p._client is None
+    # provider stays usable after close; a fresh pool is created
+    assert p.list_models() == ["m"]
+    p.close()
+
+
+def test_selector_sizes_pool_from_concurrency():
+    s = DeepRSettings()
+    s.concurrency.max_llm_parallel = 7
+    p = get_provider(s)
+    assert p.max_connections == 7
+    assert p.max_keepalive_connections == 7
@@ -0,0 +1,137 @@
+import json
+
+import pytest
+
+respx = pytest.importorskip("respx")
+
+from deepr.models.cache import CachedProvider
+from deepr.models.llm_provider import LMStudioProvider, ModelProvider, OllamaProvider
+from deepr.models.negotiation import NegotiationCache
+from deepr.models.router import RouterProvider
+from deepr.utils.disk_cache import DiskCache
+
+SYSTEM = "You are the Researcher."
+
+
+def _ndjson(*objs):
+    return b"".join(json.dumps(o).encode() + b"\n" for o in objs)
+
+
+@respx.mock
+def test_ollama_session_splits_system_and_keeps_model_loaded():
+    route = respx.post("http://localhost:11434/api/generate").respond(
+        content=_ndjson({"response": "ok"}, {"response": "", "done": True, "context": [1, 2, 3]})
+    )
+    p = OllamaProvider(keep_alive="5m")
+    s = p.session("researcher", SYSTEM, keep_alive="30m")
+    assert s.generate("task 1") == "ok"
+    body = json.loads(route.calls[0].request.content)
+    assert body["system"] == SYSTEM and body["prompt"] == "task 1"
+    assert body["keep_alive"] == "30m" and "context" not in body
+    assert s.context == [1, 2, 3] and s.calls == 1
+
+    s.generate("task 2")  # without carry_context every call resends the (cached) system prefix
+    body = json.loads(route.calls[1].request.content)
+    assert body["system"] == SYSTEM and "context" not in body
+
+
+@respx.mock
+@pytest.mark.asyncio
+async def test_ollama_session_carries_context():
+    route = respx.post("http://localhost:11434/api/generate").mock(
+        side_effect=[
+            respx.MockResponse(200, content=_ndjson({"response": "a", "done": True, "context": [7, 8]})),
+            respx.MockResponse(200, content=_ndjson({"response": "b", "done": True, "context": [7, 8, 9]})),
+        ]
+    )
+    p = OllamaProvider()
+    s = p.session("synthesizer", SYSTEM, carry_context=True)
+    assert await s.agenerate("first") == "a"
+    assert await s.agenerate("second") == "b"
+    second = json.loads(route.calls[1].request.content)
+    assert second["context"] == [7, 8] and "system" not in second and "keep_alive" not in second
+    assert s.context == [7, 8, 9]
+    s.reset()
+    assert s.context is None
+    await p.aclose()
+
+
+@respx.mock
+def test_structured_call_with_carried_context_still_sends_schema_instruction():
+    route = respx.post("http://localhost:11434/api/generate").mock(
+        side_effect=[
+            respx.MockResponse(200, content=_ndjson({"response": "a", "done": True, "context": [7, 8]})),
+            respx.MockResponse(200, content=_ndjson({"response": '{"x": 1}', "done": True, "context": [7, 8, 9]})),
+        ]
+    )
+    p = OllamaProvider()
+    s = p.session("planner", SYSTEM, carry_context=True)
+    s.generate("first")
+    schema = {"type": "object"}
+    assert p.generate_json("plan", schema, system=SYSTEM, session=s) == {"x": 1}
+    body = json.loads(route.calls[1].request.content)
+    assert body["context"] == [7, 8] and body["format"] == schema
+    assert body["system"].startswith(SYSTEM) and "JSON schema" in body["system"]
+
+
+@respx.mock
+def test_lmstudio_chat_payload_has_system_message(tmp_path):
+    route = respx.post("http://localhost:1234/v1/chat/completions").respond(
+        json={"choices": [{"message": {"content": "done"}}]}
+    )
+    p = LMStudioProvider(routes=NegotiationCache(tmp_path / "routes.json"))
+    assert p.session("critic", SYSTEM).generate("check this") == "done"
+    messages = json.loads(route.calls[0].request.content)["messages"]
+    assert messages == [{"role": "system", "content": SYSTEM}, {"role": "user", "content": "check this"}]
+
+
+class Recorder(ModelProvider):
+    def __init__(self, name="r"):
+        self.name = name
+        self.seen = []
+
+    def generate(self, prompt):
+        self.seen.append(prompt)
+        return self.name
+
+    def generate_chat(self, system, prompt, session=None):
+        self.seen.append((system, prompt))
+        return self.name
+
+
+def test_default_generate_chat_joins_prompt_and_cache_keys_on_both(tmp_path):
+    class Plain(ModelProvider):
+        def generate(self, prompt):
+            return prompt
+
+    assert Plain().generate_chat("SYS", "hi") == "SYS\n\nhi"
+    inner = Recorder()
+    cached = CachedProvider(inner, DiskCache(tmp_path / "c.sqlite"))
+    cached.generate_chat("A", "q")
+    cached.generate_chat("A", "q")
+    cached.generate_chat("B", "q")
+    assert inner.seen == [("A", "q"), ("B", "q")]
+    cached.generate("A\n\nq")  # same text as the joined chat prompt, different call
+    assert inner.seen[-1] == "A\n\nq"
+
+
+def test_budgeted_chat_keeps_session_and_charges_budget():
+    from deepr.agents.policies import BudgetController
+    from deepr.config.settings import BudgetConfig
+
+    inner = Recorder("answer")
+    budget = BudgetController(BudgetConfig(max_tokens=1000))
+    s = budget.wrap(inner).session("researcher", SYSTEM)
+    assert s.generate("task") == "answer"
+    assert inner.seen == [(SYSTEM, "task")]
+    assert budget.tokens_used > 0
+
+
+def test_router_keeps_session_on_one_backend():
+    a, b = Recorder("a"), Recorder("b")
+    r = RouterProvider([a, b])
+    s1, s2 = r.session("researcher", SYSTEM), r.session("critic", SYSTEM)
+    outs1 = [s1.generate(f"t{i}") for i in range(3)]
+    outs2 = [s2.generate(f"t{i}") for i in range(3)]
+    assert len(set(outs1)) == 1 and len(set(outs2)) == 1
+    assert {outs1[0], outs2[0]} == {"a", "b"}
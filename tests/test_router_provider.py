@@ -0,0 +1,88 @@
+import pytest
+
+from deepr.agents.provider_selector import get_provider
+from deepr.config.settings import DeepRSettings, ModelEndpoint
+from deepr.models.llm_provider import ModelProvider
+from deepr.models.router import RouterProvider
+
+
+class FakeBackend(ModelProvider):
+    def __init__(self, name: str, fail: bool = False, models=("m",)) -> None:
+        self.name = name
+        self.fail = fail
+        self.models = list(models)
+        self.calls = 0
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError(f"{self.name} down")
+        return self.name
+
+    def list_models(self) -> list[str]:
+        if self.fail:
+            raise ConnectionError("down")
+        return self.models
+
+
+def test_spreads_requests_across_backends():
+    a, b = FakeBackend("a"), FakeBackend("b")
+    r = RouterProvider([a, b])
+    outs = [r.generate("q") for _ in range(6)]
+    assert a.calls == 3 and b.calls == 3
+    assert set(outs) == {"a", "b"}
+
+
+def test_batch_fan_out_scales_with_backends():
+    a, b = FakeBackend("a"), FakeBackend("b")
+    b.batch_concurrency = 6
+    r = RouterProvider([a, b])
+    assert r.batch_concurrency == ModelProvider.batch_concurrency + 6
+    results = r.generate_batch(["q"] * 8)
+    assert all(res.ok for res in results) and a.calls + b.calls == 8
+
+
+def test_fails_over_and_cools_down_bad_backend():
+    a, b = FakeBackend("a", fail=True), FakeBackend("b")
+    r = RouterProvider([a, b], cooldown=60)
+    assert [r.generate("q") for _ in range(3)] == ["b", "b", "b"]
+    assert a.calls == 1  # skipped while cooling down
+
+
+def test_all_backends_failing_raises():
+    r = RouterProvider([FakeBackend("a", fail=True), FakeBackend("b", fail=True)])
+    with pytest.raises(RuntimeError, match="all 2 model backends failed"):
+        r.generate("q")
+
+
+def test_health_check_and_list_models():
+    a, b = FakeBackend("a", models=["x"]), FakeBackend("b", fail=True)
+    r = RouterProvider([a, b])
+    assert list(r.health_check().values()) == [True, False]
+    assert r.list_models() == ["x"]
+    assert r.generate("q") == "a"
+
+
+def test_stream_fails_over_before_first_chunk():
+    a, b = FakeBackend("a", fail=True), FakeBackend("b")
+    r = RouterProvider([a, b])
+    assert list(r.stream("q")) == ["b"]
+
+
+@pytest.mark.asyncio
+async def test_agenerate_fails_over():
+    r = RouterProvider([FakeBackend("a", fail=True), FakeBackend("b")])
+    assert await r.agenerate("q") == "b"
+
+
+def test_selector_builds_router_from_endpoints():
+    s = DeepRSettings()
+    s.model.endpoints = [
+        ModelEndpoint(base_url="http://gpu1:11434"),
+        ModelEndpoint(provider="lmstudio", base_url="http://gpu2:1234", model="other"),
+    ]
+    p = get_provider(s)
+    assert isinstance(p, RouterProvider)
+    urls = [b.provider.base_url for b in p.backends]
+    assert urls == ["http://gpu1:11434", "http://gpu2:1234"]
+    assert p.backends[1].provider.model == "other"
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from deepr.graph.scheduler import TaskScheduler
+from deepr.graph.state import SharedGraphState
+
+
+def test_priority_then_fifo():
+    s = TaskScheduler()
+    s.add({"id": "p1"})
+    s.add({"id": "p2"})
+    s.add({"id": "r1", "kind": "refinement"})
+    s.add({"id": "urgent", "priority": 0})
+    assert [s.pop()["id"] for _ in range(4)] == ["urgent", "r1", "p1", "p2"]
+    assert s.pop() is None
+
+
+def test_dependencies_release_on_complete():
+    s = TaskScheduler([{"id": "b", "depends_on": ["a"]}, {"id": "a"}])
+    assert len(s) == 2 and s.blocked == ["b"]
+    assert s.pop()["id"] == "a"
+    assert s.pop() is None
+    s.complete("a")
+    assert s.pop()["id"] == "b"
+
+
+def test_state_uses_scheduler():
+    st = SharedGraphState(run_id="r1")
+    st.add_task({"id": "t1"})
+    st.add_task({"id": "t2", "depends_on": ["t1"]})
+    assert st.next_task()["id"] == "t1"
+    assert st.next_task() is None
+    st.complete_task("t1")
+    assert st.next_task()["id"] == "t2"
+
+
+@pytest.mark.asyncio
+async def test_run_dispatches_independent_tasks_in_parallel():
+    s = TaskScheduler([{"id": f"t{i}"} for i in range(6)] + [{"id": "final", "depends_on": ["t0", "t5"]}])
+    active = 0
+    peak = 0
+
+    async def worker(task):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        if task["id"] == "t1":
+            s.add({"id": "refine", "kind": "refinement"})
+        if task["id"] == "t2":
+            raise RuntimeError("boom")
+        return task["id"].upper()
+
+    results = await s.run(worker, max_parallel=3)
+    assert peak == 3
+    assert results["final"] == "FINAL" and results["refine"] == "REFINE"
+    assert isinstance(results["t2"], RuntimeError)
+    assert s.failed == {"t2"}
+    assert len(s) == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_run_waits_for_workers_to_clean_up():
+    s = TaskScheduler([{"id": "a"}, {"id": "b"}])
+    cleaned = []
+
+    async def worker(task):
+        try:
+            await asyncio.sleep(10)
+        finally:
+            await asyncio.sleep(0.01)  # e.g. closing a connection
+            cleaned.append(task["id"])
+
+    run = asyncio.ensure_future(s.run(worker))
+    await asyncio.sleep(0.01)
+    run.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await run
+    assert sorted(cleaned) == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_worker_fails_its_task_only():
+    s = TaskScheduler([{"id": "a"}, {"id": "b"}, {"id": "c", "depends_on": ["b"]}])
+
+    async def worker(task):
+        if task["id"] == "a":
+            asyncio.current_task().cancel()
+            await asyncio.sleep(1)
+        return task["id"]
+
+    results = await s.run(worker)
+    assert isinstance(results["a"], asyncio.CancelledError)
+    assert results["b"] == "b" and results["c"] == "c"
+    assert s.failed == {"a"}
+
+
+def test_max_parallel_from_settings():
+    from deepr.config.settings import DeepRSettings
+
+    settings = DeepRSettings()
+    settings.concurrency.max_task_parallel = 7
+    assert TaskScheduler.from_settings(settings).max_parallel == 7
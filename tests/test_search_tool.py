@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from deepr.config.settings import DeepRSettings
+from deepr.tools.cache import CachedTool
+from deepr.tools.search import SearchInput, SearchTool, StubEngine, build_search_tool, normalize_url
+
+
+def hits(*urls, title='t'):
+    return [{'title': f'{title} {u}', 'url': u, 'snippet': f'about {u}'} for u in urls]
+
+
+def test_normalize_url():
+    assert normalize_url('http://WWW.Example.com/a/?utm_source=x&b=2&a=1#frag') == 'https://example.com/a?a=1&b=2'
+    assert normalize_url('https://example.com/a') == normalize_url('https://www.example.com/a/')
+
+
+@pytest.mark.asyncio
+async def test_merges_and_dedupes_across_engines():
+    a = StubEngine({'q': hits('https://x.com/1', 'https://x.com/2')}, name='a')
+    b = StubEngine({'q': hits('http://www.x.com/1/', 'https://y.com/3')
+                    + [{'title': 't https://x.com/2', 'url': 'https://mirror.com/2', 'snippet': 'about https://x.com/2'}]}, name='b')
+    res = await SearchTool([a, b], max_results=10).run(SearchInput(query='q'))
+    urls = [h['url'] for h in res.data]
+    assert urls[:2] == ['https://x.com/1', 'https://x.com/2']
+    assert 'https://y.com/3' in urls and len(urls) == 3  # url dup and near-dup mirror dropped
+    assert {h['engine'] for h in res.data} == {'a', 'b'}
+
+
+@pytest.mark.asyncio
+async def test_returns_when_enough_results_without_waiting_for_slow_engine():
+    fast = StubEngine(lambda q: hits(*[f'https://f.com/{i}' for i in range(5)]), name='fast')
+    slow = StubEngine(lambda q: hits('https://s.com/1'), name='slow', delay=5)
+    loop = asyncio.get_running_loop()
+    t0 = loop.time()
+    res = await SearchTool([fast, slow], max_results=3).run(SearchInput(query='q'))
+    assert len(res.data) == 3 and loop.time() - t0 < 1
+    assert not res.partial
+
+
+@pytest.mark.asyncio
+async def test_hedge_delay_bounds_wait_for_stragglers():
+    fast = StubEngine(lambda q: hits('https://f.com/1'), name='fast')
+    slow = StubEngine(lambda q: hits('https://s.com/1'), name='slow', delay=5)
+    loop = asyncio.get_running_loop()
+    t0 = loop.time()
+    res = await SearchTool([fast, slow], max_results=8, hedge_delay=0.05).run(SearchInput(query='q'))
+    assert [h['url'] for h in res.data] == ['https://f.com/1'] and loop.time() - t0 < 1
+    assert res.partial
+
+
+@pytest.mark.asyncio
+async def test_engine_errors():
+    class Broken(StubEngine):
+        async def search(self, query, max_results):
+            raise RuntimeError('down')
+
+    ok = await SearchTool([Broken({}), StubEngine({'q': hits('https://a.com')})]).run(SearchInput(query='q'))
+    assert ok.ok and len(ok.data) == 1 and ok.partial
+    bad = await SearchTool([Broken({})]).run(SearchInput(query='q'))
+    assert not bad.ok and 'down' in bad.error
+
+
+@pytest.mark.asyncio
+async def test_build_search_tool_caches_queries(tmp_path):
+    s = DeepRSettings()
+    s.cache_dir = tmp_path
+    eng = StubEngine({'q': hits('https://a.com')})
+    tool = build_search_tool(s, engines=[eng])
+    assert isinstance(tool, CachedTool)
+    await tool.run(SearchInput(query='q'))
+    await tool.run(SearchInput(query='q'))
+    assert eng.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_partial_merges_are_cached_briefly(tmp_path):
+    s = DeepRSettings()
+    s.cache_dir = tmp_path
+    fast = StubEngine(lambda q: hits('https://f.com/1'), name='fast')
+    slow = StubEngine(lambda q: hits('https://s.com/1'), name='slow', delay=5)
+    tool = build_search_tool(s, engines=[fast, slow])
+    tool.tool.hedge_delay = 0.01
+    tool.partial_ttl = 0.05
+    assert (await tool.run(SearchInput(query='q'))).partial
+    assert (await tool.run(SearchInput(query='q'))).partial  # served from the cache
+    assert fast.calls == 1
+    await asyncio.sleep(0.1)
+    await tool.run(SearchInput(query='q'))
+    assert fast.calls == 2
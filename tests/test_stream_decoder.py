@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Tests for the incremental NDJSON/SSE line decoder and Ollama streaming."""
+from __future__ import annotations
+
+import pytest
+
+from deepr.models.streaming import LineDecoder, iter_lines, sse_data
+
+
+def test_lines_split_across_chunks():
+    d = LineDecoder()
+    assert d.feed(b'{"a":') == []
+    assert d.feed(b'1}\n{"b"') == ['{"a":1}']
+    assert d.feed(b":2}\r\n\n") == ['{"b":2}']
+    assert d.flush() == []
+
+
+def test_multibyte_character_split_between_chunks():
+    data = "héllo ✓\n".encode("utf-8")
+    chunks = [data[i:i + 1] for i in range(len(data))]
+    assert list(iter_lines(chunks)) == ["héllo ✓"]
+
+
+def test_trailing_line_without_newline_is_flushed():
+    assert list(iter_lines([b"one\ntw", b"o"])) == ["one", "two"]
+
+
+def test_sse_data():
+    assert sse_data("data: {}") == "{}"
+    assert sse_data("data:[DONE]") == "[DONE]"
+    assert sse_data("event: ping") is None
+
+
+respx = pytest.importorskip("respx")
+
+from deepr.models.llm_provider import OllamaProvider
+
+
+@respx.mock
+def test_ollama_stream_yields_tokens():
+    respx.post("http://localhost:11434/api/generate").respond(
+        content=b'{"response":"The answer is "}\n{"response":"4"}\n{"response":"","done":true}\n'
+    )
+    p = OllamaProvider()
+    assert list(p.stream("2+2=")) == ["The answer is ", "4"]
+
+
+@respx.mock
+def test_ollama_stream_falls_back_to_single_shot():
+    respx.post("http://localhost:11434/api/generate").mock(
+        side_effect=[Exception("no stream"), respx.MockResponse(json={"text": "4"})]
+    )
+    p = OllamaProvider()
+    assert list(p.stream("2+2=")) == ["4"]
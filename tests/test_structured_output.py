@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from deepr.agents.policies import BudgetController, BudgetedProvider
+from deepr.config.settings import BudgetConfig
+from deepr.models.cache import CachedProvider
+from deepr.models.llm_provider import ModelProvider
+from deepr.models.structured import IncrementalJSONParser, StructuredOutputError, extract_json, parse_structured
+from deepr.prompts.schemas import CriticOutput, PlannerOutput, ResearcherOutput
+from deepr.utils.disk_cache import DiskCache
+
+REPLY = json.dumps({
+    "task_id": "t1",
+    "actions": [
+        {"tool": "search", "input": {"query": "grid \"storage\", 2024 ]}"}},
+        {"tool": "web_fetch", "input": {"url": "https://x.com/a"}},
+    ],
+    "notes": ["n1"],
+})
+
+
+@pytest.mark.parametrize("step", [1, 2, 5, 13, 10_000])
+def test_incremental_parser_emits_items_at_any_chunking(step):
+    text = "Here you go:\n```json\n" + REPLY + "\n```"
+    parser = IncrementalJSONParser(["actions.*", "task_id"])
+    items = []
+    for i in range(0, len(text), step):
+        items.extend(parser.feed(text[i:i + step]))
+    assert [i.path for i in items] == [("task_id",), ("actions", 0), ("actions", 1)]
+    assert items[1].value["input"]["query"] == 'grid "storage", 2024 ]}'
+    assert parser.close() == json.loads(REPLY)
+
+
+def test_extract_and_validate():
+    plan = parse_structured('{"phases": [{"name": "p1", "tasks": [{"id": "1", "description": "d"}]}]} trailing', PlannerOutput)
+    assert plan.phases[0].tasks[0].id == "1"
+    assert parse_structured('{"coverage": "80%"}', CriticOutput).coverage == 80.0
+    assert extract_json("[1, 2]") == [1, 2]
+    with pytest.raises(StructuredOutputError):
+        parse_structured('{"phases": "nope"}', PlannerOutput)
+    with pytest.raises(StructuredOutputError):
+        extract_json("no json here")
+    with pytest.raises(StructuredOutputError):
+        IncrementalJSONParser().close()
+
+
+class Chunked(ModelProvider):
+    """Streams REPLY in small pieces and records the structured calls it gets."""
+
+    def __init__(self, text=REPLY, step=7):
+        self.text, self.step = text, step
+        self.calls = []
+        self.produced = 0
+
+    def generate(self, prompt):
+        self.calls.append(prompt)
+        return self.text
+
+    def _pieces(self):
+        for i in range(0, len(self.text), self.step):
+            self.produced = i + self.step
+            yield self.text[i:i + self.step]
+
+    def _stream_structured(self, system, prompt, schema):
+        self.calls.append((system, prompt, schema))
+        return self._pieces()
+
+    async def _astream_structured(self, system, prompt, schema):
+        self.calls.append((system, prompt, schema))
+        for piece in self._pieces():
+            yield piece
+
+
+@pytest.mark.asyncio
+async def test_astream_json_yields_actions_before_generation_ends():
+    provider = Chunked()
+    seen = []
+    async for item in provider.astream_json("task", ResearcherOutput, paths=["actions.*"]):
+        seen.append((item.path, provider.produced < len(REPLY)))
+    assert seen[0] == (("actions", 0), True)  # dispatchable while the model is still writing
+    assert seen[-1][0] == ()
+    final = [i async for i in provider.astream_json("task", ResearcherOutput)][-1].value
+    assert isinstance(final, ResearcherOutput) and final.actions[1].tool == "web_fetch"
+
+
+def test_default_generate_json_asks_for_json_in_prompt():
+    provider = Chunked()
+    out = provider.generate_json("task", ResearcherOutput, system="You are the Researcher.")
+    assert out.task_id == "t1"
+    prompt = provider.calls[0]
+    assert prompt.startswith("You are the Researcher.") and '"ResearcherOutput"' in prompt
+
+
+def test_cached_and_budgeted_wrappers_keep_structured_path(tmp_path):
+    inner = Chunked()
+    cached = CachedProvider(inner, DiskCache(tmp_path / "c.sqlite"))
+    first = list(cached.stream_json("task", ResearcherOutput))[-1].value
+    again = list(cached.stream_json("task", ResearcherOutput))[-1].value
+    assert first == again and len(inner.calls) == 1
+
+    budgeted = BudgetedProvider(Chunked(), BudgetController(BudgetConfig(max_tokens=10_000)))
+    assert budgeted.generate_json("task", ResearcherOutput).notes == ["n1"]
+    assert budgeted.controller.tokens_used > 0
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+respx = pytest.importorskip("respx")
+
+from deepr.models.llm_provider import LMStudioProvider, OllamaProvider
+from deepr.models.negotiation import NegotiationCache
+from deepr.prompts.schemas import PlannerOutput, ResearcherOutput
+
+PLAN = {"phases": [{"name": "scan", "goals": [], "tasks": [{"id": "1", "description": "d"}]}]}
+
+
+@respx.mock
+def test_ollama_generate_json_sends_schema_format():
+    route = respx.post("http://localhost:11434/api/generate").respond(
+        content=json.dumps({"response": json.dumps(PLAN), "done": True}).encode() + b"\n"
+    )
+    plan = OllamaProvider().generate_json("plan it", PlannerOutput, system="You are the Planner.")
+    assert isinstance(plan, PlannerOutput) and plan.phases[0].name == "scan"
+    body = json.loads(route.calls[0].request.content)
+    assert body["format"] == PlannerOutput.model_json_schema()
+    assert body["system"].startswith("You are the Planner.") and body["prompt"] == "plan it"
+
+
+@respx.mock
+@pytest.mark.asyncio
+async def test_ollama_astream_json_plain_json_mode():
+    reply = json.dumps({"actions": [{"tool": "search", "input": {"query": "q"}}], "notes": []})
+    lines = b"".join(json.dumps({"response": reply[i:i + 5]}).encode() + b"\n" for i in range(0, len(reply), 5))
+    route = respx.post("http://localhost:11434/api/generate").respond(content=lines)
+    p = OllamaProvider()
+    items = [i async for i in p.astream_json("go", paths=["actions.*"])]
+    assert items[0].path == ("actions", 0) and items[-1].value["notes"] == []
+    assert json.loads(route.calls[0].request.content)["format"] == "json"
+    await p.aclose()
+
+
+@respx.mock
+def test_lmstudio_generate_json_sends_response_format(tmp_path):
+    reply = {"task_id": "t", "actions": [], "notes": ["x"]}
+    route = respx.post("http://localhost:1234/v1/chat/completions").respond(
+        json={"choices": [{"message": {"content": json.dumps(reply)}}]}
+    )
+    p = LMStudioProvider(routes=NegotiationCache(tmp_path / "routes.json"))
+    out = p.generate_json("go", ResearcherOutput)
+    assert out.notes == ["x"]
+    body = json.loads(route.calls[0].request.content)
+    assert body["response_format"]["type"] == "json_schema"
+    assert body["response_format"]["json_schema"]["name"] == "ResearcherOutput"
+    assert body["messages"][0]["role"] == "system"
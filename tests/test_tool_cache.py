@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from deepr.tools import base as tb
+from deepr.tools.cache import CachedTool, cache_registry
+from deepr.utils.disk_cache import NEVER_EXPIRE, DiskCache
+
+
+class FetchInput(tb.ToolInput):
+    url: str
+    max_bytes: int = 100
+
+
+class FetchTool:
+    name = 'fetch'
+    description = 'Fake fetch'
+    InputModel = FetchInput
+
+    def __init__(self):
+        self.calls = 0
+
+    async def run(self, inp):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if inp.url == 'bad':
+            return tb.ToolResult(ok=False, error='nope')
+        return tb.ToolResult(data={'url': inp.url, 'body': 'x'})
+
+
+@pytest.mark.asyncio
+async def test_cache_hits_across_instances(tmp_path):
+    cache = DiskCache(tmp_path / 'tools.sqlite')
+    tool = FetchTool()
+    cached = CachedTool(tool, cache)
+    r1 = await cached.run(FetchInput(url='a'))
+    r2 = await CachedTool(tool, cache).run(FetchInput(url='a', max_bytes=100))
+    assert r1 == r2 and tool.calls == 1
+    await cached.run(FetchInput(url='a', max_bytes=5))
+    assert tool.calls == 2
+    assert cached.name == 'fetch' and cached.InputModel is FetchInput
+
+
+@pytest.mark.asyncio
+async def test_single_flight_dedupes_concurrent_calls(tmp_path):
+    tool = FetchTool()
+    cached = CachedTool(tool, DiskCache(tmp_path / 'tools.sqlite'))
+    results = await asyncio.gather(*(cached.run(FetchInput(url='same')) for _ in range(10)))
+    assert tool.calls == 1 and all(r.data['url'] == 'same' for r in results)
+
+
+@pytest.mark.asyncio
+async def test_errors_not_cached_and_ttl(tmp_path):
+    cache = DiskCache(tmp_path / 'tools.sqlite')
+    tool = FetchTool()
+    cached = CachedTool(tool, cache, ttl=0.05)
+    await cached.run(FetchInput(url='bad'))
+    await cached.run(FetchInput(url='bad'))
+    assert tool.calls == 2
+    await cached.run(FetchInput(url='a'))
+    await asyncio.sleep(0.1)
+    await cached.run(FetchInput(url='a'))
+    assert tool.calls == 4
+
+
+def test_cache_registry_wraps_with_per_tool_ttls(tmp_path):
+    reg = tb.ToolRegistry()
+    reg.register(FetchTool())
+    cache_registry(reg, DiskCache(tmp_path / 'tools.sqlite'), ttls={'fetch': 60})
+    wrapped = reg.get('fetch')
+    assert isinstance(wrapped, CachedTool) and wrapped.ttl == 60
+    cache_registry(reg, wrapped.cache)
+    assert not isinstance(reg.get('fetch').tool, CachedTool)
+
+
+@pytest.mark.asyncio
+async def test_none_per_tool_ttl_never_expires(tmp_path):
+    reg = tb.ToolRegistry()
+    tool = FetchTool()
+    reg.register(tool)
+    cache_registry(reg, DiskCache(tmp_path / 'tools.sqlite', ttl=0.05), ttls={'fetch': None}, default_ttl=0.05)
+    cached = reg.get('fetch')
+    assert cached.ttl == NEVER_EXPIRE
+    await cached.run(FetchInput(url='a'))
+    await asyncio.sleep(0.1)
+    await cached.run(FetchInput(url='a'))
+    assert tool.calls == 1
+
+
+def test_cache_registry_from_settings(tmp_path):
+    from deepr.config.settings import DeepRSettings
+    from deepr.tools.cache import cache_registry_from_settings
+
+    s = DeepRSettings()
+    s.cache_dir = tmp_path
+    s.cache.tool_ttls = {'fetch': 5}
+    reg = tb.ToolRegistry()
+    reg.register(FetchTool())
+    cache_registry_from_settings(reg, s)
+    assert reg.get('fetch').ttl == 5
+    s.cache.tool_results = False
+    reg2 = tb.ToolRegistry()
+    reg2.register(FetchTool())
+    assert not isinstance(cache_registry_from_settings(reg2, s).get('fetch'), CachedTool)
@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from deepr.tools import base as tb
+from deepr.tools.executor import TokenBucket, ToolExecutor, ToolLimits, parse_actions
+
+
+class SleepInput(tb.ToolInput):
+    seconds: float = 0.0
+    value: str = ''
+
+
+class SleepTool:
+    name = 'sleep'
+    description = 'Sleep then echo'
+    InputModel = SleepInput
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    async def run(self, inp):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(inp.seconds)
+        finally:
+            self.active -= 1
+        if inp.value == 'boom':
+            raise RuntimeError('boom')
+        if inp.value == 'upstream':
+            raise TimeoutError('upstream timed out')
+        return tb.ToolResult(data=inp.value)
+
+
+@pytest.fixture
+def reg():
+    r = tb.ToolRegistry()
+    r.register(SleepTool())
+    return r
+
+
+@pytest.mark.asyncio
+async def test_results_in_order_with_errors(reg):
+    ex = ToolExecutor(reg)
+    actions = [
+        {'tool': 'sleep', 'input': {'seconds': 0.02, 'value': 'a'}},
+        {'tool': 'sleep', 'input': {'value': 'b'}},
+        {'tool': 'missing', 'input': {}},
+        {'tool': 'sleep', 'input': {'seconds': 'x'}},
+        {'tool': 'sleep', 'input': {'value': 'boom'}},
+        {'tool': 'sleep', 'input': 'x'},
+        {'tool': 'sleep', 'input': [1]},
+        {'tool': 'sleep', 'input': {1: 'a'}},
+    ]
+    res = await ex.run(actions)
+    assert [r.data for r in res[:2]] == ['a', 'b']
+    assert res[2].error == 'unknown tool: missing'
+    assert not res[3].ok and 'invalid input' in res[3].error
+    assert not res[4].ok and 'boom' in res[4].error
+    assert res[5].error == 'invalid input for sleep: expected an object, got str'
+    assert res[6].error == 'invalid input for sleep: expected an object, got list'
+    assert not res[7].ok and 'invalid input' in res[7].error
+
+
+@pytest.mark.asyncio
+async def test_per_tool_concurrency_cap_and_timeout(reg):
+    ex = ToolExecutor(reg, limits={'sleep': ToolLimits(max_concurrency=2, timeout=0.05)})
+    res = await ex.run([{'tool': 'sleep', 'input': {'seconds': 0.01}}] * 6 + [{'tool': 'sleep', 'input': {'seconds': 1}}])
+    assert reg.get('sleep').peak <= 2
+    assert all(r.ok for r in res[:6])
+    assert not res[6].ok and 'timed out' in res[6].error
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('timeout', [None, 5.0])
+async def test_tool_raised_timeout_is_a_tool_error(reg, timeout):
+    ex = ToolExecutor(reg, limits={'sleep': ToolLimits(timeout=timeout)})
+    res = await ex.run_one('sleep', {'value': 'upstream'})
+    assert not res.ok and res.error == 'TimeoutError: upstream timed out'
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_spaces_calls(reg):
+    ex = ToolExecutor(reg, limits={'sleep': ToolLimits(max_concurrency=10, rate=50, burst=1)})
+    loop = asyncio.get_running_loop()
+    t0 = loop.time()
+    await ex.run([{'tool': 'sleep', 'input': {}}] * 6)
+    assert loop.time() - t0 >= 5 / 50 * 0.9
+
+
+@pytest.mark.asyncio
+async def test_cancel_propagates_to_tools(reg):
+    ex = ToolExecutor(reg)
+    task = asyncio.ensure_future(ex.run([{'tool': 'sleep', 'input': {'seconds': 10}}] * 3))
+    await asyncio.sleep(0.01)
+    assert reg.get('sleep').active == 3
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.sleep(0)
+    assert reg.get('sleep').active == 0
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_burst():
+    now = [0.0]
+    bucket = TokenBucket(rate=1, capacity=3, clock=lambda: now[0])
+    for _ in range(3):
+        await bucket.acquire()  # burst needs no waiting
+
+
+def test_parse_actions():
+    text = '{"task_id": "t1", "actions": [{"tool": "search", "input": {"q": "x"}}], "notes": []}'
+    assert parse_actions(text) == [{'tool': 'search', 'input': {'q': 'x'}}]
+    assert parse_actions([{'tool': 'a'}, 'junk']) == [{'tool': 'a'}]
+
+
+def test_from_settings():
+    from deepr.config.settings import DeepRSettings
+
+    s = DeepRSettings()
+    s.concurrency.max_fetch_parallel = 3
+    ex = ToolExecutor.from_settings(s)
+    assert ex.max_parallel == s.concurrency.max_tool_parallel
+    assert ex.limits['web_fetch'].max_concurrency == 3
@@ -0,0 +1,88 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from deepr.retrieval.vector_store import VectorStore
+
+
+def _data(n=2000, dim=16, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    x = centers[rng.integers(0, clusters, n)] + 0.1 * rng.standard_normal((n, dim)).astype(np.float32)
+    return [f'c{i}' for i in range(n)], x
+
+
+def test_exact_search_orders_by_cosine():
+    vs = VectorStore(3)
+    vs.add(['x', 'y', 'xy'], [[1, 0, 0], [0, 1, 0], [1, 1, 0]])
+    hits = vs.search([1, 0.1, 0], k=2)
+    assert [h[0] for h in hits] == ['x', 'xy']
+    assert hits[0][1] == pytest.approx(0.995, abs=1e-3)
+
+
+def test_delete_replace_and_compact():
+    vs = VectorStore(2)
+    vs.add(['a', 'b'], [[1, 0], [0, 1]])
+    vs.add(['a'], [[0, 1]])  # replace
+    assert len(vs) == 2
+    assert vs.delete(['b', 'missing']) == 1
+    assert [h[0] for h in vs.search([0, 1], k=5)] == ['a']
+    vs.compact()
+    assert vs._n == 1 and vs.search([0, 1], k=1)[0][0] == 'a'
+
+
+def test_ivf_matches_exact_top1():
+    ids, x = _data()
+    vs = VectorStore(16, ivf_threshold=0, n_probe=4)
+    vs.add(ids, x)
+    vs.build_index(n_lists=20)
+    assert vs.indexed
+    for i in range(0, 2000, 97):
+        assert vs.search(x[i], k=1)[0][0] == vs.search(x[i], k=1, exact=True)[0][0]
+
+
+def test_ivf_sees_rows_added_and_deleted_after_build():
+    ids, x = _data()
+    vs = VectorStore(16, ivf_threshold=0)
+    vs.add(ids, x)
+    vs.build_index()
+    vs.add(['new'], [x[0] * 1.0001])
+    assert 'new' in {h[0] for h in vs.search(x[0], k=3)}
+    vs.delete(['new', 'c0'])
+    vs.compact()
+    hits = {h[0] for h in vs.search(x[0], k=5)}
+    assert 'new' not in hits and 'c0' not in hits and len(hits) == 5
+
+
+def test_save_and_load_memory_mapped(tmp_path):
+    ids, x = _data(n=500)
+    vs = VectorStore(16, ivf_threshold=0)
+    vs.add(ids, x)
+    vs.build_index()
+    vs.delete(['c1'])
+    vs.save(tmp_path / 'vs')
+    loaded = VectorStore.load(tmp_path / 'vs', ivf_threshold=0)
+    assert isinstance(loaded._vecs, np.memmap)
+    assert len(loaded) == 499 and 'c1' not in loaded and loaded.indexed
+    assert loaded.search(x[3], k=1) == vs.search(x[3], k=1)
+    loaded.add(['z'], x[:1])  # appended to the mapped file
+    assert 'z' in loaded
+
+
+def test_add_after_load_appends_in_place(tmp_path):
+    ids, x = _data(n=300)
+    vs = VectorStore(16)
+    vs.add(ids[:200], x[:200])
+    vs.save(tmp_path / 'vs')
+    inode = (tmp_path / 'vs' / 'vectors.npy').stat().st_ino
+
+    loaded = VectorStore.load(tmp_path / 'vs')
+    loaded.add(ids[200:], x[200:])
+    assert isinstance(loaded._vecs, np.memmap) and loaded._vecs.mode == 'r+'
+    loaded.save()
+    assert (tmp_path / 'vs' / 'vectors.npy').stat().st_ino == inode  # not rewritten
+
+    again = VectorStore.load(tmp_path / 'vs')
+    assert len(again) == 300
+    assert again.search(x[250], k=1)[0][0] == 'c250'
+    assert again.search(x[10], k=1) == vs.search(x[10], k=1)
@@ -0,0 +1,96 @@
+import asyncio
+import gzip
+
+import pytest
+
+respx = pytest.importorskip("respx")
+import httpx
+
+from deepr.tools.web_fetch import WebFetchInput, WebFetchTool
+from deepr.utils.disk_cache import DiskCache
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_fetch_html_and_revalidate_with_etag(tmp_path):
+    route = respx.get("https://ex.com/a").mock(
+        side_effect=[
+            httpx.Response(200, headers={"content-type": "text/html; charset=utf-8", "etag": '"v1"'}, text="<p>hi</p>"),
+            httpx.Response(304),
+        ]
+    )
+    tool = WebFetchTool(cache=DiskCache(tmp_path / "http.sqlite"))
+    r1 = await tool.run(WebFetchInput(url="https://ex.com/a"))
+    assert r1.ok and r1.data["html"] == "<p>hi</p>" and r1.data["cache"] == "miss"
+
+    tool2 = WebFetchTool(cache=DiskCache(tmp_path / "http.sqlite"))
+    r2 = await tool2.run(WebFetchInput(url="https://ex.com/a"))
+    assert r2.data["cache"] == "revalidated" and r2.data["html"] == "<p>hi</p>"
+    assert route.calls[1].request.headers["if-none-match"] == '"v1"'
+    await tool.aclose()
+    await tool2.aclose()
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_fresh_cache_skips_request(tmp_path):
+    route = respx.get("https://ex.com/b").mock(
+        return_value=httpx.Response(200, headers={"content-type": "text/plain", "cache-control": "max-age=600"}, text="body")
+    )
+    tool = WebFetchTool(cache=DiskCache(tmp_path / "http.sqlite"))
+    await tool.run(WebFetchInput(url="https://ex.com/b"))
+    r = await tool.run(WebFetchInput(url="https://ex.com/b"))
+    assert route.call_count == 1 and r.data["cache"] == "hit" and r.data["text"] == "body"
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_gzip_body_decoded_and_truncated():
+    payload = gzip.compress(b"x" * 10_000)
+    respx.get("https://ex.com/big").mock(
+        return_value=httpx.Response(200, headers={"content-type": "text/plain", "content-encoding": "gzip"}, content=payload)
+    )
+    tool = WebFetchTool(max_bytes=1000)
+    r = await tool.run(WebFetchInput(url="https://ex.com/big"))
+    assert r.data["truncated"] and r.data["text"] == "x" * 1000
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_truncated_entry_is_refetched_for_a_larger_limit(tmp_path):
+    route = respx.get("https://ex.com/long").mock(
+        return_value=httpx.Response(200, headers={"content-type": "text/plain", "etag": '"v1"'}, text="y" * 5000)
+    )
+    tool = WebFetchTool(cache=DiskCache(tmp_path / "http.sqlite"))
+    r1 = await tool.run(WebFetchInput(url="https://ex.com/long", max_bytes=1000))
+    assert r1.data["truncated"] and len(r1.data["text"]) == 1000
+
+    r2 = await tool.run(WebFetchInput(url="https://ex.com/long", max_bytes=10_000))
+    assert "if-none-match" not in route.calls[1].request.headers
+    assert r2.data["cache"] == "miss" and r2.data["text"] == "y" * 5000 and not r2.data["truncated"]
+    await tool.aclose()
+
+
+@pytest.mark.asyncio
+@respx.mock
+async def test_errors_and_per_host_limit():
+    active = 0
+    peak = 0
+
+    async def slow(request):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return httpx.Response(200, text="ok")
+
+    respx.get(url__regex=r"https://h\.com/.*").mock(side_effect=slow)
+    respx.get("https://ex.com/404").mock(return_value=httpx.Response(404))
+    tool = WebFetchTool(per_host=2)
+    results = await asyncio.gather(*(tool.run(WebFetchInput(url=f"https://h.com/{i}")) for i in range(6)))
+    assert all(r.ok for r in results) and peak <= 2
+    bad = await tool.run(WebFetchInput(url="https://ex.com/404"))
+    assert not bad.ok and "404" in bad.error
+    with pytest.raises(RuntimeError):
+        await tool.fetch_document("https://ex.com/404")